@@ -1,24 +1,66 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template
 from flask_cors import CORS
 import subprocess
-import os, json, networkx as nx
+import os, sys, time
 from threading import Lock
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from graph_cache import GraphCache
+from metrics import CONTENT_TYPE, REGISTRY
+from path_engine import MAX_BATCH_QUERIES, ShortestPathTrees, solve_path_query
+from risk_pool import MIN_POOL_QUERIES, POOLED_STRATEGIES, RISK_WORKERS, RiskPool
+from snapshot_server import SnapshotServer
+
 ai_process = None
 ai_process_lock = Lock()
 
+# Under src/supervisor.py the background jobs (and aiAnalysis, if enabled) belong to the supervisor,
+# not to whichever worker process happens to handle a request
+SUPERVISED = os.environ.get("NETROUTE_SUPERVISED") == "1"
+
 
 app = Flask(__name__)
 CORS(app)
 
-GRAPH_DIR = os.path.join("static", "graph-data")
+GRAPH_DIR = os.environ.get("NETROUTE_GRAPH_DIR", os.path.join("static", "graph-data"))
+# Build an all-pairs lowest-latency table in the background after each prediction cycle
+# (graphs up to NETROUTE_ALL_PAIRS_MAX_NODES nodes); latency queries then skip the search
+PRECOMPUTE_ALL_PAIRS = os.environ.get("NETROUTE_ALL_PAIRS") == "1"
+graph_cache = GraphCache(GRAPH_DIR, precompute_all_pairs=PRECOMPUTE_ALL_PAIRS)
+# minified, compressed graph files with ETags for the UI's 5 s polls
+snapshot_server = SnapshotServer(GRAPH_DIR)
+# NETROUTE_RISK_WORKERS > 0: large /predict-paths batches spread their risk/best searches over worker processes
+risk_pool = None
+risk_pool_lock = Lock()
+
+# request time including JSON encoding; only the routing endpoints, to keep label values fixed
+TIMED_ENDPOINTS = {"predict_path", "predict_paths"}
+REQUEST_SECONDS = REGISTRY.histogram(
+    "netroute_http_request_seconds", "Routing endpoint request time", ["endpoint", "status"])
+
+
+@app.before_request
+def start_request_timer():
+    if request.endpoint in TIMED_ENDPOINTS:
+        g.request_start = time.perf_counter()
+
+
+@app.after_request
+def observe_request_time(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=request.endpoint, status=response.status_code)
+    return response
+
 
 @app.route("/ai-analysis/start", methods=["POST"])
 def start_ai_analysis():
     global ai_process
+    if SUPERVISED:
+        return jsonify({"status": "managed by supervisor"}), 409
     with ai_process_lock:
         if ai_process is None or ai_process.poll() is not None:
-            ai_process = subprocess.Popen(["python", "src/aiAnalysis.py"], shell=True)
+            ai_process = subprocess.Popen([sys.executable, "src/aiAnalysis.py"])
             return jsonify({"status": "started"}), 200
         else:
             return jsonify({"status": "already running"}), 200
@@ -26,6 +68,8 @@ def start_ai_analysis():
 @app.route("/ai-analysis/stop", methods=["POST"])
 def stop_ai_analysis():
     global ai_process
+    if SUPERVISED:
+        return jsonify({"status": "managed by supervisor"}), 409
     with ai_process_lock:
         if ai_process and ai_process.poll() is None:
             ai_process.terminate()
@@ -35,122 +79,121 @@ def stop_ai_analysis():
         else:
             return jsonify({"status": "not running"}), 200
 
-def health_to_penalty(status):
-    return {"GREEN": 0.0, "YELLOW": 0.5, "RED": 1.0}.get(status, 1.0)
+background_processes = []
+background_lock = Lock()
 
-def launch_background_scripts():
-    print("🚀 Launching mock data scripts in background...")
-    subprocess.Popen(["node", "src/patterned_mock_graph_generator.js"], shell=True)
-    subprocess.Popen(["python", "src/predict_latency.py"], shell=True)
-    subprocess.Popen(["python", "src/predict_alarm_status.py"], shell=True)
 
-# ✅ Run once at app startup
-with app.app_context():
-    launch_background_scripts()
+def launch_background_scripts():
+    """
+    Dev server only: start the generator and prediction service from this
+    process. Never runs at import; a second call is a no-op.
+    """
+    with background_lock:
+        if background_processes:
+            return background_processes
+        print("🚀 Launching mock data scripts in background...")
+        background_processes.append(subprocess.Popen(["node", "src/patterned_mock_graph_generator.js"]))
+        background_processes.append(subprocess.Popen([sys.executable, "src/prediction_service.py"]))
+        return background_processes
 
 @app.route("/")
 def home():
     return render_template("index.html")
 
 
+@app.route("/graph-cache", methods=["GET"])
+def graph_cache_info():
+    snapshot = graph_cache.current()
+    if snapshot is None:
+        return jsonify({"version": None, "message": "Graph not built yet"})
+    return jsonify(snapshot.info())
+
+
+@app.route("/graph-snapshot/<name>", methods=["GET"])
+def graph_snapshot(name):
+    try:
+        status, body, headers = snapshot_server.respond(
+            name, if_none_match=request.headers.get("If-None-Match"),
+            accept_encoding=request.headers.get("Accept-Encoding"), since=request.args.get("since"))
+    except KeyError:
+        return jsonify({"error": f"Unknown snapshot '{name}'"}), 404
+    except (OSError, ValueError) as e:
+        return jsonify({"error": f"Error reading snapshot: {str(e)}"}), 503
+    return Response(body, status=status, headers=headers)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
 @app.route("/predict-path", methods=["POST"])
 def predict_path():
-    print("POST /predict-path called")
     data = request.get_json()
     source = data.get("source")
     target = data.get("target")
     strategy = data.get("strategy", "best")
 
     try:
-        with open(os.path.join(GRAPH_DIR, "graph_live_predicted.json")) as f:
-            latency_data = json.load(f)
-        with open(os.path.join(GRAPH_DIR, "graph_live_alarm_predicted.json")) as f:
-            alarm_data = json.load(f)
+        snapshot = graph_cache.get()
     except Exception as e:
         return jsonify({"error": f"Error reading files: {str(e)}"}), 500
 
-    health_map = {
-        node["id"]: node["properties"].get("predicted_alarm_status", "RED")
-        for node in alarm_data["nodes"]
-    }
-
-    G = nx.DiGraph()
-    for link in latency_data.get("links", []):
-        src = link["source"]
-        tgt = link["target"]
-        latency = link["properties"].get("predicted_latency_ms", 9999)
-        G.add_edge(src, tgt, latency=latency)
-
-    unhealthy_nodes = {node_id for node_id, status in health_map.items() if status == "RED"}
-    G.remove_nodes_from(unhealthy_nodes)
-
-    if not G.has_node(source) or not G.has_node(target):
-        return jsonify({"error": "Invalid source or target"}), 400
+    # repeated sources are answered from shortest-path trees kept (and repaired) across prediction cycles
+    trees = snapshot.latency_table or snapshot.trees
+    payload, status = solve_path_query(snapshot, source, target, strategy, data, trees=trees)
+    return jsonify(payload), status
+
+
+def solve_in_pool(snapshot, queries):
+    """Answers computed by the risk worker pool, by query index; empty when the pool is off or the batch is small."""
+    global risk_pool
+    if RISK_WORKERS <= 0:
+        return {}
+    indexes = [i for i, query in enumerate(queries)
+               if isinstance(query, dict) and query.get("strategy", "best") in POOLED_STRATEGIES]
+    if len(indexes) < MIN_POOL_QUERIES:
+        return {}
+    with risk_pool_lock:
+        if risk_pool is None:
+            risk_pool = RiskPool(GRAPH_DIR, RISK_WORKERS)
+    answers = risk_pool.solve(snapshot, [queries[i] for i in indexes])
+    return {i: answer for i, answer in zip(indexes, answers) if answer is not None}
+
+
+@app.route("/predict-paths", methods=["POST"])
+def predict_paths():
+    data = request.get_json()
+    queries = data.get("queries") if isinstance(data, dict) else None
+    if not isinstance(queries, list):
+        return jsonify({"error": "Expected a JSON body with a 'queries' list"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
 
     try:
-        if strategy == "hops":
-            path = nx.shortest_path(G, source=source, target=target)
-            total_latency = sum(G[path[i]][path[i + 1]]['latency'] for i in range(len(path) - 1))
-            return jsonify({
-                "paths": [{"path": path, "latency": round(total_latency, 2)}],
-                "message": "Shortest path by hops (excluding RED nodes)"
-            })
-
-        elif strategy == "latency":
-            path = nx.shortest_path(G, source=source, target=target, weight="latency")
-            total_latency = sum(G[path[i]][path[i + 1]]['latency'] for i in range(len(path) - 1))
-            return jsonify({
-                "paths": [{"path": path, "latency": round(total_latency, 2)}],
-                "message": "Lowest latency path (excluding RED nodes)"
-            })
-
-        elif strategy in ["risk", "best"]:
-            max_cutoff = 9
-            paths = []
-            used_cutoff = None
-
-            for cutoff in range(2, max_cutoff + 1):
-                try:
-                    paths = list(nx.all_simple_paths(G, source, target, cutoff=cutoff))
-                    if paths:
-                        used_cutoff = cutoff
-                        break
-                except nx.NetworkXNoPath:
-                    continue
-
-            if not paths:
-                return jsonify({
-                    "paths": [],
-                    "message": "No valid paths found",
-                    "cutoff_used": None
-                })
-
-            max_latency = max((G[u][v]['latency'] for u, v in G.edges), default=1)
-            result = []
-            for path in paths:
-                total_latency = sum(G[path[i]][path[i + 1]]['latency'] for i in range(len(path) - 1))
-                normalized_latency = total_latency / max_latency
-                avg_health_penalty = sum(health_to_penalty(health_map.get(node, "RED")) for node in path) / len(path)
-                risk_score = round(0.5 * normalized_latency + 0.5 * avg_health_penalty, 3)
-                result.append({
-                    "path": path,
-                    "latency": round(total_latency, 2),
-                    "health_penalty": round(avg_health_penalty, 2),
-                    "risk_score": risk_score
-                })
-
-            result.sort(key=lambda x: x["risk_score"])
-            return jsonify({
-                "paths": result[:5],
-                "cutoff_used": used_cutoff,
-                "message": f"Lowest risk path using cutoff {used_cutoff}"
-            })
-
-        else:
-            return jsonify({"error": f"Unknown strategy: {strategy}"}), 400
-
+        snapshot = graph_cache.get()
     except Exception as e:
-        return jsonify({"error": f"Error computing path: {str(e)}"}), 500
+        return jsonify({"error": f"Error reading files: {str(e)}"}), 500
+
+    pooled = solve_in_pool(snapshot, queries)
+    # the same trees as /predict-path, so a pair gets one answer from both endpoints;
+    # without hot-source trees, latency queries from the same source share one Dijkstra tree
+    trees = snapshot.latency_table or snapshot.trees or ShortestPathTrees(snapshot.graph)
+    results = []
+    for i, query in enumerate(queries):
+        if not isinstance(query, dict):
+            results.append({"error": "Each query must be an object", "status": 400})
+            continue
+        source = query.get("source")
+        target = query.get("target")
+        strategy = query.get("strategy", "best")
+        payload, status = pooled.get(i) or solve_path_query(snapshot, source, target, strategy, query, trees=trees)
+        results.append({"source": source, "target": target, "strategy": strategy, "status": status, **payload})
+
+    return jsonify({"version": snapshot.version, "results": results})
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # the debug reloader re-runs this file in a child process; launch from the parent only
+    if not SUPERVISED and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        launch_background_scripts()
+    app.run(debug=True, port=int(os.environ.get("NETROUTE_PORT", 5000)))
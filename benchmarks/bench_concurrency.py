@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+from supervisor import SUPERVISED_ENV, web_command
+from synthetic_topology import DEFAULT_DENSITY, generate_topology, write_graph_files
+
+STRATEGIES = ["hops", "latency", "risk", "best"]
+# dev = `python app.py` as before (Flask debug server); the others need the server package installed
+SERVERS = ["dev", "gunicorn", "waitress"]
+STARTUP_TIMEOUT_SECONDS = 30
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def server_command(server, port, workers):
+    if server == "dev":
+        return [sys.executable, "app.py"]
+    return web_command(server, "127.0.0.1", port, workers)
+
+
+def start_server(server, port, workers, graph_dir):
+    env = dict(os.environ, NETROUTE_GRAPH_DIR=graph_dir, NETROUTE_PORT=str(port), **{SUPERVISED_ENV: "1"})
+    # own process group: the debug reloader and gunicorn both fork children that must go down too
+    process = subprocess.Popen(server_command(server, port, workers), cwd=ROOT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=(os.name == "posix"))
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/graph-cache", timeout=1).read()
+            return process
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"{server} did not start within {STARTUP_TIMEOUT_SECONDS}s")
+
+
+def stop_server(process):
+    if process.poll() is not None:
+        return
+    if os.name == "posix":
+        os.killpg(process.pid, signal.SIGTERM)
+    else:
+        process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        process.wait()
+
+
+def post_path(port, query):
+    body = json.dumps(query).encode("utf-8")
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/predict-path", data=body,
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            ok = True
+    except urllib.error.HTTPError as e:
+        # 4xx/5xx answers (e.g. no path between the pair) are still served requests
+        e.read()
+        ok = True
+    except OSError:
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+
+def run_load(port, queries, concurrency):
+    """Fire `queries` from `concurrency` client threads; returns (latencies_ms, failed, wall_seconds)."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda query: post_path(port, query), queries))
+    wall = time.perf_counter() - start
+    return sorted(ms for ms, _ in results), sum(not ok for _, ok in results), wall
+
+
+def bench_server(server, port, workers, graph_dir, queries, concurrency_levels):
+    process = start_server(server, port, workers, graph_dir)
+    try:
+        run_load(port, queries[:20], 1)  # warm the graph cache
+        for concurrency in concurrency_levels:
+            latencies, failed, wall = run_load(port, queries, concurrency)
+            yield {
+                "server": server, "workers": None if server == "dev" else workers,
+                "concurrency": concurrency, "requests": len(queries), "failed": failed,
+                "rps": round(len(queries) / wall, 1),
+                "p50_ms": round(percentile(latencies, 0.50), 3),
+                "p95_ms": round(percentile(latencies, 0.95), 3),
+                "p99_ms": round(percentile(latencies, 0.99), 3),
+                "max_ms": round(latencies[-1], 3),
+            }
+    finally:
+        stop_server(process)
+
+
+def server_available(server):
+    if server == "dev":
+        return True
+    try:
+        __import__(server)
+        return True
+    except ImportError:
+        return False
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent /predict-path load against each serving mode")
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=SERVERS)
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON lines here (default: stdout)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    topology = generate_topology(args.nodes, args.density, args.seed)
+    rng = random.Random(args.seed)
+    node_ids = [node["id"] for node in topology["nodes"]]
+    queries = [{"source": s, "target": t, "strategy": rng.choice(STRATEGIES)}
+               for s, t in (rng.sample(node_ids, 2) for _ in range(args.requests))]
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as graph_dir:
+            write_graph_files(topology, graph_dir)
+            for server in args.servers:
+                if not server_available(server):
+                    print(f"❗ {server} is not installed, skipping", file=sys.stderr)
+                    continue
+                print(f"⏱️ Benchmarking {server}...", file=sys.stderr)
+                for record in bench_server(server, args.port, args.workers, graph_dir, queries, args.concurrency):
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+from bench_path_finding import summarize, timed
+from model_registry import load_model, native_model_path
+from predict_alarm_status import MODEL_PATH as ALARM_MODEL_PATH, NUM_NODE_FEATURES
+from predict_latency import MODEL_PATH as LATENCY_MODEL_PATH, NUM_LINK_FEATURES
+
+MODELS = [("latency", LATENCY_MODEL_PATH, NUM_LINK_FEATURES), ("alarm", ALARM_MODEL_PATH, NUM_NODE_FEATURES)]
+
+# Fresh interpreter: imports plus the first load, what a restarted predictor pays
+COLD_LOAD = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+from model_registry import load_model
+load_model({path!r})
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def cold_load_ms(path):
+    code = COLD_LOAD.format(src=SRC_DIR, path=path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def bench_model(name, path, num_features, rows, repeats, seed):
+    """Yield cold load, warm load and per-tick inference records for one artifact."""
+    base = {"model": name, "format": os.path.splitext(path)[1].lstrip("."),
+            "size_kb": round(os.path.getsize(path) / 1024, 1)}
+
+    yield {**base, "stage": "cold_load", **summarize([cold_load_ms(path) for _ in range(repeats)])}
+
+    load_ms = []
+    for _ in range(repeats):
+        model, elapsed = timed(load_model, path)
+        load_ms.append(elapsed)
+    yield {**base, "stage": "load", **summarize(load_ms)}
+
+    # one tick's worth of feature rows, float64 as the predictors build them
+    features = np.random.default_rng(seed).random((rows, num_features)) * 100
+    model.predict(features)
+    infer_ms = [timed(model.predict, features)[1] for _ in range(repeats)]
+    yield {**base, "stage": "infer", "rows": rows, **summarize(infer_ms)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model load and inference benchmark: joblib pickle vs native booster")
+    parser.add_argument("--rows", type=int, default=10000, help="feature rows per inference call")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON lines here (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for name, pkl_path, num_features in MODELS:
+            for path in (pkl_path, native_model_path(pkl_path)):
+                if not os.path.exists(path):
+                    print(f"❗ {path} not found, skipping", file=sys.stderr)
+                    continue
+                print(f"⏱️ Benchmarking {path}...", file=sys.stderr)
+                for record in bench_model(name, path, num_features, args.rows, args.repeats, args.seed):
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
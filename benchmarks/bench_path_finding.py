@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from graph_cache import GraphCache
+from graph_store import CSR_FILE, attach_csr_snapshot
+from path_engine import k_best_risk_paths, risk_cutoff, solve_path_query
+from snapshot_io import read_snapshot
+from synthetic_topology import DEFAULT_DENSITY, generate_topology, write_graph_files
+
+STRATEGIES = ["hops", "latency", "risk", "best"]
+DEFAULT_SIZES = [100, 1000, 5000, 10000, 50000]
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def bench_size(size, density, queries, seed):
+    """Yield one result record per (stage, strategy) for a topology of `size` nodes."""
+    topology = generate_topology(size, density, seed)
+    with tempfile.TemporaryDirectory() as graph_dir:
+        write_graph_files(topology, graph_dir)
+        base = {"nodes": size, "density": density, "links": len(topology["links"])}
+
+        # snapshot stages: JSON read + parse vs attaching the CSR snapshot, then the full cache rebuild
+        _, load_ms = timed(read_snapshot, os.path.join(graph_dir, "graph_live_predicted.json"))
+        _, attach_ms = timed(attach_csr_snapshot, os.path.join(graph_dir, CSR_FILE))
+        cache = GraphCache(graph_dir)
+        snapshot, build_ms = timed(cache.get)
+        yield {**base, "stage": "load", "strategy": None, **summarize([load_ms])}
+        yield {**base, "stage": "attach", "strategy": None, **summarize([attach_ms])}
+        yield {**base, "stage": "build", "strategy": None, **summarize([build_ms])}
+
+        rng = random.Random(seed)
+        node_ids = list(snapshot.graph.nodes)
+        pairs = [tuple(rng.sample(node_ids, 2)) for _ in range(queries)]
+
+        for strategy in STRATEGIES:
+            end_to_end = []
+            exhausted = 0
+            for source, target in pairs:
+                start = time.perf_counter()
+                # what /predict-path does per request: cache lookup, search, JSON encoding
+                payload, status = solve_path_query(cache.get(), source, target, strategy)
+                json.dumps(payload)
+                end_to_end.append((time.perf_counter() - start) * 1000)
+                exhausted += bool(payload.get("budget_exhausted"))
+            yield {**base, "stage": "end_to_end", "strategy": strategy,
+                   "budget_exhausted": exhausted, **summarize(end_to_end)}
+
+        # /predict-path from sources that keep being queried: the third query is a hot-source tree hit,
+        # then 1% of the predicted latencies change and the next query repairs the tree instead of a full rerun
+        hit_ms = []
+        for source, target in pairs:
+            for _ in range(3):
+                hot = cache.get()
+                _, elapsed = timed(solve_path_query, hot, source, target, "latency", trees=hot.trees)
+            hit_ms.append(elapsed)
+        yield {**base, "stage": "hot_hit", "strategy": "latency", **summarize(hit_ms)}
+
+        for link in rng.sample(topology["links"], len(topology["links"]) // 100):
+            link["properties"]["predicted_latency_ms"] = round(rng.uniform(5, 30), 2)
+        write_graph_files(topology, graph_dir)
+        repair_ms = []
+        for source, target in pairs:
+            hot = cache.get()
+            _, elapsed = timed(solve_path_query, hot, source, target, "latency", trees=hot.trees)
+            repair_ms.append(elapsed)
+        yield {**base, "stage": "hot_repair", "strategy": "latency", **summarize(repair_ms)}
+
+        # risk search split into its two stages
+        cutoff_ms, search_ms = [], []
+        for source, target in pairs:
+            cutoff, elapsed = timed(risk_cutoff, snapshot.graph, source, target)
+            cutoff_ms.append(elapsed)
+            if cutoff is not None:
+                _, elapsed = timed(k_best_risk_paths, snapshot.graph, snapshot.health_map, source, target, cutoff)
+                search_ms.append(elapsed)
+        yield {**base, "stage": "risk_cutoff", "strategy": "risk", **summarize(cutoff_ms)}
+        if search_ms:
+            yield {**base, "stage": "risk_search", "strategy": "risk", **summarize(search_ms)}
+
+
+def compare(results, baseline_path, tolerance):
+    """Return the records whose p50 regressed by more than `tolerance` x the baseline."""
+    with open(baseline_path) as f:
+        baseline = {(r["nodes"], r["stage"], r["strategy"]): r for r in map(json.loads, f) if r}
+    regressions = []
+    for record in results:
+        old = baseline.get((record["nodes"], record["stage"], record["strategy"]))
+        if old and old["p50_ms"] > 0 and record["p50_ms"] > old["p50_ms"] * tolerance:
+            regressions.append((record, old))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Path-finding benchmark over synthetic topologies")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY, help="average out-degree")
+    parser.add_argument("--queries", type=int, default=50, help="random source/target pairs per strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON lines here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON lines from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed p50 slowdown vs baseline")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = []
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for size in args.sizes:
+            print(f"⏱️ Benchmarking {size} nodes...", file=sys.stderr)
+            for record in bench_size(size, args.density, args.queries, args.seed):
+                results.append(record)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for record, old in regressions:
+            print(f"❗ Regression: {record['nodes']} nodes {record['stage']}/{record['strategy']} "
+                  f"p50 {old['p50_ms']} -> {record['p50_ms']} ms", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BENCH_DIR, ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+sys.path.insert(0, SRC_DIR)
+from bench_path_finding import summarize
+from synthetic_topology import generate_topology, write_graph_files
+
+# What each entry point does before it can serve, run in a fresh interpreter (cwd = repo root, like the scripts).
+# first_path_query = import app, build the graph and answer one risk query (the deferred imports included).
+TARGETS = {
+    "app": "import app",
+    "wsgi": "import wsgi",
+    "ai_analysis": "import aiAnalysis; aiAnalysis.create_app()",
+    "prediction_service": "import prediction_service",
+    "first_path_query": (
+        "import app\n"
+        "client = app.app.test_client()\n"
+        "response = client.post('/predict-path', json={'source': SOURCE, 'target': TARGET, 'strategy': 'risk'})\n"
+        "assert response.get_json()['paths'], response.get_json()"
+    ),
+}
+# cold-start budget per target, p50 in ms: ~1.5x what a 1-CPU Linux VM measures; --budget-scale for other machines
+BUDGETS_MS = {"app": 500, "wsgi": 500, "ai_analysis": 700, "prediction_service": 300, "first_path_query": 900}
+
+RUN = """
+import sys, time
+start = time.perf_counter()
+sys.path[:0] = [{root!r}, {src!r}]
+SOURCE, TARGET = {source!r}, {target!r}
+{code}
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def run_cold(code, graph_dir, source, target):
+    """(total ms, {top-level package: import ms}) for one fresh interpreter."""
+    program = RUN.format(root=ROOT_DIR, src=SRC_DIR, source=source, target=target, code=code)
+    env = dict(os.environ, NETROUTE_GRAPH_DIR=graph_dir)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", program], cwd=ROOT_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1]), import_profile(out.stderr)
+
+
+def import_profile(stderr):
+    """Self import time per top-level package (scipy, flask, graph_core, ...) from `python -X importtime` output."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us) / 1000
+    return packages
+
+
+def bench_target(name, code, graph_dir, source, target, repeats, top):
+    totals = []
+    profiles = []
+    for _ in range(repeats):
+        total, profile = run_cold(code, graph_dir, source, target)
+        totals.append(total)
+        profiles.append(profile)
+    yield {"target": name, "stage": "cold_start", "budget_ms": BUDGETS_MS.get(name), **summarize(totals)}
+
+    # median per package over the runs, heaviest first
+    packages = {package for profile in profiles for package in profile}
+    medians = {package: sorted(profile.get(package, 0) for profile in profiles)[len(profiles) // 2]
+               for package in packages}
+    heaviest = sorted(medians.items(), key=lambda item: -item[1])[:top]
+    yield {"target": name, "stage": "import_profile", "imports_ms": round(sum(medians.values()), 3),
+           "packages": [{"package": package, "ms": round(ms, 3)} for package, ms in heaviest]}
+
+
+def compare(results, baseline_path, tolerance):
+    """Cold-start records whose p50 regressed by more than `tolerance` x the baseline."""
+    with open(baseline_path) as f:
+        baseline = {r["target"]: r for r in map(json.loads, f) if r and r.get("stage") == "cold_start"}
+    regressions = []
+    for record in results:
+        old = baseline.get(record["target"]) if record["stage"] == "cold_start" else None
+        if old and old["p50_ms"] > 0 and record["p50_ms"] > old["p50_ms"] * tolerance:
+            regressions.append((record, old))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cold-start time and import profile of each entry point")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--repeats", type=int, default=5, help="fresh interpreters per target")
+    parser.add_argument("--nodes", type=int, default=1000, help="synthetic topology size for first_path_query")
+    parser.add_argument("--top", type=int, default=15, help="packages listed per import profile")
+    parser.add_argument("--output", help="write JSON lines here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON lines from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed p50 slowdown vs baseline")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply the cold-start budgets (e.g. 2 on slow CI machines); 0 = do not check")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    topology = generate_topology(args.nodes)
+    # endpoints of a link between two healthy nodes, so the risk query has a path to search
+    healthy = {node["id"] for node in topology["nodes"] if node["properties"]["predicted_alarm_status"] != "RED"}
+    source, target = next((link["source"], link["target"]) for link in topology["links"]
+                          if link["source"] in healthy and link["target"] in healthy)
+    results = []
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as graph_dir:
+            write_graph_files(topology, graph_dir)
+            for name in args.targets:
+                print(f"⏱️ Cold-starting {name}...", file=sys.stderr)
+                for record in bench_target(name, TARGETS[name], graph_dir, source, target, args.repeats, args.top):
+                    results.append(record)
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    failed = False
+    if args.budget_scale > 0:
+        for record in results:
+            budget = record.get("budget_ms")
+            if budget and record["p50_ms"] > budget * args.budget_scale:
+                print(f"❗ Over budget: {record['target']} cold start p50 {record['p50_ms']} ms "
+                      f"> {budget * args.budget_scale:g} ms", file=sys.stderr)
+                failed = True
+    if args.baseline:
+        for record, old in compare(results, args.baseline, args.tolerance):
+            print(f"❗ Regression: {record['target']} cold start p50 {old['p50_ms']} -> {record['p50_ms']} ms",
+                  file=sys.stderr)
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,360 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from bench_concurrency import (ROOT_DIR, SERVERS, STARTUP_TIMEOUT_SECONDS, percentile, post_path, server_available,
+                               start_server, stop_server)
+from synthetic_topology import DEFAULT_DENSITY, generate_topology, write_graph_files
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is read instead on Linux
+    psutil = None
+
+DEFAULT_MIX = ["hops=1", "latency=1", "risk=1", "best=1"]
+# share of links whose latency moves, and of nodes whose predicted alarm flips, per synthetic tick
+LINK_CHURN = 0.1
+NODE_CHURN = 0.02
+
+
+def parse_mix(items):
+    """['risk=2', 'best=1'] -> (['risk', 'best'], [2.0, 1.0])"""
+    strategies, weights = [], []
+    for item in items:
+        strategy, _, weight = item.partition("=")
+        strategies.append(strategy)
+        weights.append(float(weight or 1))
+    return strategies, weights
+
+
+def summarize_ms(samples):
+    if not samples:
+        return {"p50_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    return {"p50_ms": round(percentile(ordered, 0.50), 3), "p99_ms": round(percentile(ordered, 0.99), 3),
+            "max_ms": round(ordered[-1], 3)}
+
+
+def rss_mb(pid):
+    """Resident memory of `pid` and its children (the debug reloader and gunicorn serve from children), or None."""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+            return round(sum(p.memory_info().rss for p in processes) / 2 ** 20, 1)
+        except psutil.Error:
+            return None
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except (OSError, StopIteration, ValueError):
+        return None if total == 0 else round(total / 1024, 1)
+    return round(total / 1024, 1)
+
+
+class TopologyFeed:
+    """
+    Stands in for the generator + prediction service: every `interval` seconds
+    it moves some link latencies and node alarms and republishes the graph
+    files (and CSR snapshot), so the API rebuilds its graph and aiAnalysis
+    pushes deltas while the load runs.
+    """
+
+    def __init__(self, topology, graph_dir, interval, seed):
+        self.topology = topology
+        self.graph_dir = graph_dir
+        self.interval = interval
+        self.rng = random.Random(seed)
+        self.generation = write_graph_files(topology, graph_dir)
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def tick(self):
+        rng = self.rng
+        links = self.topology["links"]
+        for link in rng.sample(links, max(1, int(len(links) * LINK_CHURN))):
+            props = link["properties"]
+            props["latency_ms"] = max(1, int(props["latency_ms"] * rng.uniform(0.8, 1.25)))
+            props["predicted_latency_ms"] = round(props["latency_ms"] + rng.uniform(-3, 3), 2)
+        nodes = self.topology["nodes"]
+        for node in rng.sample(nodes, max(1, int(len(nodes) * NODE_CHURN))):
+            node["properties"]["predicted_alarm_status"] = rng.choice(["GREEN", "YELLOW", "RED"])
+        self.generation = write_graph_files(self.topology, self.graph_dir, self.generation)
+        self.ticks += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.tick()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="topology-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def start_ai_analysis(port, graph_dir):
+    env = dict(os.environ, NETROUTE_GRAPH_DIR=graph_dir, NETROUTE_AI_PORT=str(port))
+    process = subprocess.Popen([sys.executable, "src/aiAnalysis.py"], cwd=ROOT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=(os.name == "posix"))
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"aiAnalysis.py exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/ai-analysis/stats", timeout=1).read()
+            return process
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"aiAnalysis.py did not start within {STARTUP_TIMEOUT_SECONDS}s")
+
+
+class FeedClients:
+    """
+    N Socket.IO clients on the aiAnalysis feed. Fan-out latency is receive
+    time minus the server's `emitted_at` on each dataDelta (same host, same
+    clock); a sequence gap counts as a missed delta.
+    """
+
+    def __init__(self, port, count):
+        # python-socketio[client] (websocket-client for the transport); only needed when --clients > 0
+        import socketio
+        try:
+            import websocket  # noqa: F401
+        except ImportError:
+            raise RuntimeError('Socket.IO clients need: pip install "python-socketio[client]" (or run --clients 0)')
+        self.lock = threading.Lock()
+        self.fanout_ms = []
+        self.connect_ms = []
+        self.deltas = 0
+        self.missed = 0
+        self.clients = []
+        for _ in range(count):
+            client = socketio.Client(reconnection=False)
+            state = {"seq": None, "connected_at": None}
+            client.on("dataUpdate", self._on_update(state))
+            client.on("dataDelta", self._on_delta(state))
+            state["connected_at"] = time.time()
+            client.connect(f"http://127.0.0.1:{port}", transports=["websocket"])
+            self.clients.append(client)
+
+    def _on_update(self, state):
+        def handler(payload):
+            with self.lock:
+                state["seq"] = payload.get("seq")
+                if state["connected_at"] is not None:
+                    # connect -> first full state, once per client
+                    self.connect_ms.append((time.time() - state["connected_at"]) * 1000)
+                    state["connected_at"] = None
+        return handler
+
+    def _on_delta(self, state):
+        def handler(delta):
+            received = time.time()
+            with self.lock:
+                if state["seq"] is not None and delta.get("seq") != state["seq"] + 1:
+                    self.missed += 1
+                state["seq"] = delta.get("seq")
+                self.deltas += 1
+                if "emitted_at" in delta:
+                    self.fanout_ms.append((received - delta["emitted_at"]) * 1000)
+        return handler
+
+    def take_window(self):
+        with self.lock:
+            samples, self.fanout_ms = self.fanout_ms, []
+            return samples
+
+    def close(self):
+        for client in self.clients:
+            client.disconnect()
+
+
+class PathLoad:
+    """Closed-loop /predict-path load: `concurrency` threads, each sending its next query when the last returns."""
+
+    def __init__(self, port, node_ids, strategies, weights, concurrency, seed):
+        self.port = port
+        self.node_ids = node_ids
+        self.strategies = strategies
+        self.weights = weights
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.failed = 0
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, args=(seed + i,), daemon=True)
+                         for i in range(concurrency)]
+
+    def _run(self, seed):
+        rng = random.Random(seed)
+        while not self._stop.is_set():
+            source, target = rng.sample(self.node_ids, 2)
+            strategy = rng.choices(self.strategies, self.weights)[0]
+            ms, ok = post_path(self.port, {"source": source, "target": target, "strategy": strategy})
+            with self.lock:
+                if ok:
+                    self.latencies.append(ms)
+                else:
+                    self.failed += 1
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def take_window(self):
+        with self.lock:
+            samples, failed = self.latencies, self.failed
+            self.latencies, self.failed = [], 0
+            return samples, failed
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def run_soak(args, out):
+    strategies, weights = parse_mix(args.mix)
+    topology = generate_topology(args.nodes, args.density, args.seed)
+    node_ids = [node["id"] for node in topology["nodes"]]
+    processes = {}
+    feed = clients = load = None
+    with tempfile.TemporaryDirectory() as graph_dir:
+        feed = TopologyFeed(topology, graph_dir, args.tick, args.seed)
+        try:
+            print(f"⏱️ Starting {args.server} on port {args.port}...", file=sys.stderr)
+            processes["api"] = start_server(args.server, args.port, args.workers, graph_dir)
+            if args.clients > 0:
+                print(f"⏱️ Starting aiAnalysis on port {args.ai_port} with {args.clients} clients...", file=sys.stderr)
+                processes["ai_analysis"] = start_ai_analysis(args.ai_port, graph_dir)
+                clients = FeedClients(args.ai_port, args.clients)
+
+            load = PathLoad(args.port, node_ids, strategies, weights, args.concurrency, args.seed)
+            feed.start()
+            load.start()
+            time.sleep(args.warmup)
+            load.take_window()
+            if clients is not None:
+                clients.take_window()
+
+            rss = {name: [] for name in processes}
+            all_latencies, all_fanout, total_failed = [], [], 0
+            start = time.monotonic()
+            window_start = start
+            while time.monotonic() - start < args.duration:
+                time.sleep(min(args.report_every, max(0.0, args.duration - (time.monotonic() - start))))
+                now = time.monotonic()
+                latencies, failed = load.take_window()
+                fanout = clients.take_window() if clients is not None else []
+                all_latencies.extend(latencies)
+                all_fanout.extend(fanout)
+                total_failed += failed
+                record = {"kind": "window", "elapsed_s": round(now - start, 1), "requests": len(latencies),
+                          "failed": failed, "rps": round(len(latencies) / max(now - window_start, 1e-9), 1),
+                          **summarize_ms(latencies), "ticks": feed.ticks}
+                if clients is not None:
+                    record["fanout"] = {"deltas": len(fanout), **summarize_ms(fanout)}
+                for name, process in processes.items():
+                    record[f"{name}_rss_mb"] = rss_mb(process.pid)
+                    rss[name].append(record[f"{name}_rss_mb"])
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                window_start = now
+
+            elapsed = time.monotonic() - start
+            summary = {"kind": "summary", "server": args.server, "nodes": args.nodes, "concurrency": args.concurrency,
+                       "mix": dict(zip(strategies, weights)), "duration_s": round(elapsed, 1),
+                       "requests": len(all_latencies), "failed": total_failed,
+                       "rps": round(len(all_latencies) / max(elapsed, 1e-9), 1), **summarize_ms(all_latencies),
+                       "ticks": feed.ticks}
+            if clients is not None:
+                summary["fanout"] = {"clients": args.clients, "deltas_received": clients.deltas,
+                                     "missed": clients.missed, **summarize_ms(all_fanout),
+                                     "connect_p50_ms": summarize_ms(clients.connect_ms)["p50_ms"]}
+            for name, samples in rss.items():
+                known = [sample for sample in samples if sample is not None]
+                summary[f"{name}_rss_mb"] = {
+                    "start": known[0] if known else None, "end": known[-1] if known else None,
+                    "max": max(known) if known else None,
+                    "growth": round(known[-1] - known[0], 1) if known else None,
+                }
+            out.write(json.dumps(summary) + "\n")
+            out.flush()
+            return summary
+        finally:
+            if load is not None:
+                load.stop()
+            feed.stop()
+            if clients is not None:
+                clients.close()
+            for process in processes.values():
+                stop_server(process)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Soak test: /predict-path load with a strategy mix plus Socket.IO clients on the aiAnalysis feed, "
+                    "against local servers fed by a synthetic topology")
+    parser.add_argument("--server", choices=SERVERS, default="dev")
+    parser.add_argument("--workers", type=int, default=4, help="WSGI worker processes (gunicorn/waitress)")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY)
+    parser.add_argument("--mix", nargs="+", default=DEFAULT_MIX, help="strategy=weight, e.g. risk=3 best=1")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads sending /predict-path")
+    parser.add_argument("--clients", type=int, default=10, help="Socket.IO clients on the aiAnalysis feed (0 = none)")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of measured load (hours for a soak)")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of unmeasured load first")
+    parser.add_argument("--report-every", type=float, default=10, help="seconds per window record")
+    parser.add_argument("--tick", type=float, default=5, help="seconds between synthetic topology updates")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--ai-port", type=int, default=5098)
+    parser.add_argument("--max-rss-growth-mb", type=float,
+                        help="exit 1 if any server's memory grew more than this over the measured run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON lines here (default: stdout)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not server_available(args.server):
+        sys.exit(f"❗ {args.server} is not installed")
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        summary = run_soak(args, out)
+    except RuntimeError as e:
+        sys.exit(f"❗ {e}")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ {summary['requests']} requests, {summary['rps']} rps, p50 {summary['p50_ms']} ms, "
+          f"p99 {summary['p99_ms']} ms", file=sys.stderr)
+    if args.max_rss_growth_mb is not None:
+        grown = [name for name in ("api", "ai_analysis")
+                 if (summary.get(f"{name}_rss_mb") or {}).get("growth") is not None
+                 and summary[f"{name}_rss_mb"]["growth"] > args.max_rss_growth_mb]
+        for name in grown:
+            print(f"❗ {name} memory grew {summary[f'{name}_rss_mb']['growth']} MB", file=sys.stderr)
+        sys.exit(1 if grown else 0)
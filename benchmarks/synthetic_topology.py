@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from graph_store import CSR_FILE, encode_csr_snapshot, publish_csr_snapshot
+from snapshot_io import encode_snapshot, next_generation, publish_snapshot
+
+# Same role mix as static/graph-data/graph.json
+NODE_TYPES = [
+    ("gNB", 0.30), ("UPF", 0.15), ("AMF", 0.12), ("EDGE_DC", 0.12),
+    ("SMF", 0.10), ("FIREWALL", 0.075), ("MONITOR", 0.075), ("CORE_DC", 0.06),
+]
+LOCATIONS = ["Paris", "Sydney", "Tokyo", "Mumbai", "Berlin", "Toronto", "Lagos", "São Paulo"]
+ALARMS = [("GREEN", 0.6), ("YELLOW", 0.3), ("RED", 0.1)]
+DEFAULT_DENSITY = 2.25  # average out-degree of graph.json
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def generate_topology(num_nodes, density=DEFAULT_DENSITY, seed=0):
+    """
+    Build a synthetic 5G topology shaped like the graph files: typed nodes with
+    live metrics, predicted alarm status, and directed links carrying latency,
+    bandwidth and predicted latency.
+    """
+    rng = random.Random(seed)
+    width = max(3, len(str(num_nodes)))
+    counts = {}
+    nodes = []
+    for _ in range(num_nodes):
+        node_type = _weighted(rng, NODE_TYPES)
+        counts[node_type] = counts.get(node_type, 0) + 1
+        node_id = f"{node_type}_{counts[node_type]:0{width}d}"
+        latency_avg = round(rng.uniform(5, 30), 2)
+        alarm = _weighted(rng, ALARMS)
+        nodes.append({
+            "id": node_id,
+            "properties": {
+                "id": node_id,
+                "type": node_type,
+                "location": rng.choice(LOCATIONS),
+                "cpu_usage": round(rng.uniform(5, 95), 2),
+                "memory_usage": round(rng.uniform(5, 95), 2),
+                "latency_avg": latency_avg,
+                "packet_loss_rate": round(latency_avg / 20 + rng.random(), 2),
+                "alarm_status": alarm,
+                "predicted_alarm_status": alarm if rng.random() < 0.8 else _weighted(rng, ALARMS),
+                "is_overloaded": False,
+            },
+            "labels": ["Node"],
+        })
+
+    links = []
+    seen = set()
+    num_links = int(num_nodes * density)
+    while len(links) < num_links:
+        src = rng.randrange(num_nodes)
+        tgt = rng.randrange(num_nodes)
+        if src == tgt or (src, tgt) in seen:
+            continue
+        seen.add((src, tgt))
+        latency = max(5, int((nodes[src]["properties"]["latency_avg"] + nodes[tgt]["properties"]["latency_avg"]) / 2
+                             + rng.uniform(-5, 5)))
+        links.append({
+            "source": nodes[src]["id"],
+            "target": nodes[tgt]["id"],
+            "type": "CONNECTED_TO",
+            "properties": {
+                "bandwidth_mbps": rng.choice([50, 100, 200, 500, 1000]),
+                "latency_ms": latency,
+                "predicted_latency_ms": round(latency + rng.uniform(-3, 3), 2),
+            },
+        })
+
+    return {"nodes": nodes, "links": links}
+
+
+def write_graph_files(graph, graph_dir, generation=0, csr=True):
+    """
+    Publish the topology as the live, predicted-latency and predicted-alarm files
+    (plus the CSR snapshot the prediction service writes, unless `csr` is off).
+    Returns the generation.
+    """
+    os.makedirs(graph_dir, exist_ok=True)
+    generation = next_generation(generation)
+    for name in ("graph_live.json", "graph_live_predicted.json", "graph_live_alarm_predicted.json"):
+        publish_snapshot(os.path.join(graph_dir, name), encode_snapshot(graph, generation))
+    if csr:
+        predicted_latency = [link["properties"].get("predicted_latency_ms") for link in graph["links"]]
+        publish_csr_snapshot(os.path.join(graph_dir, CSR_FILE), encode_csr_snapshot(graph, predicted_latency, generation))
+    return generation
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic 5G topology as graph-data files")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY, help="average out-degree")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=os.path.join("benchmarks", "out", "graph-data"))
+    args = parser.parse_args()
+    topology = generate_topology(args.nodes, args.density, args.seed)
+    write_graph_files(topology, args.out)
+    print(f"✅ Wrote {len(topology['nodes'])} nodes / {len(topology['links'])} links to {args.out}")
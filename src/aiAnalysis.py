@@ -1,18 +1,22 @@
-from flask import Flask, jsonify
-from flask_socketio import SocketIO
+from flask import Flask, jsonify, request
+from flask_socketio import SocketIO, emit
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-import json
 import os
 import time
 import threading
 
-print(">>> aiAnalysis.py started")
+from analysis_engine import AnalysisEngine, RowDeltaTracker
+from graph_store import CSR_FILE
+from history_store import HISTORY_DIR, HistoryStore
+from snapshot_io import read_snapshot
 
-app = Flask(__name__, static_url_path='/static')
-socketio = SocketIO(app, cors_allowed_origins='*', async_mode='threading')
+# Built by create_app(); importing this module starts nothing (no server, watcher or worker thread)
+socketio = None
 
-DATA_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static', 'graph-data'))
+DATA_FOLDER = os.path.abspath(os.environ.get("NETROUTE_GRAPH_DIR")
+                              or os.path.join(os.path.dirname(__file__), '..', 'static', 'graph-data'))
+PORT = int(os.environ.get("NETROUTE_AI_PORT", 5050))
 FILES = {
     'real': os.path.join(DATA_FOLDER, 'graph_live.json'),
     'pred_latency': os.path.join(DATA_FOLDER, 'graph_live_predicted.json'),
@@ -23,191 +27,220 @@ FILES = {
 if not os.path.isdir(DATA_FOLDER):
     print(f"[WARN] DATA_FOLDER does not exist: {DATA_FOLDER}")
 
-# Global to only emit when data changes
-_last_emitted_hash = None
-_last_emit_lock = threading.Lock()
+# Telemetry history written by the prediction service (relative paths are from the repo root, where it runs)
+history = HistoryStore(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', HISTORY_DIR)))
+DEFAULT_QUANTILES = [50, 95]
 
+# Fields of the rows clients have seen; only rows whose fields changed are pushed
+delta_tracker = RowDeltaTracker()
 
-def wait_for_stable_file(path, timeout=2.0, interval=0.1):
-    """
-    Wait until file size is stable for two successive checks or until timeout.
-    Returns True if stable, False on timeout or missing file.
-    """
-    start = time.time()
-    try:
-        last_size = os.path.getsize(path)
-    except Exception:
-        return False
-    while time.time() - start < timeout:
-        time.sleep(interval)
-        try:
-            size = os.path.getsize(path)
-        except Exception:
-            return False
-        if size == last_size:
-            # confirm twice to be safer
-            time.sleep(interval)
-            try:
-                size2 = os.path.getsize(path)
-            except Exception:
-                return False
-            if size2 == last_size:
-                return True
-            last_size = size2
-        else:
-            last_size = size
-    return False
-
-
-# Safe JSON loader with retry + stability check
-def safe_json_load(path, retries=6, delay=0.2):
+
+# Writers publish snapshots atomically (temp file + rename), so one read is enough
+def safe_json_load(path):
     if not os.path.isfile(path):
         print(f"[INFO] JSON file missing: {path}")
         return {}
+    try:
+        return read_snapshot(path)
+    except Exception as e:
+        print(f"[ERROR] Could not load {path}: {e}")
+        return {}
+
+
+# Per-node rows kept between refreshes; only changed files and touched nodes are recomputed.
+# Predictions come from the prediction service's memory-mapped CSR snapshot when it is current.
+analysis_engine = AnalysisEngine(FILES, safe_json_load, csr_path=os.path.join(DATA_FOLDER, CSR_FILE))
+
 
-    # Wait until file size is stable (helps if writer is mid-write)
-    stable = wait_for_stable_file(path, timeout=2.0, interval=0.1)
-    if not stable:
-        # still try reading with retries; it may still be OK
-        print(f"[WARN] file not stable before read: {path}")
-
-    for attempt in range(1, retries + 1):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                text = f.read()
-            # quick sanity: empty file -> skip
-            if not text.strip():
-                raise ValueError("empty file")
-            # Attempt to parse
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            print(f"[JSON ERROR] {path} invalid JSON (attempt {attempt}/{retries}): {e}")
-            time.sleep(delay)
-        except ValueError as e:
-            # empty file case
-            print(f"[VALUE ERROR] {path} read issue (attempt {attempt}/{retries}): {e}")
-            time.sleep(delay)
-        except Exception as e:
-            print(f"[ERROR] Could not load {path} (attempt {attempt}/{retries}): {e}")
-            return {}
-    print(f"[FAIL] Failed to read valid JSON from {path} after {retries} attempts")
-    return {}
-
-
-@app.route('/ai-analysis')
 def ai_analysis():
     return jsonify(compute_ai_analysis())
 
 
 def compute_ai_analysis():
-    real_data = safe_json_load(FILES['real'])
-    pred_latency_data = safe_json_load(FILES['pred_latency'])
-    pred_alarm_data = safe_json_load(FILES['pred_alarm'])
-
-    # normalize node list -> dict mapping id -> properties
-    def nodes_to_map(data):
-        out = {}
-        nodes = data.get('nodes') if isinstance(data, dict) else None
-        if not nodes:
-            return out
-        for node in nodes:
-            nid = node.get('id')
-            props = node.get('properties', {}) if isinstance(node, dict) else {}
-            if nid is not None:
-                out[nid] = props
-        return out
-
-    real_nodes = nodes_to_map(real_data)
-    pred_nodes = nodes_to_map(pred_alarm_data)
-    real_links = real_data.get('links', []) if isinstance(real_data, dict) else []
-    pred_links = pred_latency_data.get('links', []) if isinstance(pred_latency_data, dict) else []
-
-    def average_latency(links, node_id, key):
-        latencies = []
-        for link in links:
-            # defensive access - links might be dicts but not have expected keys
-            source = link.get('source')
-            target = link.get('target')
-            props = link.get('properties', {}) if isinstance(link, dict) else {}
-            if source == node_id or target == node_id:
-                lat = None
-                # guard when the property might be nested or string numeric
-                if isinstance(props, dict):
-                    lat = props.get(key)
-                if lat is None:
-                    # attempt to convert string numbers to float
-                    raw = props.get(key) if isinstance(props, dict) else None
-                    try:
-                        lat = float(raw) if raw is not None else None
-                    except Exception:
-                        lat = None
-                if lat is not None:
-                    try:
-                        latencies.append(float(lat))
-                    except Exception:
-                        pass
-        return round(sum(latencies) / len(latencies), 2) if latencies else None
-
-    all_node_ids = set(list(real_nodes.keys()) + list(pred_nodes.keys()))
-    result = []
-
-    for node_id in sorted(all_node_ids, key=lambda x: str(x)):
-        real_node = real_nodes.get(node_id, {})
-        pred_node = pred_nodes.get(node_id, {})
-
-        result.append({
-            "node": node_id,
-            "real_latency": average_latency(real_links, node_id, "latency_ms"),
-            "predicted_latency": average_latency(pred_links, node_id, "predicted_latency_ms"),
-            "real_alarm": real_node.get("alarm_status", "UNKNOWN"),
-            "predicted_alarm": pred_node.get("predicted_alarm_status", "UNKNOWN")
-        })
-
-    return result
-
-
-@socketio.on('connect')
+    return analysis_engine.refresh()
+
+
+def ai_analysis_history():
+    """
+    Windowed percentiles per node or link from the history store, e.g.
+    /ai-analysis/history?table=link&metric=latency_ms&minutes=15&q=50&q=99
+    (optionally narrowed with id=<node> or source=<node>&target=<node>).
+    """
+    table = request.args.get('table', 'node')
+    metric = request.args.get('metric', 'latency_avg' if table == 'node' else 'latency_ms')
+    if table not in ('node', 'link'):
+        return jsonify({"error": "table must be 'node' or 'link'"}), 400
+    try:
+        minutes = request.args.get('minutes', type=float)
+        quantiles = [float(q) for q in request.args.getlist('q')] or DEFAULT_QUANTILES
+    except ValueError:
+        return jsonify({"error": "minutes and q must be numbers"}), 400
+    if not all(0 <= q <= 100 for q in quantiles):
+        return jsonify({"error": "q must be between 0 and 100"}), 400
+
+    keys = None
+    if table == 'node' and 'id' in request.args:
+        keys = request.args.getlist('id')
+    elif table == 'link' and ('source' in request.args or 'target' in request.args):
+        keys = [(request.args.get('source'), request.args.get('target'))]
+    if keys is not None:
+        # the query string has no types: look up numeric ids both as given and as numbers
+        keys = [candidate for key in keys for candidate in _id_candidates(key)]
+
+    try:
+        ticks, values = history.percentiles(table, metric, quantiles,
+                                            seconds=minutes * 60 if minutes else None, keys=keys)
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+    series = []
+    for key, row in values.items():
+        entry = {"source": key[0], "target": key[1]} if table == 'link' else {"id": key}
+        entry["values"] = dict(zip((f"p{q:g}" for q in quantiles), row))
+        series.append(entry)
+    return jsonify({"table": table, "metric": metric, "window_seconds": minutes * 60 if minutes else None,
+                    "ticks": ticks, "quantiles": quantiles, "series": series})
+
+
+def _id_candidates(key):
+    if isinstance(key, tuple):
+        return [(source, target) for source in _id_candidates(key[0]) for target in _id_candidates(key[1])]
+    try:
+        return [key, int(key)]
+    except (TypeError, ValueError):
+        return [key]
+
+
+def ai_analysis_stats():
+    stats = refresher.stats()
+    stats["seq"] = delta_tracker.seq
+    return jsonify(stats)
+
+
+def full_state():
+    if delta_tracker.seq == 0:
+        delta_tracker.delta(compute_ai_analysis())
+    state = delta_tracker.full()
+    state['emitted_at'] = time.time()
+    return state
+
+
 def handle_connect():
     print('Client connected')
+    # give the new client a baseline sequence number
+    emit('dataUpdate', full_state())
+
+
+def handle_resync():
+    print('[Socket] Client requested full resync')
+    emit('dataUpdate', full_state())
 
 
 class FileChangeHandler(FileSystemEventHandler):
     def on_modified(self, event):
-        # We only care about JSON files in our folder
         if event.is_directory:
             return
-        src = os.path.abspath(event.src_path)
-        if not src.endswith('.json'):
+        self.handle_change(event.src_path)
+
+    def on_moved(self, event):
+        # atomic snapshot writers rename a temp file over the target
+        if event.is_directory:
+            return
+        self.handle_change(event.dest_path)
+
+    def handle_change(self, path):
+        # We only care about JSON snapshots (and the CSR mirror) in our folder
+        src = os.path.abspath(path)
+        if not src.endswith(('.json', '.csr')):
             return
         if not src.startswith(os.path.abspath(DATA_FOLDER)):
             return
 
         print(f"[Watcher] File changed: {src}")
-        # debounce short bursts
-        time.sleep(0.25)
+        # hand off to the refresh worker; never block the observer thread
+        refresher.notify()
 
-        try:
-            data = compute_ai_analysis()
 
-            # Only emit if changed (reduce noise and duplicate malformed sends)
-            global _last_emitted_hash
-            # canonical hash: sorted JSON string
-            try:
-                canonical = json.dumps(data, sort_keys=True)
-            except Exception:
-                canonical = str(data)
+def refresh_and_emit():
+    try:
+        delta = delta_tracker.delta(compute_ai_analysis())
+        if delta is None:
+            print("[Watcher] No change in computed data -> skipping emit")
+            return
+
+        print(f"[Watcher] Emitting dataDelta #{delta['seq']} ({len(delta['changed'])} changed, "
+              f"{len(delta['removed'])} removed)")
+        # server clock at emit time, so clients (and benchmarks/load_test.py) can measure fan-out latency
+        delta['emitted_at'] = time.time()
+        socketio.emit('dataDelta', delta)
+    except Exception as e:
+        print(f"[Watcher Error] During file analysis: {e}")
 
-            with _last_emit_lock:
-                if canonical == _last_emitted_hash:
-                    print("[Watcher] No change in computed data -> skipping emit")
-                    return
-                _last_emitted_hash = canonical
 
-            print("[Watcher] Emitting dataUpdate event to clients")
-            # emit the data (SocketIO will JSONify)
-            socketio.emit('dataUpdate', data)
-        except Exception as e:
-            print(f"[Watcher Error] During file analysis: {e}")
+class CoalescingRefresher:
+    """
+    Collapses bursts of file events into one refresh per quiet window, run on
+    its own worker thread. A refresh always reads the latest files, so the last
+    write wins; max_delay bounds how long a steady stream of writes can defer it.
+    """
+
+    def __init__(self, action, quiet_window=0.25, max_delay=1.0):
+        self.action = action
+        self.quiet_window = quiet_window
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._first_event = None
+        self._last_event = None
+        self.events_received = 0
+        self.events_coalesced = 0
+        self.refreshes_processed = 0
+
+    def notify(self):
+        with self._cond:
+            now = time.monotonic()
+            self.events_received += 1
+            if not self._pending:
+                self._first_event = now
+            self._pending += 1
+            self._last_event = now
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "events_received": self.events_received,
+                "events_coalesced": self.events_coalesced,
+                "refreshes_processed": self.refreshes_processed,
+                "pending": self._pending,
+            }
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # wait for the burst to go quiet (or for max_delay to pass)
+                while True:
+                    now = time.monotonic()
+                    quiet_at = self._last_event + self.quiet_window
+                    deadline = self._first_event + self.max_delay
+                    if now >= quiet_at or now >= deadline:
+                        break
+                    self._cond.wait(min(quiet_at, deadline) - now)
+                batch = self._pending
+                self._pending = 0
+                self.events_coalesced += batch - 1
+            self.action()
+            with self._cond:
+                self.refreshes_processed += 1
+
+    def start(self):
+        worker = threading.Thread(target=self.run, name="analysis-refresher", daemon=True)
+        worker.start()
+        return worker
+
+
+refresher = CoalescingRefresher(refresh_and_emit)
 
 
 def start_watcher():
@@ -223,11 +256,41 @@ def start_watcher():
     observer.join()
 
 
-if __name__ == '__main__':
+def create_app():
+    """Flask app + SocketIO server with the analysis routes and events; no background work is started."""
+    global socketio
+    app = Flask(__name__, static_url_path='/static')
+    socketio = SocketIO(app, cors_allowed_origins='*', async_mode='threading')
+    app.add_url_rule('/ai-analysis', view_func=ai_analysis)
+    app.add_url_rule('/ai-analysis/history', view_func=ai_analysis_history)
+    app.add_url_rule('/ai-analysis/stats', view_func=ai_analysis_stats)
+    socketio.on_event('connect', handle_connect)
+    socketio.on_event('resync', handle_resync)
+    return app, socketio
+
+
+_background_started = False
+_background_lock = threading.Lock()
+
+
+def start_background_work():
+    """Start the refresh worker and the file watcher, once per process."""
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    refresher.start()
     print(">>> Starting file watcher thread...")
     watcher_thread = threading.Thread(target=start_watcher)
     watcher_thread.daemon = True
     watcher_thread.start()
     print(">>> File watcher started")
+
+
+if __name__ == '__main__':
+    print(">>> aiAnalysis.py started")
+    app, socketio = create_app()
+    start_background_work()
     print(">>> Starting SocketIO server...")
-    socketio.run(app, host='0.0.0.0', port=5050, debug=False)
+    socketio.run(app, host='0.0.0.0', port=PORT, debug=False, allow_unsafe_werkzeug=True)
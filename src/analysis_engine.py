@@ -0,0 +1,278 @@
+import os
+import threading
+
+import numpy as np
+
+from graph_store import attach_csr_snapshot, csr_is_current
+
+
+def _link_value(link, key):
+    # defensive access - links might be dicts but not have expected keys
+    props = link.get('properties', {}) if isinstance(link, dict) else {}
+    lat = props.get(key) if isinstance(props, dict) else None
+    if lat is None:
+        return None
+    # guard when the property might be a string number
+    try:
+        return float(lat)
+    except Exception:
+        return None
+
+
+def _nodes_to_map(data):
+    # normalize node list -> dict mapping id -> properties
+    out = {}
+    nodes = data.get('nodes') if isinstance(data, dict) else None
+    if not nodes:
+        return out
+    for node in nodes:
+        nid = node.get('id')
+        props = node.get('properties', {}) if isinstance(node, dict) else {}
+        if nid is not None:
+            out[nid] = props
+    return out
+
+
+class LinkLatencyIndex:
+    """
+    Latency values of one file's link list plus a node -> link positions index,
+    so a node's average costs O(degree) instead of a scan over every link.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.endpoints = []
+        self.values = []
+        self.by_node = {}
+        # set while the values come from a CSR snapshot (see update_arrays)
+        self._topology = None
+        self._array = None
+
+    def _index(self, endpoints):
+        self.endpoints = endpoints
+        self.by_node = {}
+        for pos, (source, target) in enumerate(endpoints):
+            self.by_node.setdefault(source, []).append(pos)
+            if target != source:
+                self.by_node.setdefault(target, []).append(pos)
+
+    def update(self, links):
+        """Refresh from a new link list. Returns the nodes whose average may have changed, or None if all may have."""
+        self._topology = self._array = None
+        endpoints = [(link.get('source'), link.get('target')) for link in links]
+        if endpoints != self.endpoints:
+            self.values = [_link_value(link, self.key) for link in links]
+            self._index(endpoints)
+            return None
+
+        touched = set()
+        values = self.values
+        for pos, link in enumerate(links):
+            value = _link_value(link, self.key)
+            if value != values[pos]:
+                values[pos] = value
+                touched.update(endpoints[pos])
+        return touched
+
+    def update_arrays(self, topology, endpoints, values):
+        """
+        update() for a CSR snapshot: `values` is a float array in link order
+        (NaN = missing) and `endpoints()` is only called when the `topology`
+        digest changed. Unchanged topology costs one vectorized comparison.
+        """
+        values = np.array(values, dtype=np.float64)
+        if topology != self._topology or self._array is None or len(values) != len(self._array):
+            self.values = [None if v != v else v for v in values.tolist()]
+            self._index(endpoints())
+            self._topology, self._array = topology, values
+            return None
+
+        old = self._array
+        changed = np.flatnonzero((old != values) & ~(np.isnan(old) & np.isnan(values)))
+        touched = set()
+        for pos in changed.tolist():
+            value = float(values[pos])
+            self.values[pos] = None if value != value else value
+            touched.update(self.endpoints[pos])
+        self._array = values
+        return touched
+
+    def average(self, node_id):
+        values = self.values
+        latencies = [values[pos] for pos in self.by_node.get(node_id, ()) if values[pos] is not None]
+        return round(sum(latencies) / len(latencies), 2) if latencies else None
+
+
+class AnalysisEngine:
+    """
+    Keeps the per-node analysis rows between refreshes. Only files whose
+    (mtime, size) changed are reloaded, and only rows of nodes touched by a
+    changed link or alarm value are recomputed. When `csr_path` holds a CSR
+    snapshot that mirrors both predicted files, predictions are read from
+    its arrays instead of parsing those JSON files.
+    """
+
+    def __init__(self, files, load, csr_path=None):
+        self.files = files
+        self.load = load
+        self.csr_path = csr_path
+        self._csr_signature = None
+        self._lock = threading.Lock()
+        self._signatures = {}
+        self._real_alarms = {}
+        self._pred_alarms = {}
+        self._real_links = LinkLatencyIndex("latency_ms")
+        self._pred_links = LinkLatencyIndex("predicted_latency_ms")
+        self._rows = {}
+        self._order = []
+
+    def _changed_file(self, name):
+        try:
+            st = os.stat(self.files[name])
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+        if name in self._signatures and self._signatures[name] == signature:
+            return None
+        self._signatures[name] = signature
+        data = self.load(self.files[name])
+        return data if isinstance(data, dict) else {}
+
+    def _changed_csr(self):
+        """The CSR snapshot if it changed, None if unchanged, False if it cannot be attached."""
+        try:
+            st = os.stat(self.csr_path)
+            signature = (st.st_mtime_ns, st.st_size)
+            if signature == self._csr_signature:
+                return None
+            csr = attach_csr_snapshot(self.csr_path)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Could not attach {self.csr_path}: {e}")
+            self._csr_signature = None
+            return False
+        self._csr_signature = signature
+        return csr
+
+    @staticmethod
+    def _alarm_changes(old, new):
+        return {nid for nid in old.keys() | new.keys() if old.get(nid) != new.get(nid)}
+
+    def refresh(self):
+        with self._lock:
+            touched = set()
+            rebuild = False
+
+            real_data = self._changed_file('real')
+            if real_data is not None:
+                alarms = {nid: props.get("alarm_status", "UNKNOWN")
+                          for nid, props in _nodes_to_map(real_data).items()}
+                touched |= self._alarm_changes(self._real_alarms, alarms)
+                self._real_alarms = alarms
+                link_changes = self._real_links.update(real_data.get('links', []))
+                if link_changes is None:
+                    rebuild = True
+                else:
+                    touched |= link_changes
+
+            predicted_files = (self.files['pred_latency'], self.files['pred_alarm'])
+            use_csr = self.csr_path is not None and csr_is_current(self.csr_path, predicted_files)
+            csr = self._changed_csr() if use_csr else False
+            if csr is not False:
+                if csr is not None:
+                    node_ids = csr.node_ids
+                    alarms = {node_ids[pos]: csr.alarm_status(pos, predicted=True) or "UNKNOWN"
+                              for pos in csr.listed_nodes().tolist()}
+                    touched |= self._alarm_changes(self._pred_alarms, alarms)
+                    self._pred_alarms = alarms
+                    link_changes = self._pred_links.update_arrays(
+                        csr.topology,
+                        lambda: [(node_ids[u], node_ids[v]) for u, v in zip(csr.src.tolist(), csr.dst.tolist())],
+                        csr.predicted_latency)
+                    if link_changes is None:
+                        rebuild = True
+                    else:
+                        touched |= link_changes
+                # reload the JSON files if the CSR snapshot goes stale or away
+                self._signatures.pop('pred_alarm', None)
+                self._signatures.pop('pred_latency', None)
+            else:
+                self._csr_signature = None
+                pred_alarm_data = self._changed_file('pred_alarm')
+                if pred_alarm_data is not None:
+                    alarms = {nid: props.get("predicted_alarm_status", "UNKNOWN")
+                              for nid, props in _nodes_to_map(pred_alarm_data).items()}
+                    touched |= self._alarm_changes(self._pred_alarms, alarms)
+                    self._pred_alarms = alarms
+
+                pred_latency_data = self._changed_file('pred_latency')
+                if pred_latency_data is not None:
+                    link_changes = self._pred_links.update(pred_latency_data.get('links', []))
+                    if link_changes is None:
+                        rebuild = True
+                    else:
+                        touched |= link_changes
+
+            node_ids = self._real_alarms.keys() | self._pred_alarms.keys()
+            if node_ids != self._rows.keys():
+                for node_id in self._rows.keys() - node_ids:
+                    del self._rows[node_id]
+                touched |= node_ids - self._rows.keys()
+                self._order = sorted(node_ids, key=lambda x: str(x))
+            if rebuild:
+                touched = set(node_ids)
+
+            for node_id in touched & node_ids:
+                row = self._build_row(node_id)
+                if row != self._rows.get(node_id):
+                    self._rows[node_id] = row
+
+            return [self._rows[node_id] for node_id in self._order]
+
+    def _build_row(self, node_id):
+        return {
+            "node": node_id,
+            "real_latency": self._real_links.average(node_id),
+            "predicted_latency": self._pred_links.average(node_id),
+            "real_alarm": self._real_alarms.get(node_id, "UNKNOWN"),
+            "predicted_alarm": self._pred_alarms.get(node_id, "UNKNOWN")
+        }
+
+
+class RowDeltaTracker:
+    """
+    Remembers the fields of each emitted row and turns each new result list
+    into a sequence-numbered delta (changed rows + removed node ids).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # the values themselves, compared with ==: a hash could collide and drop a real change
+        self._fields = {}
+        self._rows = []
+        self.seq = 0
+
+    @staticmethod
+    def _row_fields(row):
+        return (row["real_latency"], row["predicted_latency"], row["real_alarm"], row["predicted_alarm"])
+
+    def delta(self, rows):
+        """Returns the next delta payload, or None if no row changed."""
+        with self._lock:
+            fields = {}
+            changed = []
+            for row in rows:
+                values = fields[row["node"]] = self._row_fields(row)
+                if self._fields.get(row["node"]) != values:
+                    changed.append(row)
+            removed = [node_id for node_id in self._fields if node_id not in fields]
+            if not changed and not removed:
+                return None
+            self.seq += 1
+            self._fields = fields
+            self._rows = rows
+            return {"seq": self.seq, "changed": changed, "removed": removed}
+
+    def full(self):
+        """Full state as of the last delta, for new or lagging clients."""
+        with self._lock:
+            return {"seq": self.seq, "rows": self._rows}
@@ -0,0 +1,313 @@
+import heapq
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from graph_core import unique_tree_path
+from metrics import REGISTRY
+
+# Sources whose shortest-path trees are kept between queries (0 disables the cache).
+# A 50k-node graph costs ~0.6 MB per latency tree.
+HOT_SOURCES = int(os.environ.get("NETROUTE_HOT_SOURCES", "64"))
+# a source gets its own trees once it has been asked for this often while in the LRU
+HOT_AFTER_QUERIES = 2
+# snapshot deltas kept for trees whose source was not queried during the last few ticks
+MAX_DELTAS = 8
+# past these shares of changed links / of tree nodes cut loose, a full Dijkstra is cheaper than a repair
+REPAIR_MAX_CHANGED_FRACTION = 0.2
+REPAIR_MAX_AFFECTED_FRACTION = 0.1
+
+TREE_LOOKUPS = REGISTRY.counter(
+    "netroute_sssp_tree_lookups_total",
+    "Hot-source tree lookups by tree kind and result (hit, repaired, rebuilt, built, cold)", ["kind", "result"])
+
+
+class GraphDelta:
+    """
+    Link changes from one CompactGraph to the next, in the new graph's int ids.
+    raised: links that got slower or disappeared; lowered: links that got faster
+    or appeared. old_to_new maps old ids to new ones (-1 for nodes that left,
+    e.g. turned RED) and is None when both graphs list the same nodes.
+    """
+
+    def __init__(self, old_to_new, same_topology, raised, lowered, num_edges):
+        self.old_to_new = old_to_new
+        self.same_topology = same_topology
+        self.raised = raised
+        self.lowered = lowered
+        self.num_edges = num_edges
+
+    def changed_fraction(self):
+        return (len(self.raised[0]) + len(self.lowered[0])) / max(self.num_edges, 1)
+
+
+def graph_delta(old, new):
+    """Diff two consecutive snapshots' graphs; vectorised, one sort over the links."""
+    if old.nodes == new.nodes:
+        old_to_new = None
+        if np.array_equal(old.indptr, new.indptr) and np.array_equal(old.indices, new.indices):
+            # the usual tick: same links, new predicted latencies
+            changed = np.flatnonzero(old.latency != new.latency)
+            u, v = new.edge_sources()[changed], new.indices[changed].astype(np.int64)
+            up = new.latency[changed] > old.latency[changed]
+            return GraphDelta(None, True, (u[up], v[up]), (u[~up], v[~up]), new.number_of_edges())
+        mapping = np.arange(len(new.nodes), dtype=np.int64)
+    else:
+        index = new.index
+        old_to_new = mapping = np.array([index.get(node, -1) for node in old.nodes], dtype=np.int64)
+
+    n = max(len(new.nodes), 1)
+    ou, ov = mapping[old.edge_sources()], mapping[old.indices]
+    kept = (ou >= 0) & (ov >= 0)
+    old_keys = ou[kept] * n + ov[kept]
+    order = np.argsort(old_keys)
+    old_keys, old_latency = old_keys[order], old.latency[kept][order]
+
+    nu, nv = new.edge_sources(), new.indices.astype(np.int64)
+    new_keys = nu * n + nv
+    if len(old_keys):
+        at = np.minimum(np.searchsorted(old_keys, new_keys), len(old_keys) - 1)
+        found = old_keys[at] == new_keys
+    else:
+        at, found = np.zeros(len(new_keys), dtype=np.int64), np.zeros(len(new_keys), dtype=bool)
+    previous = np.where(found, old_latency[at] if len(old_keys) else np.inf, np.inf)
+
+    down = new.latency < previous
+    up = found & (new.latency > previous)
+    gone = ~np.isin(old_keys, new_keys)
+    raised = (np.concatenate([nu[up], old_keys[gone] // n]), np.concatenate([nv[up], old_keys[gone] % n]))
+    return GraphDelta(old_to_new, False, raised, (nu[down], nv[down]), new.number_of_edges())
+
+
+def combine_deltas(deltas):
+    """
+    One delta covering several ticks. Links are only ever added to raised/lowered,
+    so the result may invalidate or relax more than needed, never less.
+    """
+    if len(deltas) == 1:
+        return deltas[0]
+    mapping = None
+    raised = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    lowered = raised
+    for delta in deltas:
+        if delta.old_to_new is not None:
+            m = delta.old_to_new
+            mapping = m if mapping is None else np.where(mapping >= 0, m[np.maximum(mapping, 0)], -1)
+            raised, lowered = _remap(raised, m), _remap(lowered, m)
+        raised = tuple(np.concatenate(pair) for pair in zip(raised, delta.raised))
+        lowered = tuple(np.concatenate(pair) for pair in zip(lowered, delta.lowered))
+    same_topology = all(delta.same_topology for delta in deltas)
+    return GraphDelta(mapping, same_topology, raised, lowered, deltas[-1].num_edges)
+
+
+def _remap(links, mapping):
+    u, v = mapping[links[0]], mapping[links[1]]
+    kept = (u >= 0) & (v >= 0)
+    return u[kept], v[kept]
+
+
+def repair_latency_tree(G, source, pred, dist, delta):
+    """
+    Carry a Dijkstra tree (pred, dist) of an earlier snapshot over to G without
+    re-running Dijkstra from scratch: subtrees below a raised or removed tree link
+    are cut loose and re-attached through their cheapest intact in-link, lowered
+    links are relaxed from their tails, and a Dijkstra over just those nodes
+    settles everything downstream. `source` is the int id in G.
+
+    Where several paths tie, the repaired tree may keep a different one of them
+    than a full run would. Returns (pred, dist), or None when so much changed
+    that the caller should recompute.
+    """
+    n = G.number_of_nodes()
+    if delta.changed_fraction() > REPAIR_MAX_CHANGED_FRACTION:
+        return None
+
+    if delta.old_to_new is None:
+        new_pred, new_dist = pred.astype(np.int64), dist.copy()
+        orphans = np.empty(0, dtype=np.int64)
+    else:
+        m = delta.old_to_new
+        alive = m >= 0
+        parents = pred[alive].astype(np.int64)
+        mapped = np.where(parents >= 0, m[np.maximum(parents, 0)], -1)
+        new_pred = np.full(n, -1, dtype=np.int64)
+        new_dist = np.full(n, np.inf)
+        new_pred[m[alive]] = mapped
+        new_dist[m[alive]] = dist[alive]
+        orphans = m[alive][(parents >= 0) & (mapped < 0)]
+
+    ru, rv = delta.raised
+    roots = np.concatenate([orphans, rv[new_pred[rv] == ru]]) if len(rv) else orphans
+    affected = _descendants(new_pred, source, roots)
+    if len(affected) > REPAIR_MAX_AFFECTED_FRACTION * n:
+        return None
+
+    # new_pred / new_dist are private copies; indexing them in place keeps a small repair O(changed), not O(nodes)
+    inf = float("inf")
+    new_dist[affected] = inf
+    new_pred[affected] = -1
+
+    c = itertools.count()
+    fringe = []
+    for v in affected:
+        best, parent = inf, -1
+        for u, cost in zip(G.pred[v], G.pred_latency[v]):
+            if new_dist[u] + cost < best:
+                best, parent = new_dist[u] + cost, u
+        if parent >= 0:
+            new_dist[v], new_pred[v] = best, parent
+            heapq.heappush(fringe, (best, next(c), v))
+    for u, v in zip(*(side.tolist() for side in delta.lowered)):
+        if new_dist[u] == inf or v not in G.succ[u]:
+            continue
+        candidate = new_dist[u] + G.edge_latency(u, v)
+        if candidate < new_dist[v]:
+            new_dist[v], new_pred[v] = candidate, u
+            heapq.heappush(fringe, (candidate, next(c), v))
+
+    succ, succ_latency = G.succ, G.succ_latency
+    while fringe:
+        d, _, v = heapq.heappop(fringe)
+        if d > new_dist[v]:
+            continue
+        for x, cost in zip(succ[v], succ_latency[v]):
+            if d + cost < new_dist[x]:
+                new_dist[x], new_pred[x] = d + cost, v
+                heapq.heappush(fringe, (d + cost, next(c), x))
+
+    return new_pred.astype(np.int32), new_dist
+
+
+def _descendants(pred, source, roots):
+    """Every node whose tree path from `source` runs through one of `roots` (roots included)."""
+    if not len(roots):
+        return []
+    nodes = np.flatnonzero(pred >= 0)
+    nodes = nodes[nodes != source]
+    parents = pred[nodes]
+    order = np.argsort(parents, kind="stable")
+    children = nodes[order].tolist()
+    starts = np.searchsorted(parents[order], np.arange(len(pred) + 1)).tolist()
+
+    seen = set()
+    stack = [root for root in roots.tolist() if root != source]
+    while stack:
+        v = stack.pop()
+        if v in seen:
+            continue
+        seen.add(v)
+        stack.extend(children[starts[v]:starts[v + 1]])
+    return list(seen)
+
+
+class _Entry:
+    __slots__ = ("queries", "trees")
+
+    def __init__(self):
+        self.queries = 0
+        self.trees = {}  # kind -> (snapshot version, tree)
+
+
+class HotSourceTrees:
+    """
+    Process-wide LRU of single-source latency trees for the most queried
+    sources, kept across snapshots. GraphCache reports each rebuild through
+    advance(); a tree from an older snapshot is repaired from the link deltas
+    on its next use instead of being recomputed.
+
+    Trees only answer what cannot depend on tie-breaking (unreachable targets,
+    unique lowest-latency paths), so a source turning hot never changes an
+    answer. Hop trees are not kept: equal-hop paths are the rule, not the
+    exception.
+    """
+
+    def __init__(self, capacity=HOT_SOURCES, hot_after=HOT_AFTER_QUERIES):
+        self.capacity = capacity
+        self.hot_after = hot_after
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # node id -> _Entry
+        self._deltas = {}  # snapshot version -> GraphDelta from the version before
+
+    def advance(self, old_graph, new_graph, version):
+        """Record the delta from snapshot version-1 (old_graph) to `version`."""
+        delta = None
+        if old_graph is not None and self._entries:
+            delta = graph_delta(old_graph, new_graph)
+        with self._lock:
+            self._deltas[version] = delta
+            for old in [v for v in self._deltas if v <= version - MAX_DELTAS]:
+                del self._deltas[old]
+
+    def view(self, graph, version):
+        return HotTrees(self, graph, version)
+
+    def tree(self, kind, G, version, source):
+        """Tree of `kind` (only "latency" so far) from int id `source` of snapshot `version`, or None if cold."""
+        node = G.nodes[source]
+        with self._lock:
+            entry = self._entries.get(node)
+            if entry is None:
+                entry = self._entries[node] = _Entry()
+                if len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(node)
+            entry.queries += 1
+            tree_version, tree = entry.trees.get(kind, (None, None))
+            if entry.queries < self.hot_after or (tree_version is not None and tree_version > version):
+                # not hot yet, or this request still holds an older snapshot than the tree's
+                TREE_LOOKUPS.inc(kind=kind, result="cold")
+                return None
+            if tree_version == version:
+                TREE_LOOKUPS.inc(kind=kind, result="hit")
+                return tree
+            deltas = None
+            if tree is not None:
+                deltas = [self._deltas.get(v) for v in range(tree_version + 1, version + 1)]
+
+        result = None
+        if deltas and all(delta is not None for delta in deltas):
+            result = self._carry(kind, G, source, tree, combine_deltas(deltas))
+        if result is not None:
+            TREE_LOOKUPS.inc(kind=kind, result="repaired")
+        else:
+            TREE_LOOKUPS.inc(kind=kind, result="built" if tree is None else "rebuilt")
+            result = G.dijkstra_tree(source)
+
+        with self._lock:
+            stored_version, _ = entry.trees.get(kind, (None, None))
+            if stored_version is None or stored_version < version:
+                entry.trees[kind] = (version, result)
+        return result
+
+    @staticmethod
+    def _carry(kind, G, source, tree, delta):
+        if G.min_latency < 0:
+            return None
+        return repair_latency_tree(G, source, tree[0], tree[1], delta)
+
+
+class HotTrees:
+    """
+    ShortestPathTrees-compatible view of the hot-source cache for one snapshot.
+    Hop queries, latency queries from sources that are not hot yet and latency
+    queries with tied paths get the point-to-point searches.
+    """
+
+    def __init__(self, cache, G, version):
+        self.cache = cache
+        self.G = G
+        self.version = version
+
+    def hops_path(self, source, target):
+        return self.G.bidirectional_bfs(source, target)
+
+    def latency_path(self, source, target):
+        tree = self.cache.tree("latency", self.G, self.version, source)
+        path = unique_tree_path(self.G, tree[0], tree[1], source, target) if tree is not None else None
+        if path is None:
+            return self.G.bidirectional_dijkstra(source, target)
+        return path
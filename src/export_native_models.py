@@ -0,0 +1,26 @@
+import argparse
+import os
+
+import joblib
+
+from model_registry import native_model_path, save_native_atomic
+from predict_alarm_status import MODEL_PATH as ALARM_MODEL_PATH
+from predict_latency import MODEL_PATH as LATENCY_MODEL_PATH
+
+
+def export_native(pkl_path):
+    """Write the booster inside a joblib-pickled XGBoost estimator as models/<name>.ubj."""
+    native = native_model_path(pkl_path)
+    save_native_atomic(joblib.load(pkl_path).get_booster(), native)
+    return native
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export trained models to XGBoost's native UBJSON format")
+    parser.add_argument("models", nargs="*", default=[LATENCY_MODEL_PATH, ALARM_MODEL_PATH],
+                        help="joblib model files (default: latency and alarm models)")
+    args = parser.parse_args()
+
+    for path in args.models:
+        native = export_native(path)
+        print(f"✅ {path} -> {native} ({os.path.getsize(native) / 1024:.0f} KB)")
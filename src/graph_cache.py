@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from dynamic_sssp import HOT_SOURCES, HotSourceTrees
+from graph_core import MISSING_LATENCY, CompactGraph
+from graph_store import ALARM_ABSENT, ALARM_CODES, ALARM_MISSING, CSR_FILE, attach_csr_snapshot, csr_is_current
+from metrics import REGISTRY
+from path_engine import AllPairsLatency
+from snapshot_io import read_snapshot, snapshot_generation
+
+# the all-pairs table takes 12 bytes per node pair; larger graphs keep answering from the searches
+ALL_PAIRS_MAX_NODES = int(os.environ.get("NETROUTE_ALL_PAIRS_MAX_NODES", "2000"))
+
+LATENCY_FILE = "graph_live_predicted.json"
+ALARM_FILE = "graph_live_alarm_predicted.json"
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "netroute_graph_cache_lookups_total",
+    "Graph cache lookups by result (hit, miss = rebuilt, stale = served last good graph)", ["result"])
+BUILD_STAGE_SECONDS = REGISTRY.histogram(
+    "netroute_graph_build_stage_seconds", "Graph snapshot rebuild time per stage", ["stage"])
+PREDICTION_TICK_SECONDS = REGISTRY.histogram(
+    "netroute_prediction_tick_seconds",
+    "Prediction service tick time per stage, read from the meta of each new snapshot", ["stage"])
+PREDICTION_CACHE_ROWS = REGISTRY.counter(
+    "netroute_prediction_cache_rows_total",
+    "Rows the prediction service answered from its prediction cache (hit) or ran through the model (miss)",
+    ["model", "result"])
+
+
+class GraphSnapshot:
+    """
+    Read-only routing view built from one version of the predicted graph files.
+    The CompactGraph is shared by request handlers and must never be mutated.
+    """
+
+    def __init__(self, version, signature, graph, health_map, built_at, build_ms, generation=None,
+                 latency_table=None, trees=None):
+        self.version = version
+        # AllPairsLatency, attached by a background thread once built (NETROUTE_ALL_PAIRS=1)
+        self.latency_table = latency_table
+        self.trees = trees
+        self.generation = generation
+        self.signature = signature
+        self.graph = graph
+        self.health_map = health_map
+        self.built_at = built_at
+        self.build_ms = build_ms
+
+    def info(self):
+        return {
+            "version": self.version,
+            "generation": self.generation,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.built_at)),
+            "build_ms": round(self.build_ms, 2),
+            "nodes": self.graph.number_of_nodes(),
+            "edges": self.graph.number_of_edges(),
+            "all_pairs_table": self.latency_table is not None,
+            "hot_source_trees": self.trees is not None,
+        }
+
+
+class GraphCache:
+    """
+    Process-wide cache of the routing graph, keyed on the (mtime, size) of the
+    predicted latency and alarm files. The first request after a prediction
+    cycle rebuilds it; every other request reuses the shared snapshot.
+    Reading the CSR snapshot skips the JSON parse, but the CompactGraph built
+    from it is private to this process and sized like the graph.
+    Shortest-path trees of hot sources outlive the snapshot (see dynamic_sssp).
+    """
+
+    def __init__(self, graph_dir, precompute_all_pairs=False, hot_sources=HOT_SOURCES,
+                 all_pairs_max_nodes=ALL_PAIRS_MAX_NODES):
+        self.precompute_all_pairs = precompute_all_pairs
+        self.all_pairs_max_nodes = all_pairs_max_nodes
+        self._all_pairs_lock = threading.Lock()
+        self.hot_trees = HotSourceTrees(hot_sources) if hot_sources > 0 else None
+        self.latency_path = os.path.join(graph_dir, LATENCY_FILE)
+        self.alarm_path = os.path.join(graph_dir, ALARM_FILE)
+        self.csr_path = os.path.join(graph_dir, CSR_FILE)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._failed_signature = None
+        self._version = 0
+        self._observed_generation = None
+
+    def _signature(self):
+        signature = []
+        for path in (self.latency_path, self.alarm_path):
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        try:
+            st = os.stat(self.csr_path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+        return tuple(signature)
+
+    def current(self):
+        return self._snapshot
+
+    def get(self):
+        signature = self._signature()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.signature == signature:
+            CACHE_LOOKUPS.inc(result="hit")
+            return snapshot
+
+        with self._lock:
+            # another thread may have rebuilt while we waited for the lock
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.signature == signature:
+                CACHE_LOOKUPS.inc(result="hit")
+                return snapshot
+            if snapshot is not None and signature == self._failed_signature:
+                CACHE_LOOKUPS.inc(result="stale")
+                return snapshot
+            CACHE_LOOKUPS.inc(result="miss")
+            try:
+                snapshot = self._build(signature)
+            except (OSError, ValueError, KeyError) as e:
+                if self._snapshot is None:
+                    raise
+                # keep serving the last good graph until the files are rewritten
+                print(f"[GraphCache] Rebuild failed, serving version {self._snapshot.version}: {e}")
+                self._failed_signature = signature
+                return self._snapshot
+            self._snapshot = snapshot
+            self._failed_signature = None
+        self._start_all_pairs(snapshot)
+        return snapshot
+
+    def _build(self, signature):
+        start = time.perf_counter()
+        timings = {}
+        if csr_is_current(self.csr_path, (self.latency_path, self.alarm_path)):
+            # the prediction service's shared array snapshot: no JSON to read or parse
+            csr = attach_csr_snapshot(self.csr_path)
+            t0 = time.perf_counter()
+            timings["attach"] = t0 - start
+            health_map, links, dead = self._links_from_csr(csr)
+            generation, meta = csr.generation, csr.meta
+        else:
+            latency_data = read_snapshot(self.latency_path, timings)
+            alarm_data = read_snapshot(self.alarm_path, timings)
+            t0 = time.perf_counter()
+            health_map, links, dead = self._links_from_json(latency_data, alarm_data)
+            generation, meta = snapshot_generation(latency_data), latency_data.get("meta")
+
+        # link arrays + RED mask are ready; RED nodes are masked out while the CSR arrays are built
+        t1 = time.perf_counter()
+        G = CompactGraph(*links, dead)
+        t2 = time.perf_counter()
+
+        self._version += 1
+        trees = None
+        if self.hot_trees is not None:
+            previous = self._snapshot.graph if self._snapshot is not None else None
+            self.hot_trees.advance(previous, G, self._version)
+            trees = self.hot_trees.view(G, self._version)
+        end = time.perf_counter()
+        timings.update(health_mask=t1 - t0, build=t2 - t1, total=end - start)
+        if trees is not None:
+            timings["delta"] = end - t2
+        for stage, seconds in timings.items():
+            BUILD_STAGE_SECONDS.observe(seconds, stage=stage)
+        self._observe_tick(generation, meta)
+
+        return GraphSnapshot(self._version, signature, G, health_map, time.time(), (end - start) * 1000,
+                             generation=generation, trees=trees)
+
+    def _start_all_pairs(self, snapshot):
+        G = snapshot.graph
+        if not self.precompute_all_pairs or G.number_of_nodes() > self.all_pairs_max_nodes or G.min_latency < 0:
+            return
+        # off the request path: queries use the hot-source trees until the table is attached
+        threading.Thread(target=self._build_all_pairs, args=(snapshot,), name="all-pairs", daemon=True).start()
+
+    def _build_all_pairs(self, snapshot):
+        with self._all_pairs_lock:
+            # one table at a time; a snapshot replaced while this thread waited is skipped
+            if self._snapshot is not snapshot:
+                return
+            start = time.perf_counter()
+            try:
+                snapshot.latency_table = AllPairsLatency(snapshot.graph)
+            except (MemoryError, ValueError) as e:
+                print(f"[GraphCache] All-pairs table for version {snapshot.version} failed: {e}")
+                return
+            BUILD_STAGE_SECONDS.observe(time.perf_counter() - start, stage="all_pairs")
+
+    @staticmethod
+    def _links_from_json(latency_data, alarm_data):
+        health_map = {
+            node["id"]: node["properties"].get("predicted_alarm_status", "RED")
+            for node in alarm_data["nodes"]
+        }
+
+        index = {}
+        src, dst, latency = [], [], []
+        for link in latency_data.get("links", []):
+            src.append(index.setdefault(link["source"], len(index)))
+            dst.append(index.setdefault(link["target"], len(index)))
+            latency.append(link["properties"].get("predicted_latency_ms", MISSING_LATENCY))
+        node_ids = list(index)
+        dead = np.array([health_map.get(node_id) == "RED" for node_id in node_ids], dtype=bool)
+        return health_map, (node_ids, src, dst, latency), dead
+
+    @staticmethod
+    def _links_from_csr(csr):
+        node_ids = csr.node_ids
+        health_map = {}
+        for position, code in enumerate(csr.predicted_alarm.tolist()):
+            if code == ALARM_ABSENT:
+                continue
+            # same default as the JSON path: a listed node without a prediction counts as RED
+            health_map[node_ids[position]] = "RED" if code == ALARM_MISSING else csr.alarm_status(position, True)
+
+        red = ALARM_CODES["RED"]
+        dead = (csr.predicted_alarm == red) | (csr.predicted_alarm == ALARM_MISSING)
+        latency = [MISSING_LATENCY if value != value else value for value in csr.predicted_latency.tolist()]
+        return health_map, (node_ids, csr.src, csr.dst, latency), dead
+
+    def _observe_tick(self, generation, meta):
+        # a generation can be built twice (latency file replaced before the alarm file); count it once
+        tick_ms = meta.get("tick_ms") if isinstance(meta, dict) else None
+        if not isinstance(tick_ms, dict) or generation == self._observed_generation:
+            return
+        self._observed_generation = generation
+        for stage, ms in tick_ms.items():
+            if isinstance(ms, (int, float)):
+                PREDICTION_TICK_SECONDS.observe(ms / 1000.0, stage=stage)
+        cache = meta.get("prediction_cache")
+        if isinstance(cache, dict):
+            for model, counts in cache.items():
+                if isinstance(counts, dict):
+                    PREDICTION_CACHE_ROWS.inc(counts.get("hits", 0), model=model, result="hit")
+                    PREDICTION_CACHE_ROWS.inc(counts.get("misses", 0), model=model, result="miss")
@@ -0,0 +1,301 @@
+import heapq
+import itertools
+
+import numpy as np
+
+# scipy is imported on first use (reverse_matrix and the searches below): importing it
+# costs more than the rest of the API's imports together and most requests never need it
+
+# Latency of a link without a predicted_latency_ms value
+MISSING_LATENCY = 9999
+# relative slack under which two path latencies count as tied (float sums in a different order)
+TIE_TOLERANCE = 1e-9
+
+
+class NoPath(Exception):
+    pass
+
+
+class CompactGraph:
+    """
+    Routing graph over integer node ids, built once per snapshot from link
+    arrays: forward and reverse CSR arrays for SciPy's csgraph, plus per-node
+    neighbour lists for the point-to-point searches.
+
+    RED nodes are dropped by a mask at build time, never by mutating the graph.
+    Node and neighbour order follow the order links first appear in the
+    snapshot and a repeated link keeps its last latency, so every search
+    breaks ties exactly like the networkx DiGraph this replaces.
+    Read-only after construction; `cache` holds derived per-snapshot data.
+    """
+
+    def __init__(self, node_ids, src, dst, latency, dead):
+        """
+        node_ids: ids for the positions used in `src`/`dst` (int arrays, link order);
+        latency: per-link latency values (Python numbers, link order);
+        dead: bool array over node_ids, True for nodes to leave out.
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        dead = np.asarray(dead, dtype=bool)
+
+        # nodes in order of first appearance as a link endpoint (source before target)
+        endpoints = np.empty(2 * len(src), dtype=np.int64)
+        endpoints[0::2] = src
+        endpoints[1::2] = dst
+        positions, first_seen = np.unique(endpoints, return_index=True)
+        appearance = positions[np.argsort(first_seen, kind="stable")]
+        alive = appearance[~dead[appearance]] if len(appearance) else appearance
+        remap = np.full(len(node_ids), -1, dtype=np.int64)
+        remap[alive] = np.arange(len(alive))
+
+        self.nodes = [node_ids[p] for p in alive.tolist()]
+        self.index = {node_id: i for i, node_id in enumerate(self.nodes)}
+        n = len(self.nodes)
+
+        u, v = remap[src], remap[dst]
+        links = np.flatnonzero((u >= 0) & (v >= 0))
+        u, v = u[links], v[links]
+        # one edge per (u, v): position of its first appearance, latency of its last
+        keys = u * max(n, 1) + v
+        unique_keys, first = np.unique(keys, return_index=True)
+        _, last_reversed = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last_reversed
+        eu, ev = unique_keys // max(n, 1), unique_keys % max(n, 1)
+        edge_latency = [latency[i] for i in links[last].tolist()]
+
+        forward = np.lexsort((first, eu))
+        backward = np.lexsort((first, ev))
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(eu, minlength=n), out=self.indptr[1:])
+        self.indices = ev[forward].astype(np.int32)
+        self.rindptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ev, minlength=n), out=self.rindptr[1:])
+        self.rindices = eu[backward].astype(np.int32)
+
+        forward_latency = [edge_latency[i] for i in forward.tolist()]
+        backward_latency = [edge_latency[i] for i in backward.tolist()]
+        self.latency = np.array(forward_latency, dtype=np.float64)
+        self.rlatency = np.array(backward_latency, dtype=np.float64)
+
+        self.succ, self.succ_latency = _split(self.indices, forward_latency, self.indptr)
+        self.pred, self.pred_latency = _split(self.rindices, backward_latency, self.rindptr)
+        self.max_latency = max(edge_latency, default=1)
+        self.min_latency = min(edge_latency, default=0)
+        self.cache = {}
+        self._reverse = None
+
+    def has_node(self, node_id):
+        try:
+            return node_id in self.index
+        except TypeError:
+            return False
+
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        return len(self.indices)
+
+    def edge_latency(self, u, v):
+        return self.succ_latency[u][self.succ[u].index(v)]
+
+    def path_latency(self, path):
+        """Summed latency of an int-id path, added in path order like the JSON responses always have been."""
+        return sum(self.edge_latency(path[i], path[i + 1]) for i in range(len(path) - 1))
+
+    def edge_sources(self):
+        """Source of every CSR edge, aligned with `indices` / `latency`."""
+        return np.repeat(np.arange(len(self.nodes), dtype=np.int64), np.diff(self.indptr))
+
+    def forward_matrix(self):
+        from scipy.sparse import csr_matrix
+        n = len(self.nodes)
+        return csr_matrix((self.latency, self.indices, self.indptr), shape=(n, n))
+
+    def reverse_matrix(self):
+        if self._reverse is None:
+            from scipy.sparse import csr_matrix
+            n = len(self.nodes)
+            self._reverse = csr_matrix((self.rlatency, self.rindices, self.rindptr), shape=(n, n))
+        return self._reverse
+
+    def hops_to(self, target, limit=None):
+        """
+        Hop distance from every node to `target` (inf if unreachable), from one csgraph BFS.
+        With `limit`, nodes more than `limit` hops away are left at inf and never visited.
+        """
+        from scipy.sparse.csgraph import dijkstra, shortest_path
+        if limit is None:
+            return shortest_path(self.reverse_matrix(), method="D", unweighted=True, indices=target)
+        return dijkstra(self.reverse_matrix(), unweighted=True, indices=target, limit=limit)
+
+    def latency_to(self, target):
+        """Lowest latency from every node to `target` (inf if unreachable). Needs non-negative latencies."""
+        from scipy.sparse.csgraph import dijkstra
+        return dijkstra(self.reverse_matrix(), indices=target)
+
+    def bidirectional_bfs(self, source, target):
+        """Fewest-hop path, same search and tie-breaking as networkx.bidirectional_shortest_path."""
+        if source == target:
+            return [source]
+        pred = {source: None}
+        succ = {target: None}
+        forward_fringe = [source]
+        reverse_fringe = [target]
+        meet = None
+        while forward_fringe and reverse_fringe and meet is None:
+            if len(forward_fringe) <= len(reverse_fringe):
+                this_level, forward_fringe = forward_fringe, []
+                for v in this_level:
+                    for w in self.succ[v]:
+                        if w not in pred:
+                            forward_fringe.append(w)
+                            pred[w] = v
+                        if w in succ:
+                            meet = w
+                            break
+                    if meet is not None:
+                        break
+            else:
+                this_level, reverse_fringe = reverse_fringe, []
+                for v in this_level:
+                    for w in self.pred[v]:
+                        if w not in succ:
+                            succ[w] = v
+                            reverse_fringe.append(w)
+                        if w in pred:
+                            meet = w
+                            break
+                    if meet is not None:
+                        break
+        if meet is None:
+            raise NoPath(f"No path between {self.nodes[source]} and {self.nodes[target]}.")
+
+        path = []
+        w = meet
+        while w is not None:
+            path.append(w)
+            w = pred[w]
+        path.reverse()
+        w = succ[path[-1]]
+        while w is not None:
+            path.append(w)
+            w = succ[w]
+        return path
+
+    def bidirectional_dijkstra(self, source, target):
+        """Lowest-latency path, same search and tie-breaking as networkx.bidirectional_dijkstra."""
+        if source == target:
+            return [source]
+        dists = [{}, {}]
+        preds = [{source: None}, {target: None}]
+        seen = [{source: 0}, {target: 0}]
+        fringe = [[], []]
+        c = itertools.count()
+        heapq.heappush(fringe[0], (0, next(c), source))
+        heapq.heappush(fringe[1], (0, next(c), target))
+        neighbors = [(self.succ, self.succ_latency), (self.pred, self.pred_latency)]
+        finaldist = None
+        meetnode = None
+        direction = 1
+        while fringe[0] and fringe[1]:
+            direction = 1 - direction
+            dist, _, v = heapq.heappop(fringe[direction])
+            if v in dists[direction]:
+                continue
+            dists[direction][v] = dist
+            if v in dists[1 - direction]:
+                forward = []
+                node = meetnode
+                while node is not None:
+                    forward.append(node)
+                    node = preds[0][node]
+                forward.reverse()
+                node = preds[1][meetnode]
+                while node is not None:
+                    forward.append(node)
+                    node = preds[1][node]
+                return forward
+
+            nbrs, costs = neighbors[direction]
+            done, reached, other = dists[direction], seen[direction], seen[1 - direction]
+            for w, cost in zip(nbrs[v], costs[v]):
+                vw_length = dist + cost
+                if w in done:
+                    if vw_length < done[w]:
+                        raise ValueError("Contradictory paths found: negative weights?")
+                elif w not in reached or vw_length < reached[w]:
+                    reached[w] = vw_length
+                    heapq.heappush(fringe[direction], (vw_length, next(c), w))
+                    preds[direction][w] = v
+                    if w in other:
+                        finaldist_w = vw_length + other[w]
+                        if finaldist is None or finaldist > finaldist_w:
+                            finaldist, meetnode = finaldist_w, w
+        raise NoPath(f"No path between {self.nodes[source]} and {self.nodes[target]}.")
+
+    def dijkstra_tree(self, source):
+        """
+        First Dijkstra predecessor of every node (-1 if unreached), as
+        networkx.dijkstra_predecessor_and_distance, and the distances (inf if unreached).
+        """
+        pred = [-1] * len(self.nodes)
+        pred[source] = source
+        dist = {}
+        seen = {source: 0}
+        c = itertools.count()
+        fringe = [(0, next(c), source)]
+        succ, succ_latency = self.succ, self.succ_latency
+        while fringe:
+            dist_v, _, v = heapq.heappop(fringe)
+            if v in dist:
+                continue
+            dist[v] = dist_v
+            for u, cost in zip(succ[v], succ_latency[v]):
+                vu_dist = dist_v + cost
+                if u in dist:
+                    if vu_dist < dist[u]:
+                        raise ValueError("Contradictory paths found:", "negative weights?")
+                elif u not in seen or vu_dist < seen[u]:
+                    seen[u] = vu_dist
+                    heapq.heappush(fringe, (vu_dist, next(c), u))
+                    pred[u] = v
+        distances = np.full(len(self.nodes), np.inf)
+        if dist:
+            distances[list(dist)] = list(dist.values())
+        return np.array(pred, dtype=np.int32), distances
+
+
+def _split(indices, values, indptr):
+    ptr = indptr.tolist()
+    flat = indices.tolist()
+    bounds = list(zip(ptr[:-1], ptr[1:]))
+    return [flat[a:b] for a, b in bounds], [values[a:b] for a, b in bounds]
+
+
+def unique_tree_path(G, tree, dist, source, target):
+    """
+    Int-id path to `target` through a Dijkstra tree (tree, dist from `source`)
+    when it is the only lowest-latency path: then it is also the path
+    bidirectional_dijkstra finds. None when another path ties with it and the
+    caller has to run that search for the same tie-break. Raises NoPath if
+    `target` is unreachable.
+    """
+    if dist[target] == float("inf"):
+        raise NoPath(f"No path between {G.nodes[source]} and {G.nodes[target]}.")
+    path = [target]
+    v = target
+    while v != source:
+        # every shortest path reaches v through an in-link that is tight against the tree distances
+        slack = TIE_TOLERANCE * max(1.0, abs(dist[v]))
+        tight = 0
+        for u, cost in zip(G.pred[v], G.pred_latency[v]):
+            if abs(dist[u] + cost - dist[v]) <= slack:
+                tight += 1
+                if tight > 1:
+                    return None
+        v = int(tree[v])
+        path.append(v)
+    path.reverse()
+    return path
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from snapshot_io import atomic_write
+
+CSR_FILE = "graph_live_snapshot.csr"
+MAGIC = b"NRCSR001"
+ALIGNMENT = 64
+
+# Alarm codes in the node arrays. MISSING: node listed without the property;
+# ABSENT: id only seen as a link endpoint; OTHER: any other string, kept in the header.
+ALARM_CODES = {"GREEN": 0, "YELLOW": 1, "RED": 2}
+ALARM_NAMES = {code: name for name, code in ALARM_CODES.items()}
+ALARM_OTHER = 3
+ALARM_MISSING = 4
+ALARM_ABSENT = -1
+
+
+def _alarm_code(props, key, others, index):
+    if key not in props:
+        return ALARM_MISSING
+    status = props[key]
+    code = ALARM_CODES.get(status) if isinstance(status, str) else None
+    if code is None:
+        others[str(index)] = status
+        return ALARM_OTHER
+    return code
+
+
+def _latency_value(props, key):
+    value = props.get(key)
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def encode_csr_snapshot(graph, predicted_latency, generation, **meta):
+    """
+    Pack one tick into the shared array layout: per-link arrays in the file's
+    link order (src, dst, latency, predicted latency) and per-node alarm
+    arrays. Missing values are NaN / ALARM_MISSING. Returns bytes for
+    publish_csr_snapshot.
+    """
+    node_ids = []
+    index = {}
+    alarm = []
+    predicted_alarm = []
+    others = {"alarm": {}, "predicted_alarm": {}}
+    for node in graph.get("nodes", []):
+        node_id = node.get("id")
+        if node_id is None:
+            continue
+        props = node.get("properties", {}) or {}
+        if node_id in index:
+            # a repeated id overrides the earlier entry, like the dict-based readers
+            position = index[node_id]
+            alarm[position] = _alarm_code(props, "alarm_status", others["alarm"], position)
+            predicted_alarm[position] = _alarm_code(props, "predicted_alarm_status",
+                                                    others["predicted_alarm"], position)
+            continue
+        position = index[node_id] = len(node_ids)
+        node_ids.append(node_id)
+        alarm.append(_alarm_code(props, "alarm_status", others["alarm"], position))
+        predicted_alarm.append(_alarm_code(props, "predicted_alarm_status", others["predicted_alarm"], position))
+
+    links = graph.get("links", [])
+    src = np.empty(len(links), dtype=np.int32)
+    dst = np.empty(len(links), dtype=np.int32)
+    latency = np.empty(len(links), dtype=np.float64)
+    for i, link in enumerate(links):
+        for array, endpoint in ((src, link.get("source")), (dst, link.get("target"))):
+            position = index.get(endpoint)
+            if position is None:
+                position = index[endpoint] = len(node_ids)
+                node_ids.append(endpoint)
+                alarm.append(ALARM_ABSENT)
+                predicted_alarm.append(ALARM_ABSENT)
+            array[i] = position
+        latency[i] = _latency_value(link.get("properties", {}) or {}, "latency_ms")
+    predicted = np.array([np.nan if v is None else v for v in predicted_latency], dtype=np.float64)
+
+    arrays = {
+        "src": src, "dst": dst, "latency": latency, "predicted_latency": predicted,
+        "alarm": np.array(alarm, dtype=np.int8), "predicted_alarm": np.array(predicted_alarm, dtype=np.int8),
+    }
+    topology = hashlib.blake2b(src.tobytes() + dst.tobytes(), digest_size=16)
+    topology.update(json.dumps(node_ids).encode("utf-8"))
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, len(array)]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        "generation": generation, "meta": meta, "node_ids": node_ids, "arrays": layout,
+        "other_alarms": others, "topology": topology.hexdigest(),
+    }, separators=(",", ":")).encode("utf-8")
+
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+    buffer = bytearray(data_start + offset)
+    buffer[:len(MAGIC)] = MAGIC
+    buffer[len(MAGIC):len(MAGIC) + 8] = struct.pack("<Q", len(header))
+    buffer[len(MAGIC) + 8:len(MAGIC) + 8 + len(header)] = header
+    for name, array in arrays.items():
+        start = data_start + layout[name][0]
+        buffer[start:start + array.nbytes] = array.tobytes()
+    return bytes(buffer)
+
+
+def publish_csr_snapshot(path, payload):
+    """Temp file + rename, like the JSON snapshots; mapped readers keep the old file until they detach."""
+    atomic_write(path, payload)
+
+
+class CsrSnapshot:
+    """
+    Read-only view of a published CSR snapshot. Arrays are zero-copy views into
+    one np.memmap of the file, so every process attached to the same generation
+    shares the page cache instead of holding its own parsed copy.
+    """
+
+    def __init__(self, path, copy=False):
+        # Windows cannot replace a file that is mapped; readers there load a private copy
+        buffer = np.fromfile(path, dtype=np.uint8) if copy else np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a CSR graph snapshot")
+        header_len = struct.unpack("<Q", bytes(buffer[len(MAGIC):len(MAGIC) + 8]))[0]
+        header = json.loads(bytes(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_len]))
+        data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGNMENT) * ALIGNMENT
+
+        self.path = path
+        self.generation = header["generation"]
+        self.meta = header["meta"]
+        self.node_ids = header["node_ids"]
+        self.other_alarms = header["other_alarms"]
+        self.topology = header["topology"]
+        self.num_nodes = len(self.node_ids)
+        for name, (offset, dtype, length) in header["arrays"].items():
+            start = data_start + offset
+            setattr(self, name, np.frombuffer(buffer, dtype=np.dtype(dtype), count=length, offset=start))
+        self.num_edges = len(self.src)
+
+    def alarm_status(self, position, predicted=False):
+        """Status string of node `position`, or None if it is missing / not in the node list."""
+        codes = self.predicted_alarm if predicted else self.alarm
+        code = int(codes[position])
+        if code == ALARM_OTHER:
+            return self.other_alarms["predicted_alarm" if predicted else "alarm"][str(position)]
+        return ALARM_NAMES.get(code)
+
+    def listed_nodes(self):
+        """Positions of nodes from the node list (not bare link endpoints)."""
+        return np.flatnonzero(self.predicted_alarm != ALARM_ABSENT)
+
+
+def attach_csr_snapshot(path):
+    return CsrSnapshot(path, copy=os.name == "nt")
+
+
+def csr_is_current(csr_path, json_paths):
+    """True when the CSR file exists and is at least as new as every JSON snapshot it mirrors."""
+    try:
+        csr_mtime = os.stat(csr_path).st_mtime_ns
+        return all(csr_mtime >= os.stat(path).st_mtime_ns for path in json_paths)
+    except OSError:
+        return False
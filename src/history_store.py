@@ -0,0 +1,369 @@
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+from graph_store import ALARM_CODES, ALARM_NAMES
+from snapshot_io import atomic_write
+
+HISTORY_DIR = os.environ.get("NETROUTE_HISTORY_DIR", "history-data")
+# ticks kept per table: 2 hours at the generator's 5 s interval
+DEFAULT_CAPACITY = 1440
+# entity columns allocated up front; the table doubles its width when a new node or link does not fit
+MIN_WIDTH = 256
+CHUNK_ROWS = 50_000
+
+UNKNOWN_ALARM = -1  # as alarm_status_source/target in the link CSVs
+NODE_METRICS = ("cpu_usage", "memory_usage", "latency_avg", "packet_loss_rate",
+                "alarm_status", "predicted_alarm_status")
+LINK_METRICS = ("latency_ms", "bandwidth_mbps", "predicted_latency_ms")
+ALARM_METRICS = ("alarm_status", "predicted_alarm_status")
+
+
+def _number(value):
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _alarm(value):
+    if value is None:
+        return np.nan
+    return ALARM_CODES.get(value, UNKNOWN_ALARM) if isinstance(value, str) else UNKNOWN_ALARM
+
+
+class HistoryTable:
+    """
+    One ring buffer of per-tick samples: a float64 timestamp per row and, per
+    metric, a float32 (capacity x width) memmap with one column per entity
+    (node id or (source, target) link). The writer fills row `head` in place
+    and then replaces the small JSON header, so readers only ever see whole
+    ticks. In a full ring the oldest row is skipped by readers, since it is
+    the next one to be overwritten. NaN = no sample.
+    """
+
+    def __init__(self, directory, name, metrics, capacity=DEFAULT_CAPACITY, writable=False):
+        self.directory = directory
+        self.name = name
+        self.metrics = tuple(metrics)
+        self.writable = writable
+        self.header_path = os.path.join(directory, f"{name}.json")
+        self.keys_path = os.path.join(directory, f"{name}.keys.json")
+        self.header = None
+        self.keys = []
+        self.index = {}
+        self.timestamps = None
+        self.columns = {}
+        self._last_keys = None
+        self._last_slots = None
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+            header = self._read_header()
+            if header is None or header["capacity"] != capacity or tuple(header["metrics"]) != self.metrics:
+                if header is not None:
+                    print(f"[History] {name}: retention or metrics changed, starting a new history")
+                self._create(capacity)
+            else:
+                self._open(header)
+
+    def _path(self, column):
+        return os.path.join(self.directory, f"{self.name}.{column}")
+
+    def _metric_path(self, metric, width):
+        # the width is part of the name: a grown table gets new files, so a reader
+        # still on the old header never maps a file with a different row length
+        return self._path(f"{metric}.{width}.f32")
+
+    def _read_header(self):
+        try:
+            with open(self.header_path, "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_header(self):
+        atomic_write(self.header_path, json.dumps(self.header).encode("utf-8"))
+
+    def _write_keys(self):
+        self.header["keys_version"] += 1
+        keys = [list(key) if isinstance(key, tuple) else key for key in self.keys]
+        atomic_write(self.keys_path, json.dumps({"version": self.header["keys_version"], "keys": keys}).encode("utf-8"))
+
+    def _create(self, capacity):
+        self.header = {"capacity": capacity, "width": MIN_WIDTH, "head": 0, "count": 0,
+                       "metrics": list(self.metrics), "keys_version": 0}
+        self.keys, self.index = [], {}
+        atomic_write(self._path("timestamps.f64"), np.full(capacity, np.nan).tobytes())
+        for metric in self.metrics:
+            atomic_write(self._metric_path(metric, MIN_WIDTH),
+                         np.full((capacity, MIN_WIDTH), np.nan, dtype=np.float32).tobytes())
+        self._write_keys()
+        self._write_header()
+        self._open(self.header)
+
+    def _open(self, header):
+        mode = "r+" if self.writable else "r"
+        capacity, width = header["capacity"], header["width"]
+        if self.header is None or self.header.get("keys_version") != header["keys_version"] or not self.index:
+            with open(self.keys_path, "rb") as f:
+                keys = json.loads(f.read())["keys"]
+            self.keys = [tuple(key) if isinstance(key, list) else key for key in keys]
+            self.index = {key: slot for slot, key in enumerate(self.keys)}
+        self.timestamps = np.memmap(self._path("timestamps.f64"), dtype=np.float64, mode=mode, shape=(capacity,))
+        self.columns = {metric: np.memmap(self._metric_path(metric, width), dtype=np.float32, mode=mode,
+                                          shape=(capacity, width))
+                        for metric in self.metrics}
+        self.header = header
+        self._last_keys = self._last_slots = None
+
+    def refresh(self):
+        """Reader side: pick up the writer's latest header; remap when the table grew. False if there is no table."""
+        header = self._read_header()
+        if header is None:
+            return False
+        if (self.header is None or header["width"] != self.header["width"]
+                or header["keys_version"] != self.header["keys_version"]
+                or header["capacity"] != self.header["capacity"]):
+            self._open(header)
+        else:
+            self.header = header
+        return True
+
+    def _grow(self, needed):
+        capacity, width = self.header["capacity"], self.header["width"]
+        new_width = max(width * 2, needed)
+        for metric in self.metrics:
+            grown = np.full((capacity, new_width), np.nan, dtype=np.float32)
+            grown[:, :width] = self.columns[metric]
+            atomic_write(self._metric_path(metric, new_width), grown.tobytes())
+        self.header["width"] = new_width
+        self._write_header()
+        self._open(self.header)
+        for metric in self.metrics:
+            try:
+                os.remove(self._metric_path(metric, width))
+            except OSError:
+                pass  # still mapped by a reader on Windows; left behind
+
+    def _slots(self, keys):
+        if keys == self._last_keys:
+            return self._last_slots
+        added = False
+        slots = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            slot = self.index.get(key)
+            if slot is None:
+                slot = self.index[key] = len(self.keys)
+                self.keys.append(key)
+                added = True
+            slots[i] = slot
+        if added:
+            if len(self.keys) > self.header["width"]:
+                self._grow(len(self.keys))
+            self._write_keys()
+        self._last_keys, self._last_slots = list(keys), slots
+        return slots
+
+    def append(self, timestamp, keys, values):
+        """Write one tick: `values` maps metric -> sequence aligned with `keys`."""
+        slots = self._slots(keys)
+        row = self.header["head"]
+        width = self.header["width"]
+        for metric in self.metrics:
+            line = np.full(width, np.nan, dtype=np.float32)
+            if metric in values:
+                line[slots] = values[metric]
+            self.columns[metric][row] = line
+        self.timestamps[row] = timestamp
+        capacity = self.header["capacity"]
+        self.header["head"] = (row + 1) % capacity
+        self.header["count"] = min(self.header["count"] + 1, capacity)
+        self._write_header()
+
+    def rows(self, seconds=None, since=None, now=None):
+        """Ring rows of the retained ticks in time order, limited to the last `seconds` and/or after `since`."""
+        capacity, head, count = self.header["capacity"], self.header["head"], self.header["count"]
+        if count >= capacity:
+            count = capacity - 1
+        order = np.arange(head - count, head) % capacity
+        stamps = np.asarray(self.timestamps[order])
+        keep = ~np.isnan(stamps)
+        if seconds is not None:
+            keep &= stamps >= (time.time() if now is None else now) - seconds
+        if since is not None:
+            keep &= stamps > since
+        return order[keep]
+
+    def block(self, metric, rows, slots=None):
+        """(len(rows), entities) float32 samples of `metric`; every known entity, or just `slots`."""
+        column = self.columns[metric]
+        if slots is None:
+            return np.asarray(column[rows, :len(self.keys)])
+        return np.asarray(column[np.ix_(rows, slots)])
+
+
+class HistoryStore:
+    """
+    Columnar, memory-mapped telemetry history fed once per prediction tick:
+    a node table (live metrics, alarm and predicted alarm codes) and a link
+    table (measured and predicted latency, bandwidth), each a fixed-retention
+    ring. One writer (the prediction service); any number of readers.
+    """
+
+    def __init__(self, directory=HISTORY_DIR, capacity=DEFAULT_CAPACITY, writable=False):
+        self.directory = directory
+        self.nodes = HistoryTable(directory, "node", NODE_METRICS, capacity, writable)
+        self.links = HistoryTable(directory, "link", LINK_METRICS, capacity, writable)
+
+    def table(self, name):
+        return {"node": self.nodes, "link": self.links}[name]
+
+    def refresh(self):
+        return self.nodes.refresh() and self.links.refresh()
+
+    def append_snapshot(self, graph, predicted_latency=None, timestamp=None):
+        """
+        Record one tick of the live graph. `predicted_latency` is per link in
+        file order; node predictions are read from predicted_alarm_status.
+        """
+        if timestamp is None:
+            meta = graph.get("meta") if isinstance(graph.get("meta"), dict) else {}
+            timestamp = meta.get("written_at") or time.time()
+
+        node_keys = []
+        node_values = {metric: [] for metric in NODE_METRICS}
+        for node in graph.get("nodes", []):
+            node_id = node.get("id")
+            if node_id is None:
+                continue
+            props = node.get("properties", {}) or {}
+            node_keys.append(node_id)
+            for metric in NODE_METRICS:
+                node_values[metric].append(_alarm(props.get(metric)) if metric in ALARM_METRICS
+                                           else _number(props.get(metric)))
+
+        link_keys = []
+        link_values = {metric: [] for metric in LINK_METRICS}
+        for i, link in enumerate(graph.get("links", [])):
+            props = link.get("properties", {}) or {}
+            link_keys.append((link.get("source"), link.get("target")))
+            link_values["latency_ms"].append(_number(props.get("latency_ms")))
+            link_values["bandwidth_mbps"].append(_number(props.get("bandwidth_mbps")))
+            predicted = predicted_latency[i] if predicted_latency is not None else props.get("predicted_latency_ms")
+            link_values["predicted_latency_ms"].append(_number(predicted))
+
+        if len(set(node_keys)) != len(node_keys):
+            # a repeated id overrides the earlier entry, like the dict-based readers
+            last = {key: i for i, key in enumerate(node_keys)}
+            picks = sorted(last.values())
+            node_keys = [node_keys[i] for i in picks]
+            node_values = {metric: [values[i] for i in picks] for metric, values in node_values.items()}
+        if len(set(link_keys)) != len(link_keys):
+            last = {key: i for i, key in enumerate(link_keys)}
+            picks = sorted(last.values())
+            link_keys = [link_keys[i] for i in picks]
+            link_values = {metric: [values[i] for i in picks] for metric, values in link_values.items()}
+
+        self.nodes.append(timestamp, node_keys, node_values)
+        self.links.append(timestamp, link_keys, link_values)
+
+    def percentiles(self, table, metric, quantiles, seconds=None, keys=None):
+        """
+        Per-entity percentiles of `metric` over the last `seconds` (all retained
+        ticks if None). Returns (ticks, {key: [value per quantile or None]}).
+        """
+        history = self.table(table)
+        if not history.refresh() or metric not in history.metrics:
+            raise KeyError(f"No {table} history for {metric}")
+        rows = history.rows(seconds=seconds)
+        if keys is None:
+            keys = list(history.keys)
+            slots = None
+        else:
+            keys = [key for key in keys if key in history.index]
+            slots = [history.index[key] for key in keys]
+        if not len(rows) or not keys:
+            return len(rows), {key: [None] * len(quantiles) for key in keys}
+        with warnings.catch_warnings():
+            # entities without a sample in the window come back as NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            values = np.nanpercentile(history.block(metric, rows, slots), quantiles, axis=0)
+        result = {}
+        for i, key in enumerate(keys):
+            result[key] = [None if np.isnan(v) else round(float(v), 3) for v in values[:, i].tolist()]
+        return len(rows), result
+
+    def _ticks(self, seconds=None, since=None):
+        """Aligned (link rows, node rows) of the ticks present in both tables."""
+        if not self.refresh():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        link_rows = self.links.rows(seconds=seconds, since=since)
+        node_rows = self.nodes.rows(seconds=seconds, since=since)
+        link_stamps = np.asarray(self.links.timestamps[link_rows])
+        node_stamps = np.asarray(self.nodes.timestamps[node_rows])
+        _, link_at, node_at = np.intersect1d(link_stamps, node_stamps, assume_unique=True, return_indices=True)
+        return link_rows[np.sort(link_at)], node_rows[np.sort(node_at)]
+
+    def link_frames(self, seconds=None, since=None, chunk_rows=CHUNK_ROWS):
+        """
+        Link samples with the columns of csv-data/link_data_*.csv (endpoint node
+        metrics joined in), as DataFrames of about `chunk_rows` rows each.
+        """
+        import pandas as pd  # only the training readers need it; the writer and percentile queries do not
+        link_rows, node_rows = self._ticks(seconds, since)
+        keys = list(self.links.keys)
+        if not keys or not len(link_rows):
+            return
+        missing = len(self.nodes.keys)
+        src = np.array([self.nodes.index.get(source, missing) for source, _ in keys])
+        dst = np.array([self.nodes.index.get(target, missing) for _, target in keys])
+        step = max(1, chunk_rows // len(keys))
+        for start in range(0, len(link_rows), step):
+            rows, nrows = link_rows[start:start + step], node_rows[start:start + step]
+
+            def endpoint(metric, slots):
+                # one NaN column for link endpoints that never appeared in the node table
+                block = np.concatenate([self.nodes.block(metric, nrows),
+                                        np.full((len(nrows), 1), np.nan, dtype=np.float32)], axis=1)
+                return block[:, slots].ravel()
+
+            frame = {
+                "latency_ms": self.links.block("latency_ms", rows).ravel(),
+                "bandwidth_mbps": self.links.block("bandwidth_mbps", rows).ravel(),
+                "cpu_source": endpoint("cpu_usage", src),
+                "cpu_target": endpoint("cpu_usage", dst),
+                "mem_source": endpoint("memory_usage", src),
+                "mem_target": endpoint("memory_usage", dst),
+                "packet_loss_rate": (endpoint("packet_loss_rate", src) + endpoint("packet_loss_rate", dst)) / 2,
+                "alarm_status_source": endpoint("alarm_status", src),
+                "alarm_status_target": endpoint("alarm_status", dst),
+                "latency_avg_source": endpoint("latency_avg", src),
+                "latency_avg_target": endpoint("latency_avg", dst),
+            }
+            # links missing from a tick have no sample of their own
+            yield pd.DataFrame(frame).dropna(how="all", subset=["latency_ms", "bandwidth_mbps"])
+
+    def node_frames(self, seconds=None, since=None, chunk_rows=CHUNK_ROWS):
+        """Node samples with the columns of csv-data/node_data_*.csv, alarm_status as its name."""
+        import pandas as pd
+        if not self.nodes.refresh():
+            return
+        rows = self.nodes.rows(seconds=seconds, since=since)
+        width = len(self.nodes.keys)
+        if not width or not len(rows):
+            return
+        names = np.array([ALARM_NAMES.get(code) for code in range(len(ALARM_NAMES))] + [None], dtype=object)
+        step = max(1, chunk_rows // width)
+        for start in range(0, len(rows), step):
+            chunk = rows[start:start + step]
+            frame = {metric: self.nodes.block(metric, chunk).ravel()
+                     for metric in ("cpu_usage", "memory_usage", "latency_avg", "packet_loss_rate")}
+            codes = self.nodes.block("alarm_status", chunk).ravel()
+            known = (codes >= 0) & (codes < len(ALARM_NAMES))
+            frame["alarm_status"] = names[np.where(known, codes, len(ALARM_NAMES)).astype(np.int64)]
+            yield pd.DataFrame(frame).dropna(how="all", subset=["cpu_usage", "memory_usage", "latency_avg"])
@@ -0,0 +1,246 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+# Seconds; spans a cached lookup (~0.1 ms) up to a full rebuild of a large graph
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# how stale another worker's series may be in a merged /metrics scrape (see Registry.enable_multiprocess)
+FLUSH_SECONDS = 1.0
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, one series per label combination. Name it with the `_total` suffix."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def state(self):
+        """[(label values, value)], JSON-serializable, for other processes to merge."""
+        with self._lock:
+            return list(self._values.items())
+
+    @staticmethod
+    def merge(total, value):
+        return value if total is None else total + value
+
+    def samples(self, state=None):
+        items = sorted(self.state() if state is None else state)
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() is a bisect plus two additions under a
+    lock, cheap enough to leave on for every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(series[:-1]) if series else 0
+
+    def state(self):
+        """[(label values, bucket counts + [sum])], JSON-serializable, for other processes to merge."""
+        with self._lock:
+            return [(key, list(series)) for key, series in self._series.items()]
+
+    @staticmethod
+    def merge(total, series):
+        return list(series) if total is None else [a + b for a, b in zip(total, series)]
+
+    def samples(self, state=None):
+        items = sorted(self.state() if state is None else state)
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class StageTimer:
+    """Consecutive stages of one operation: mark(stage) observes the time since the previous mark."""
+
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.histogram.observe(now - self._last, stage=stage, **self.labels)
+        self._last = now
+
+
+class Registry:
+    """
+    Named metrics rendered together in the Prometheus text exposition format.
+    Each process has its own values; with enable_multiprocess() every process
+    also writes them to a shared directory and render() reports the sum.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._directory = None
+        self._interval = FLUSH_SECONDS
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # modules may be imported twice (script + package); share the first instance
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def enable_multiprocess(self, directory, interval=FLUSH_SECONDS):
+        """
+        For multi-process servers (gunicorn workers): this process writes its
+        series to `directory`/<pid>.json every `interval` seconds and on each
+        render(), and render() merges the files of every process, so a scrape
+        sees all workers whichever one answers. Files of exited workers are
+        kept, so counters never go backwards; start with an empty directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        first = self._directory is None
+        self._directory = directory
+        self._interval = interval
+        self._start_flusher()
+        if first and hasattr(os, "register_at_fork"):
+            # a server that imports the app before forking (gunicorn --preload) loses the thread in each worker
+            os.register_at_fork(after_in_child=self._start_flusher)
+
+    def _start_flusher(self):
+        threading.Thread(target=self._flush_loop, args=(os.getpid(),), name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self, pid):
+        while os.getpid() == pid:
+            time.sleep(self._interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[Metrics] Could not write {self._directory}: {e}")
+
+    def flush(self):
+        from snapshot_io import atomic_write
+        with self._lock:
+            metrics = list(self._metrics.values())
+        state = {metric.name: metric.state() for metric in metrics}
+        atomic_write(os.path.join(self._directory, f"{os.getpid()}.json"), json.dumps(state).encode("utf-8"))
+
+    def _merged_state(self):
+        self.flush()
+        merged = {}
+        for path in glob.glob(os.path.join(self._directory, "*.json")):
+            try:
+                with open(path, "rb") as f:
+                    state = json.loads(f.read())
+            except (OSError, ValueError):
+                continue  # a worker's file is only ever replaced whole; skip one that vanished
+            for name, items in state.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                series = merged.setdefault(name, {})
+                for key, value in items:
+                    key = tuple(key)
+                    series[key] = metric.merge(series.get(key), value)
+        return {name: list(series.items()) for name, series in merged.items()}
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        merged = self._merged_state() if self._directory is not None else None
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(None if merged is None else merged.get(metric.name, [])))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
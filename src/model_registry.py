@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+NATIVE_EXTENSION = ".ubj"
+
+
+def native_model_path(path):
+    """models/foo.pkl -> models/foo.ubj (XGBoost's native UBJSON booster format)."""
+    return os.path.splitext(path)[0] + NATIVE_EXTENSION
+
+
+def preferred_model_path(path):
+    """Serve the native booster when training has exported one, else the joblib pickle."""
+    native = native_model_path(path)
+    return native if os.path.exists(native) else path
+
+
+class NativeBoosterModel:
+    """
+    Lean inference over a native XGBoost booster: no sklearn wrapper, just
+    Booster.inplace_predict on the NumPy feature matrix. Multi-class
+    (softprob) boosters return class indices like XGBClassifier.predict.
+    """
+
+    def __init__(self, path):
+        import xgboost as xgb
+        self.booster = xgb.Booster(model_file=path)
+        self.is_classifier = int(self.booster.attr("num_class") or self._num_class()) > 1
+
+    def _num_class(self):
+        import json
+        config = json.loads(self.booster.save_config())
+        return config["learner"]["learner_model_param"].get("num_class", "0")
+
+    def predict(self, X):
+        predictions = self.booster.inplace_predict(X)
+        if self.is_classifier:
+            return predictions.argmax(axis=1)
+        return predictions
+
+
+def load_model(path):
+    if path.endswith(NATIVE_EXTENSION):
+        return NativeBoosterModel(path)
+    # joblib (and the sklearn wrapper a pickle pulls in) only when a pickle is actually served
+    import joblib
+    return joblib.load(path)
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def save_model_atomic(model, path):
+    """
+    joblib.dump to a temp file and rename it over `path`, then export the
+    native booster next to it the same way, so a running predictor never
+    loads half a model.
+    """
+    import joblib
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+    save_native_atomic(model.get_booster(), native_model_path(path))
+
+
+def save_native_atomic(booster, path):
+    # XGBoost picks the format from the extension, so the temp name keeps it
+    tmp_path = f"{os.path.splitext(path)[0]}.{os.getpid()}.tmp{NATIVE_EXTENSION}"
+    booster.save_model(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class ModelHandle:
+    """
+    One model artifact that is reloaded when its file changes.
+
+    The new file is loaded and validated on a background thread while the
+    current model keeps serving. poll(), called between ticks, swaps in a model
+    that passed validation; one that fails is dropped (the old model stays) and
+    that file version is not retried.
+    """
+
+    def __init__(self, path, validate, name=None, load=load_model):
+        self.path = path
+        self.validate = validate
+        self.name = name or os.path.basename(path)
+        self.load = load
+        self._lock = threading.Lock()
+        self._signature = file_signature(path)
+        self.model = load(path)
+        validate(self.model)
+        self.version = 1
+        self._loading = False
+        self._ready = None
+        self._rejected_signature = None
+
+    def poll(self):
+        """Swap in a validated reload if one is ready and start a reload if the file changed. Returns the current model."""
+        with self._lock:
+            if self._ready is not None:
+                self.model, self._signature = self._ready
+                self._ready = None
+                self.version += 1
+                print(f"🔄 [{time.strftime('%H:%M:%S')}] {self.name} reloaded (version {self.version})")
+
+            signature = file_signature(self.path)
+            if (signature is not None and signature != self._signature
+                    and signature != self._rejected_signature and not self._loading):
+                self._loading = True
+                threading.Thread(target=self._reload, args=(signature,), daemon=True).start()
+            return self.model
+
+    def _reload(self, signature):
+        try:
+            model = self.load(self.path)
+            self.validate(model)
+        except Exception as e:
+            print(f"❗ {self.name} failed validation, keeping version {self.version}: {e}")
+            with self._lock:
+                self._rejected_signature = signature
+                self._loading = False
+            return
+        with self._lock:
+            self._ready = (model, signature)
+            self._loading = False
@@ -0,0 +1,336 @@
+import heapq
+import itertools
+import threading
+import time
+
+from graph_core import NoPath, unique_tree_path
+from metrics import REGISTRY, StageTimer
+
+MAX_CUTOFF = 9
+TOP_K = 5
+# risk_score is reported to 3 places and ranked as reported: an exact score up to this far above
+# a rounded one can still round to it (half an ulp of the last place, plus float error)
+ROUNDING_SLACK = 0.0005 + 1e-9
+
+# Per-request search budget; callers may ask for less, never for more.
+MAX_EXPANSIONS = 50000
+TIME_BUDGET_MS = 1000
+MAX_BATCH_QUERIES = 1000
+# reverse distance arrays kept per snapshot for the most recent risk/best targets
+TARGET_CACHE_SIZE = 16
+
+STRATEGIES = ("hops", "latency", "risk", "best")
+
+PATH_QUERIES = REGISTRY.counter(
+    "netroute_path_queries_total", "Path queries answered, by strategy and HTTP status", ["strategy", "status"])
+PATH_STAGE_SECONDS = REGISTRY.histogram(
+    "netroute_path_query_stage_seconds",
+    "Path query time per stage (cutoff, search, scoring)", ["strategy", "stage"])
+
+
+def health_to_penalty(status):
+    return {"GREEN": 0.0, "YELLOW": 0.5, "RED": 1.0}.get(status, 1.0)
+
+
+def node_penalties(G, health_map):
+    """Health penalty per int node id of `G`, computed once per snapshot."""
+    cached = G.cache.get("penalty")
+    if cached is None or cached[0] is not health_map:
+        cached = G.cache["penalty"] = (health_map, [health_to_penalty(health_map.get(node, "RED")) for node in G.nodes])
+    return cached[1]
+
+
+_target_lock = threading.Lock()
+
+
+def target_distances(G, target, cutoff):
+    """
+    Hop and latency distance from every int node of `G` to `target`, as numpy
+    arrays (latency is None with negative latencies). Hops are only searched
+    out to `cutoff`; the pair is cached per snapshot for repeated targets.
+    """
+    with _target_lock:
+        cache = G.cache.setdefault("to_target", {})
+        cached = cache.get(target)
+    if cached is not None and cached[0] >= cutoff:
+        return cached[1], cached[2]
+
+    hops = G.hops_to(target, limit=cutoff)
+    latency = G.latency_to(target) if G.min_latency >= 0 else None
+    with _target_lock:
+        cache.pop(target, None)
+        if len(cache) >= TARGET_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[target] = (cutoff, hops, latency)
+    return hops, latency
+
+
+class ShortestPathTrees:
+    """
+    Single-source latency (Dijkstra) trees, computed once per source and shared
+    by every query from that source. A tree answers a query only when its path
+    is the unique lowest-latency one; tied pairs and hop queries get the
+    bidirectional searches, so answers match /predict-path.
+    """
+
+    def __init__(self, G):
+        self.G = G
+        self._latency = {}
+
+    def hops_path(self, source, target):
+        """Int-id path; source and target are int ids of self.G."""
+        return self.G.bidirectional_bfs(source, target)
+
+    def latency_path(self, source, target):
+        tree = self._latency.get(source)
+        if tree is None:
+            tree = self._latency[source] = self.G.dijkstra_tree(source)
+        path = unique_tree_path(self.G, tree[0], tree[1], source, target)
+        return path if path is not None else self.G.bidirectional_dijkstra(source, target)
+
+
+class AllPairsLatency(ShortestPathTrees):
+    """
+    All-pairs lowest-latency distances and predecessors from one csgraph
+    Dijkstra run over every source (n x n, 12 bytes per pair). Built in the
+    background by GraphCache; queries then walk a predecessor row instead of
+    searching, with the same tie rule as ShortestPathTrees.
+    """
+
+    def __init__(self, G):
+        from scipy.sparse.csgraph import dijkstra
+        super().__init__(G)
+        dist, pred = dijkstra(G.forward_matrix(), return_predecessors=True)
+        self.dist = dist
+        self.pred = pred
+
+    def latency_path(self, source, target):
+        path = unique_tree_path(self.G, self.pred[source], self.dist[source], source, target)
+        return path if path is not None else self.G.bidirectional_dijkstra(source, target)
+
+
+def solve_path_query(snapshot, source, target, strategy, options=None, trees=None):
+    """
+    Answer one path query against a cached graph snapshot.
+    Returns (payload, status_code). Hop and latency queries go through `trees`
+    when given (shared single-source trees), otherwise a point-to-point search.
+    """
+    stages = StageTimer(PATH_STAGE_SECONDS, strategy=_strategy_label(strategy))
+    payload, status = _solve_path_query(snapshot, source, target, strategy, options or {}, trees, stages)
+    record_query(strategy, status)
+    return payload, status
+
+
+def _strategy_label(strategy):
+    # unknown strategies share one label so clients cannot grow the series set
+    return strategy if strategy in STRATEGIES else "unknown"
+
+
+def record_query(strategy, status):
+    """Count one answered query; also used for answers computed in a worker process."""
+    PATH_QUERIES.inc(strategy=_strategy_label(strategy), status=status)
+
+
+def _solve_path_query(snapshot, source, target, strategy, options, trees, stages):
+    G = snapshot.graph
+    health_map = snapshot.health_map
+
+    if not G.has_node(source) or not G.has_node(target):
+        return {"error": "Invalid source or target"}, 400
+
+    try:
+        if strategy in ["hops", "latency"]:
+            s, t = G.index[source], G.index[target]
+            if strategy == "hops":
+                path = trees.hops_path(s, t) if trees else G.bidirectional_bfs(s, t)
+                message = "Shortest path by hops (excluding RED nodes)"
+            else:
+                path = trees.latency_path(s, t) if trees else G.bidirectional_dijkstra(s, t)
+                message = "Lowest latency path (excluding RED nodes)"
+            stages.mark("search")
+            latency = round(G.path_latency(path), 2)
+            nodes = G.nodes
+            stages.mark("scoring")
+            return {
+                "paths": [{"path": [nodes[i] for i in path], "latency": latency}],
+                "message": message
+            }, 200
+
+        elif strategy in ["risk", "best"]:
+            try:
+                max_expansions = _budget_option(options, "max_expansions", MAX_EXPANSIONS, int)
+                time_budget_ms = _budget_option(options, "time_budget_ms", TIME_BUDGET_MS, float)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+            used_cutoff = risk_cutoff(G, source, target)
+            stages.mark("cutoff")
+            if used_cutoff is None:
+                return {
+                    "paths": [],
+                    "message": "No valid paths found",
+                    "cutoff_used": None,
+                    "budget_exhausted": False
+                }, 200
+
+            result, budget_exhausted = k_best_risk_paths(
+                G, health_map, source, target, used_cutoff,
+                max_expansions=max_expansions, time_budget_ms=time_budget_ms, stages=stages
+            )
+            return {
+                "paths": result,
+                "cutoff_used": used_cutoff,
+                "budget_exhausted": budget_exhausted,
+                "message": f"Lowest risk path using cutoff {used_cutoff}"
+            }, 200
+
+        else:
+            return {"error": f"Unknown strategy: {strategy}"}, 400
+
+    except Exception as e:
+        return {"error": f"Error computing path: {str(e)}"}, 500
+
+
+def _budget_option(options, name, limit, cast):
+    """A client's search budget option, capped at the server `limit`; ValueError unless a positive number."""
+    value = options.get(name, limit)
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        value = cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Invalid {name}: expected a positive number") from None
+    if not value > 0:
+        raise ValueError(f"Invalid {name}: expected a positive number")
+    return min(value, limit)
+
+
+def risk_cutoff(G, source, target, max_cutoff=MAX_CUTOFF):
+    """
+    Hop limit the risk search uses: the first cutoff in 2..max_cutoff that
+    admits a simple path, i.e. max(2, hop distance).
+    """
+    if source == target:
+        return None
+    try:
+        hops = len(G.bidirectional_bfs(G.index[source], G.index[target])) - 1
+    except NoPath:
+        return None
+    if hops > max_cutoff:
+        return None
+    return max(2, hops)
+
+
+def k_best_risk_paths(G, health_map, source, target, cutoff, k=TOP_K,
+                      max_expansions=MAX_EXPANSIONS, time_budget_ms=TIME_BUDGET_MS, stages=None):
+    """
+    Best-first search over simple paths of at most `cutoff` hops, yielding
+    the k lowest risk_score paths without enumerating every candidate.
+
+    risk_score = 0.5 * latency / max_edge_latency + 0.5 * mean node penalty.
+    Partial paths are ordered by an admissible lower bound on the score of any
+    completion (remaining latency from a reverse Dijkstra, penalty averaged
+    over the longest allowed path), so complete paths come off the queue in
+    score order.
+
+    Paths are ranked by the rounded risk_score, ties in the order networkx's
+    all_simple_paths would list them (depth-first, neighbours in link order),
+    so every path that rounds to the k-th score is collected before ranking.
+
+    Returns (results, budget_exhausted). When the budget runs out the best
+    complete paths found so far are returned. `stages` (a metrics.StageTimer)
+    gets "search" and "scoring" marks.
+    """
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    max_latency = G.max_latency
+    min_latency = G.min_latency
+    max_nodes = cutoff + 1
+    source, target = G.index[source], G.index[target]
+
+    # distances to the target over the reversed graph; only the few nodes the search reaches are read
+    hops_to_target, latency_to_target = target_distances(G, target, cutoff)
+
+    penalty = node_penalties(G, health_map)
+    target_penalty = penalty[target]
+
+    def lower_bound(node, hops, latency, penalty_sum):
+        if latency_to_target is not None:
+            latency_lb = latency + latency_to_target[node]
+        else:
+            latency_lb = latency + (cutoff - hops) * min_latency
+        return 0.5 * latency_lb / max_latency + 0.5 * (penalty_sum + target_penalty) / max_nodes
+
+    counter = itertools.count()
+    # (priority, tiebreak, complete, path, latency, penalty_sum)
+    queue = [(lower_bound(source, 0, 0.0, penalty[source]), next(counter), False,
+              (source,), 0.0, penalty[source])]
+    found = []
+    expansions = 0
+    budget_exhausted = False
+    succ, succ_latency = G.succ, G.succ_latency
+    # scores of the k best complete paths queued so far (negated: a max-heap). A partial path whose
+    # bound cannot round to the k-th of them or lower can never make the top k, so it is never queued.
+    best_scores = []
+    kth_limit = float("inf")
+    # once k paths are out, the rest that round to the k-th score may still win its tie
+    tie_limit = float("inf")
+
+    while queue and queue[0][0] <= tie_limit:
+        priority, _, complete, path, latency, penalty_sum = heapq.heappop(queue)
+        if complete:
+            found.append((path, latency, penalty_sum))
+            if len(found) == k:
+                tie_limit = round(priority, 3) + ROUNDING_SLACK
+            continue
+
+        expansions += 1
+        if expansions > max_expansions or (expansions % 256 == 0 and time.perf_counter() > deadline):
+            budget_exhausted = True
+            break
+
+        node = path[-1]
+        hops = len(path)  # hops after taking the next edge
+        for nbr, edge_latency in zip(succ[node], succ_latency[node]):
+            if hops + hops_to_target[nbr] > cutoff or nbr in path:
+                continue
+            new_latency = latency + edge_latency
+            new_penalty = penalty_sum + penalty[nbr]
+            new_path = path + (nbr,)
+            if nbr == target:
+                score = 0.5 * new_latency / max_latency + 0.5 * new_penalty / len(new_path)
+                heapq.heappush(queue, (score, next(counter), True, new_path, new_latency, new_penalty))
+                if len(best_scores) < k:
+                    heapq.heappush(best_scores, -score)
+                elif score < -best_scores[0]:
+                    heapq.heapreplace(best_scores, -score)
+                if len(best_scores) == k:
+                    kth_limit = round(-best_scores[0], 3) + ROUNDING_SLACK
+            else:
+                bound = lower_bound(nbr, hops, new_latency, new_penalty)
+                if bound > kth_limit:
+                    continue
+                heapq.heappush(queue, (bound, next(counter), False, new_path, new_latency, new_penalty))
+
+    if budget_exhausted:
+        # complete paths still queued are valid answers too
+        found.extend((path, latency, penalty_sum)
+                     for _, _, complete, path, latency, penalty_sum in queue if complete)
+
+    if stages is not None:
+        stages.mark("search")
+    nodes = G.nodes
+    ranked = []
+    for path, latency, penalty_sum in found:
+        avg_health_penalty = penalty_sum / len(path)
+        result = {
+            "path": [nodes[i] for i in path],
+            "latency": round(latency, 2),
+            "health_penalty": round(avg_health_penalty, 2),
+            "risk_score": round(0.5 * latency / max_latency + 0.5 * avg_health_penalty, 3)
+        }
+        # position of each hop in its node's neighbour list: depth-first enumeration order
+        ranked.append((result["risk_score"], [succ[u].index(v) for u, v in zip(path, path[1:])], result))
+    ranked.sort(key=lambda item: item[:2])
+    results = [result for _, _, result in ranked]
+    if stages is not None:
+        stages.mark("scoring")
+    return results[:k], budget_exhausted
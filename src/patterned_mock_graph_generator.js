@@ -50,6 +50,18 @@ function rotateFilesAndTrain() {
 
 }
 
+// Publish the live graph atomically (temp file + rename) with a generation stamp,
+// so readers never see a half-written file.
+let generation = 0;
+
+function writeSnapshot(filePath, data) {
+  generation = Math.max(generation + 1, Date.now());
+  data.meta = { generation, written_at: Date.now() / 1000 };
+  const tmpPath = `${filePath}.${process.pid}.tmp`;
+  fs.writeFileSync(tmpPath, JSON.stringify(data));
+  fs.renameSync(tmpPath, filePath);
+}
+
 function appendCsv(filePath, data, fields) {
   const csv = parse(data, { fields, header: !fs.existsSync(filePath) });
   fs.appendFileSync(filePath, csv + '\n');
@@ -192,7 +204,7 @@ setInterval(() => {
   const timestamp = new Date().toISOString();
 
   const livePath = path.join(__dirname, '../static/graph-data', 'graph_live.json');
-  fs.writeFileSync(livePath, JSON.stringify(updatedGraph, null, 2));
+  writeSnapshot(livePath, updatedGraph);
 
 
   const nodeRows = updatedGraph.nodes.map(n => ({
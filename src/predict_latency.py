@@ -1,59 +1,67 @@
-import json
-import joblib
-import time
+import numpy as np
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
-# Load model once
-model = joblib.load("models/xgb_latency_model.pkl")
+MODEL_PATH = "models/xgb_latency_model.pkl"
 
 # Alarm status encoding
 alarm_map = {"GREEN": 0, "YELLOW": 1, "RED": 2}
 
-INTERVAL_SECONDS = 5
-RUN_DURATION_SECONDS = 10 * 60  # 10 minutes
+# Column order the latency model is trained on (train_model.py reads this list)
+LINK_FEATURES = [
+    'cpu_source', 'cpu_target',
+    'mem_source', 'mem_target',
+    'packet_loss_rate', 'bandwidth_mbps',
+    'alarm_status_source', 'alarm_status_target'
+]
+NUM_LINK_FEATURES = len(LINK_FEATURES)
 
-start_time = time.time()
 
-print("🔁 Starting latency prediction loop...")
+def build_link_features(graph):
+    """
+    One feature row per predictable link, in LINK_FEATURES order.
+    Returns (matrix, links) so predictions can be written back.
+    """
+    node_map = {n["id"]: n for n in graph["nodes"]}
+    rows = []
+    links = []
 
-while time.time() - start_time < RUN_DURATION_SECONDS:
-    try:
-        # Load graph-live.json
-        with open("static/graph-data/graph_live.json") as f:
-            graph = json.load(f)
+    for link in graph["links"]:
+        src = node_map.get(link["source"], {}).get("properties", {})
+        tgt = node_map.get(link["target"], {}).get("properties", {})
 
-        node_map = {n["id"]: n for n in graph["nodes"]}
+        if not src or not tgt:
+            continue
 
-        for link in graph["links"]:
-            src = node_map.get(link["source"], {}).get("properties", {})
-            tgt = node_map.get(link["target"], {}).get("properties", {})
+        rows.append([
+            src.get("cpu_usage", 0),
+            tgt.get("cpu_usage", 0),
+            src.get("memory_usage", 0),
+            tgt.get("memory_usage", 0),
+            (src.get("packet_loss_rate", 0) + tgt.get("packet_loss_rate", 0)) / 2,
+            link["properties"].get("bandwidth_mbps", 100),
+            alarm_map.get(src.get("alarm_status", "GREEN"), 0),
+            alarm_map.get(tgt.get("alarm_status", "GREEN"), 0)
+        ])
+        links.append(link)
 
-            if not src or not tgt:
-                continue
+    return np.array(rows, dtype=np.float64).reshape(-1, NUM_LINK_FEATURES), links
 
-            features = [
-                src.get("cpu_usage", 0),
-                tgt.get("cpu_usage", 0),
-                src.get("memory_usage", 0),
-                tgt.get("memory_usage", 0),
-                (src.get("packet_loss_rate", 0) + tgt.get("packet_loss_rate", 0)) / 2,
-                alarm_map.get(src.get("alarm_status", "GREEN"), 0),
-                alarm_map.get(tgt.get("alarm_status", "GREEN"), 0),
-                link["properties"].get("bandwidth_mbps", 100)
-            ]
 
-            predicted_latency = model.predict([features])[0]
-            link["properties"]["predicted_latency_ms"] = float(round(predicted_latency, 2))
+def validate_latency_model(model):
+    """Reject a reloaded model that can't score a probe batch in our feature layout."""
+    predictions = np.asarray(model.predict(np.zeros((2, NUM_LINK_FEATURES))))
+    if predictions.shape != (2,) or not np.isfinite(predictions).all():
+        raise ValueError(f"unexpected predictions for probe input: {predictions!r}")
 
-        with open("static/graph-data/graph_live_predicted.json", "w") as f:
-            json.dump(graph, f, indent=2)
 
-        print(f"✅ [{time.strftime('%H:%M:%S')}] Predictions updated.")
-    
-    except Exception as e:
-        print(f"❗ Error during prediction: {e}")
+def apply_latency_predictions(links, predictions):
+    for link, predicted_latency in zip(links, predictions):
+        link["properties"]["predicted_latency_ms"] = float(round(predicted_latency, 2))
 
-    time.sleep(INTERVAL_SECONDS)
 
-print("🛑 Prediction loop ended after 10 minutes.")
+if __name__ == "__main__":
+    # Kept as an entry point only: prediction_service.py runs both models on one parse per tick
+    # and is the single inference loop (same command-line options).
+    from prediction_service import main
+    main()
@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# rows kept per model; a few ticks of every link/node of a large topology
+CACHE_SIZE = int(os.environ.get("NETROUTE_PREDICTION_CACHE_SIZE", "100000"))
+# float32 mantissa bits kept when quantizing a feature row (23 = exact, 12 = within ~0.02%)
+MANTISSA_BITS = int(os.environ.get("NETROUTE_PREDICTION_CACHE_BITS", "12"))
+
+
+def quantize_rows(X, mantissa_bits=MANTISSA_BITS):
+    """
+    Round every feature to `mantissa_bits` of float32 mantissa, so values that
+    differ only in the noise below that precision share a cache key. Relative,
+    so it treats cpu percentages and packet loss fractions alike.
+    Returns a contiguous uint32 array, one row per feature vector.
+    """
+    bits = np.ascontiguousarray(X, dtype=np.float32).view(np.uint32)
+    drop = 23 - max(0, min(23, mantissa_bits))
+    if not drop:
+        return bits
+    half = np.uint32(1 << (drop - 1))
+    mask = np.uint32((0xFFFFFFFF << drop) & 0xFFFFFFFF)
+    return (bits + half) & mask
+
+
+class PredictionCache:
+    """
+    Bounded LRU of (model version, quantized feature row) -> prediction in
+    front of one model. Only rows missing from the cache are sent to the model,
+    in one batch; a new model version empties the cache, so a retrained model
+    never serves the previous model's answers.
+    """
+
+    def __init__(self, capacity=CACHE_SIZE, mantissa_bits=MANTISSA_BITS):
+        self.capacity = capacity
+        self.mantissa_bits = mantissa_bits
+        self._entries = OrderedDict()
+        self._version = None
+        self._dtype = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # rows answered from / sent past the cache by the latest predict() call
+        self.last_hits = 0
+        self.last_misses = 0
+
+    def predict(self, model, version, X):
+        """model.predict(X), re-inferring only the rows not seen for this model version."""
+        if not len(X) or self.capacity <= 0:
+            self.last_hits, self.last_misses = 0, len(X)
+            return np.asarray(model.predict(X)) if len(X) else np.empty(0)
+        rows = quantize_rows(X, self.mantissa_bits)
+        # one bytes key per row, without a Python-level loop over the rows
+        keys = rows.view(np.dtype((np.void, rows.shape[1] * rows.itemsize))).ravel().tolist()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+                self._dtype = None
+            cached = [self._entries.get(key) for key in keys]
+            dtype = self._dtype
+        missing = [i for i, value in enumerate(cached) if value is None]
+
+        if missing:
+            fresh = np.asarray(model.predict(X[missing]))
+            # answers keep the model's own dtype, so rounding downstream is unchanged
+            dtype = fresh.dtype
+            for i, value in zip(missing, fresh.tolist()):
+                cached[i] = value
+        with self._lock:
+            self.last_hits, self.last_misses = len(keys) - len(missing), len(missing)
+            self.hits += self.last_hits
+            self.misses += self.last_misses
+            if version == self._version:
+                self._dtype = dtype
+                entries = self._entries
+                for key, value in zip(keys, cached):
+                    if key in entries:
+                        entries.move_to_end(key)
+                    else:
+                        entries[key] = value
+                while len(entries) > self.capacity:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+        return np.array(cached, dtype=dtype)
+
+    def tick_stats(self):
+        """Hits/misses of the latest predict() call plus the cache's size and lifetime hit rate."""
+        stats = self.stats()
+        return {"hits": self.last_hits, "misses": self.last_misses, "size": stats["size"],
+                "hit_rate": stats["hit_rate"]}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions, "invalidations": self.invalidations,
+            }
@@ -0,0 +1,91 @@
+import os
+
+from graph_cache import GraphCache
+from path_engine import record_query, solve_path_query
+
+# Worker processes for the risk/best queries of /predict-paths batches (0 = answer them in-process)
+RISK_WORKERS = int(os.environ.get("NETROUTE_RISK_WORKERS", "0"))
+# smaller batches are not worth the round trip to the pool
+MIN_POOL_QUERIES = 32
+POOLED_STRATEGIES = ("risk", "best")
+
+_worker_cache = None
+
+
+def _init_worker(graph_dir):
+    global _worker_cache
+    _worker_cache = GraphCache(graph_dir, hot_sources=0)
+
+
+def _solve_chunk(signature, queries):
+    snapshot = _worker_cache.get()
+    if snapshot.signature != signature:
+        # the files moved on since the request took its snapshot; the web process answers these itself
+        return None
+    return [solve_path_query(snapshot, query.get("source"), query.get("target"), query.get("strategy", "best"), query)
+            for query in queries]
+
+
+class RiskPool:
+    """
+    Process pool for large batches of risk/best searches, which are pure Python
+    and would otherwise hold the GIL one query after another. Each worker keeps
+    its own GraphCache over the same graph directory, so it attaches the
+    prediction service's CSR snapshot (shared page cache) instead of having the
+    graph pickled over from the web process.
+    """
+
+    def __init__(self, graph_dir, workers=RISK_WORKERS):
+        self.graph_dir = graph_dir
+        self.workers = workers
+        self._executor = self._start()
+
+    def _start(self):
+        # the pool is opt-in; its modules are imported here, not by every web process at startup
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn, not fork: the web process has request threads running
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(self.graph_dir,))
+
+    def solve(self, snapshot, queries):
+        """
+        Answer `queries` (dicts) against the graph of `snapshot`. Returns a
+        (payload, status) per query, or None for queries the workers could not
+        answer against that same snapshot.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+        size = -(-len(queries) // self.workers)
+        chunks = [queries[i:i + size] for i in range(0, len(queries), size)]
+        try:
+            futures = [self._executor.submit(_solve_chunk, snapshot.signature, chunk) for chunk in chunks]
+            answers = [self._chunk_answers(future) for future in futures]
+        except BrokenProcessPool as e:
+            print(f"[RiskPool] Worker pool failed, answering in-process: {e}")
+            self._executor = self._start()
+            return [None] * len(queries)
+
+        results = []
+        for chunk, chunk_answers in zip(chunks, answers):
+            if chunk_answers is None:
+                results.extend([None] * len(chunk))
+                continue
+            for query, (payload, status) in zip(chunk, chunk_answers):
+                record_query(query.get("strategy", "best"), status)
+            results.extend(chunk_answers)
+        return results
+
+    @staticmethod
+    def _chunk_answers(future):
+        """A chunk's answers, or None when it failed in the worker; the web process then answers it itself."""
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            print(f"[RiskPool] Worker chunk failed, answering in-process: {e!r}")
+            return None
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
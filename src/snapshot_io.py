@@ -0,0 +1,103 @@
+import json
+import os
+import time
+
+try:
+    import msgpack
+except ImportError:  # binary snapshots are optional
+    msgpack = None
+
+BINARY_EXTENSION = ".msgpack"
+REPLACE_RETRIES = 5
+
+
+def next_generation(previous=0):
+    """Monotonic across writer restarts: never below the wall clock in milliseconds."""
+    return max(previous + 1, int(time.time() * 1000))
+
+
+def binary_path(path):
+    return os.path.splitext(path)[0] + BINARY_EXTENSION
+
+
+def snapshot_generation(data):
+    meta = data.get("meta") if isinstance(data, dict) else None
+    return meta.get("generation") if isinstance(meta, dict) else None
+
+
+def encode_snapshot(graph, generation, binary=False, **meta):
+    """
+    Stamp `graph` with its generation and encode it as compact JSON, plus a
+    msgpack copy when `binary` is set and msgpack is installed.
+    Returns (json_bytes, msgpack_bytes_or_None) for publish_snapshot.
+    """
+    graph["meta"] = {"generation": generation, "written_at": round(time.time(), 3), **meta}
+    text = json.dumps(graph, separators=(",", ":")).encode("utf-8")
+    packed = msgpack.packb(graph) if binary and msgpack is not None else None
+    return text, packed
+
+
+def atomic_write(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            # Windows refuses to replace a file another process has open; retry briefly
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(0.05)
+
+
+def publish_snapshot(path, encoded):
+    """Publish an encode_snapshot result with temp-file + rename, so readers never see a partial file."""
+    text, packed = encoded
+    atomic_write(path, text)
+    sidecar = binary_path(path)
+    if packed is not None:
+        # written after the JSON, so a sidecar at least as new as the JSON is current
+        atomic_write(sidecar, packed)
+    elif os.path.exists(sidecar):
+        try:
+            os.remove(sidecar)
+        except OSError:
+            pass
+
+
+def read_snapshot(path, timings=None):
+    """
+    Load a published snapshot in one read, preferring an up-to-date msgpack
+    sidecar. Raises OSError/ValueError like json.load would.
+    When `timings` is a dict, the "read" and "parse" seconds are added to it.
+    """
+    start = time.perf_counter()
+    raw = None
+    loads = json.loads
+    if msgpack is not None:
+        sidecar = binary_path(path)
+        try:
+            if os.stat(sidecar).st_mtime_ns >= os.stat(path).st_mtime_ns:
+                with open(sidecar, "rb") as f:
+                    raw = f.read()
+                loads = msgpack.unpackb
+        except OSError:
+            pass
+    if raw is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+    read_done = time.perf_counter()
+    try:
+        data = loads(raw)
+    except ValueError:
+        if loads is json.loads:
+            raise
+        # corrupt sidecar: fall back to the JSON
+        with open(path, "rb") as f:
+            data = json.loads(f.read())
+    if timings is not None:
+        timings["read"] = timings.get("read", 0.0) + (read_done - start)
+        timings["parse"] = timings.get("parse", 0.0) + (time.perf_counter() - read_done)
+    return data
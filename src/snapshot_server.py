@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from metrics import REGISTRY
+from snapshot_io import snapshot_generation
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always offered
+    brotli = None
+
+# /graph-snapshot/<name> -> file in the graph data directory
+SNAPSHOT_FILES = {
+    "live": "graph_live.json",
+    "predicted": "graph_live_predicted.json",
+    "alarm-predicted": "graph_live_alarm_predicted.json",
+    "base": "graph.json",
+}
+# versions kept per snapshot for ?since= deltas: one minute of 5 s ticks
+DELTA_HISTORY = int(os.environ.get("NETROUTE_SNAPSHOT_DELTA_HISTORY", "12"))
+# smaller bodies are sent as-is; compressing them saves less than the header costs
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+SNAPSHOT_RESPONSES = REGISTRY.counter(
+    "netroute_graph_snapshot_responses_total",
+    "Graph snapshot responses by kind (full, delta, not_modified)", ["kind"])
+SNAPSHOT_BYTES = REGISTRY.counter(
+    "netroute_graph_snapshot_bytes_total", "Graph snapshot body bytes sent by content encoding", ["encoding"])
+
+
+def _dump(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _link_key(link):
+    return json.dumps([link.get("source"), link.get("target")])
+
+
+class SnapshotVersion:
+    """
+    One version of a snapshot file: the minified body, its compressed copies
+    (made on first request) and each node / link serialized on its own, keyed
+    by node id and (source, target), for deltas against later versions.
+    """
+
+    def __init__(self, raw, signature):
+        data = json.loads(raw)
+        self.signature = signature
+        generation = snapshot_generation(data)
+        # the writer's generation when it stamps one, else a digest of the content
+        self.tag = str(generation) if isinstance(generation, int) else hashlib.blake2b(raw, digest_size=8).hexdigest()
+        self.meta = data.get("meta") if isinstance(data, dict) else None
+        self.body = _dump(data).encode("utf-8")
+        # compressed bodies and deltas, filled on demand: {(body key, encoding) or ("delta", since): bytes}
+        self.encoded = {}
+        self.nodes = OrderedDict()
+        self.links = OrderedDict()
+        if isinstance(data, dict):
+            # a repeated id / link keeps its last entry, like the dict-based readers
+            for node in data.get("nodes", []):
+                self.nodes[_dump(node.get("id"))] = _dump(node)
+            for link in data.get("links", []):
+                self.links[_link_key(link)] = _dump(link)
+
+
+def _diff(old, new):
+    changed = [value for key, value in new.items() if old.get(key) != value]
+    removed = [key for key in old if key not in new]
+    return "[" + ",".join(changed) + "]", "[" + ",".join(removed) + "]"
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0), lowercase."""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def etag_matches(header, tag):
+    """True if If-None-Match names `tag` in any encoding / delta variant (or is *)."""
+    for candidate in (header or "").split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"').split(".")[0].split("-")[0] == tag:
+            return True
+    return False
+
+
+class SnapshotServer:
+    """
+    Serves the graph snapshot files minified, gzip/brotli compressed and with
+    strong ETags derived from the snapshot generation. A file is read and
+    re-encoded once per new version (keyed on mtime and size), not per poll;
+    an unchanged snapshot costs one stat and a 304. `since=<tag>` answers
+    with only the nodes and links that changed after that version.
+    """
+
+    def __init__(self, graph_dir, delta_history=DELTA_HISTORY):
+        self.graph_dir = graph_dir
+        self.delta_history = delta_history
+        self._versions = {name: OrderedDict() for name in SNAPSHOT_FILES}
+        self._current = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name):
+        path = os.path.join(self.graph_dir, SNAPSHOT_FILES[name])
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+        current = self._current.get(name)
+        if current is not None and current.signature == signature:
+            return current
+        with self._lock:
+            current = self._current.get(name)
+            if current is not None and current.signature == signature:
+                return current
+            with open(path, "rb") as f:
+                version = SnapshotVersion(f.read(), signature)
+            versions = self._versions[name]
+            if current is not None and version.tag == current.tag:
+                # rewritten without a new generation (or with identical content): same representation
+                current.signature = signature
+                return current
+            versions[version.tag] = version
+            while len(versions) > max(1, self.delta_history):
+                versions.popitem(last=False)
+            self._current[name] = version
+            return version
+
+    def _encode(self, version, key, body, encodings):
+        if len(body) < MIN_COMPRESS_BYTES:
+            return "identity", body
+        if "br" in encodings and brotli is not None:
+            encoding = "br"
+        elif "gzip" in encodings:
+            encoding = "gzip"
+        else:
+            return "identity", body
+        cache_key = (key, encoding)
+        encoded = version.encoded.get(cache_key)
+        if encoded is None:
+            if encoding == "br":
+                encoded = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                encoded = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            version.encoded[cache_key] = encoded
+        return encoding, encoded
+
+    def _delta_body(self, name, version, since):
+        cached = version.encoded.get(("delta", since))
+        if cached is not None:
+            return cached
+        old = self._versions[name].get(since)
+        if old is None:
+            return None
+        changed_nodes, removed_nodes = _diff(old.nodes, version.nodes)
+        changed_links, removed_links = _diff(old.links, version.links)
+        body = (
+            f'{{"delta":true,"since":{_dump(since)},"tag":{_dump(version.tag)},"meta":{_dump(version.meta)},'
+            f'"nodes":{{"changed":{changed_nodes},"removed":{removed_nodes}}},'
+            f'"links":{{"changed":{changed_links},"removed":{removed_links}}}}}'
+        ).encode("utf-8")
+        version.encoded[("delta", since)] = body
+        return body
+
+    def respond(self, name, if_none_match=None, accept_encoding=None, since=None):
+        """
+        (status, body, headers) for one GET. Raises KeyError for an unknown
+        snapshot name and OSError / ValueError when the file cannot be read.
+        A `since` that is no longer retained gets the full snapshot.
+        """
+        if name not in SNAPSHOT_FILES:
+            raise KeyError(name)
+        version = self._load(name)
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding", "X-Snapshot-Tag": version.tag}
+
+        if etag_matches(if_none_match, version.tag) or since == version.tag:
+            headers["ETag"] = f'"{version.tag}"'
+            SNAPSHOT_RESPONSES.inc(kind="not_modified")
+            return 304, b"", headers
+
+        kind, key, body, tag = "full", "full", version.body, version.tag
+        with self._lock:
+            if since is not None:
+                delta = self._delta_body(name, version, since)
+                if delta is not None:
+                    kind, key, body, tag = "delta", ("delta", since), delta, f"{version.tag}.{since}"
+            encoding, payload = self._encode(version, key, body, accepted_encodings(accept_encoding))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+            tag = f"{tag}-{encoding}"
+        headers["ETag"] = f'"{tag}"'
+        headers["Content-Type"] = "application/json"
+        SNAPSHOT_RESPONSES.inc(kind=kind)
+        SNAPSHOT_BYTES.inc(len(payload), encoding=encoding)
+        return 200, payload, headers
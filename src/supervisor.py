@@ -0,0 +1,156 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Set for every child: app.py then leaves background work to this process
+SUPERVISED_ENV = "NETROUTE_SUPERVISED"
+# Shared by the gunicorn workers so /metrics reports all of them (see wsgi.py)
+METRICS_DIR_ENV = "NETROUTE_METRICS_DIR"
+DEFAULT_METRICS_DIR = os.path.join(ROOT_DIR, "metrics-data")
+
+BACKOFF_INITIAL_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# a child that ran this long before exiting counts as healthy; its backoff resets
+STABLE_AFTER_SECONDS = 60.0
+POLL_SECONDS = 0.5
+STOP_TIMEOUT_SECONDS = 10.0
+
+
+class Job:
+    """
+    One supervised child process. restart is "always" or "on-failure"
+    (a clean exit, like the mock generator's 10-minute stop, is left alone).
+    """
+
+    def __init__(self, name, command, restart="always"):
+        self.name = name
+        self.command = command
+        self.restart = restart
+        self.process = None
+        self.started_at = None
+        self.backoff = BACKOFF_INITIAL_SECONDS
+        self.next_start = 0.0
+        self.restarts = 0
+        self.done = False
+
+    def start(self, env):
+        print(f"🚀 [Supervisor] Starting {self.name}: {' '.join(self.command)}")
+        self.process = subprocess.Popen(self.command, cwd=ROOT_DIR, env=env)
+        self.started_at = time.monotonic()
+
+    def check(self, env):
+        """Start, reap or restart the child as needed. Called from the supervisor loop."""
+        if self.done:
+            return
+        now = time.monotonic()
+        if self.process is None:
+            if now >= self.next_start:
+                self.start(env)
+            return
+
+        code = self.process.poll()
+        if code is None:
+            return
+        self.process = None
+        if code == 0 and self.restart == "on-failure":
+            print(f"🛑 [Supervisor] {self.name} finished.")
+            self.done = True
+            return
+
+        if now - self.started_at >= STABLE_AFTER_SECONDS:
+            self.backoff = BACKOFF_INITIAL_SECONDS
+        print(f"❗ [Supervisor] {self.name} exited with code {code}, restarting in {self.backoff:.0f}s")
+        self.next_start = now + self.backoff
+        self.backoff = min(self.backoff * 2, BACKOFF_MAX_SECONDS)
+        self.restarts += 1
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=STOP_TIMEOUT_SECONDS)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def web_command(server, host, port, workers):
+    """Command line for the routing API under a multi-worker WSGI server (imports wsgi:app)."""
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--bind", f"{host}:{port}", "wsgi:app"]
+    if server == "waitress":
+        return [sys.executable, "-m", "waitress", f"--host={host}", f"--port={port}",
+                f"--threads={workers}", "wsgi:app"]
+    raise ValueError(f"Unknown server: {server}")
+
+
+def reset_metrics_dir(directory):
+    """Empty the workers' metrics directory so a new server starts its counters from zero."""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".json") or name.endswith(".tmp"):
+            os.remove(os.path.join(directory, name))
+
+
+def background_jobs(ai_analysis=False):
+    jobs = [
+        Job("generator", ["node", "src/patterned_mock_graph_generator.js"], restart="on-failure"),
+        Job("prediction-service", [sys.executable, "src/prediction_service.py"]),
+    ]
+    if ai_analysis:
+        jobs.append(Job("ai-analysis", [sys.executable, "src/aiAnalysis.py"]))
+    return jobs
+
+
+def supervise(jobs):
+    """Run `jobs` until SIGINT/SIGTERM, then stop them all."""
+    env = dict(os.environ, **{SUPERVISED_ENV: "1"})
+    stopping = []
+
+    def request_stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    try:
+        while not stopping:
+            for job in jobs:
+                job.check(env)
+            time.sleep(POLL_SECONDS)
+    finally:
+        print("🛑 [Supervisor] Stopping children...")
+        for job in reversed(jobs):
+            job.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run the generator and prediction service once, optionally with the routing API under a WSGI server")
+    parser.add_argument("--web", choices=["gunicorn", "waitress", "none"], default="none",
+                        help="also serve wsgi:app with this server (default: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4,
+                        help="gunicorn worker processes / waitress threads (default: %(default)s)")
+    parser.add_argument("--ai-analysis", action="store_true", help="also run src/aiAnalysis.py (port 5050)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    jobs = background_jobs(ai_analysis=args.ai_analysis)
+    if args.web == "gunicorn":
+        os.environ.setdefault(METRICS_DIR_ENV, DEFAULT_METRICS_DIR)
+        reset_metrics_dir(os.environ[METRICS_DIR_ENV])
+    if args.web != "none":
+        jobs.append(Job("web", web_command(args.web, args.host, args.port, args.workers)))
+    supervise(jobs)
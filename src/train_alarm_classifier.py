@@ -1,37 +1,94 @@
-#training for latency prediction
-import pandas as pd
-import glob
+#training for alarm status prediction
+import argparse
+import os
+import sys
+import joblib
+import numpy as np
 from xgboost import XGBClassifier
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
-import joblib
+
+from history_store import HISTORY_DIR, HistoryStore
+from model_registry import save_model_atomic
+from training_data import recent_csv_files, train_streaming
+
+MODEL_PATH = "models/xgb_alarm_model.pkl"
 
 # Load latest N node CSVs
 NUM_RECENT = 20
-files = sorted(glob.glob("csv-data/node_data_*.csv"), reverse=True)[:NUM_RECENT]
-df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
 
-# Preprocess
-df = df.dropna(subset=['cpu_usage', 'memory_usage', 'latency_avg', 'packet_loss_rate', 'alarm_status'])
-df = df[(df[['cpu_usage', 'memory_usage', 'latency_avg', 'packet_loss_rate']] >= 0).all(axis=1)]
+features = ['cpu_usage', 'memory_usage', 'latency_avg', 'packet_loss_rate']
+dtypes = {**{column: np.float32 for column in features}, 'alarm_status': str}
 
 # Map alarm_status to integer labels
 alarm_map = {'GREEN': 0, 'YELLOW': 1, 'RED': 2}
-df['alarm_label'] = df['alarm_status'].map(alarm_map)
 
-X = df[['cpu_usage', 'memory_usage', 'latency_avg', 'packet_loss_rate']]
-y = df['alarm_label']
+params = {"objective": "multi:softprob", "num_class": 3, "max_depth": 5, "eta": 0.3, "tree_method": "hist"}
+NUM_ROUNDS = 100
+INCREMENTAL_ROUNDS = 20
+
+
+def prepare(chunk):
+    # Preprocess
+    chunk = chunk.dropna(subset=features + ['alarm_status'])
+    chunk = chunk[(chunk[features] >= 0).all(axis=1)]
+    labels = chunk['alarm_status'].map(alarm_map)
+    known = labels.notna()
+    return chunk.loc[known, features], labels[known].to_numpy(dtype=np.int32)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the node alarm classifier from csv-data/")
+    parser.add_argument("--incremental", action="store_true",
+                        default=os.environ.get("NETROUTE_TRAIN_INCREMENTAL") == "1",
+                        help="continue boosting the saved model on CSVs newer than it")
+    parser.add_argument("--source", choices=["csv", "history"],
+                        default=os.environ.get("NETROUTE_TRAIN_SOURCE", "csv"),
+                        help=f"train on csv-data/ or on the prediction service's history store ({HISTORY_DIR}/)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    previous = None
+    if args.incremental and os.path.exists(MODEL_PATH):
+        previous = joblib.load(MODEL_PATH).get_booster()
+        files = recent_csv_files("csv-data/node_data_*.csv", NUM_RECENT, newer_than=MODEL_PATH)
+        rounds = INCREMENTAL_ROUNDS
+    else:
+        files = recent_csv_files("csv-data/node_data_*.csv", NUM_RECENT)
+        rounds = NUM_ROUNDS
+
+    frames = None
+    if args.source == "history":
+        # samples straight from the memory-mapped history, no CSV parsing; incremental = ticks newer than the model
+        history = HistoryStore(HISTORY_DIR)
+        if not history.refresh():
+            print(f"❗ No history in {HISTORY_DIR}/ yet, start the prediction service first")
+            sys.exit(1)
+        since = os.path.getmtime(MODEL_PATH) if previous is not None else None
+        if since is not None and next(history.node_frames(since=since), None) is None:
+            # nothing newer than the model: learn from the whole retained window, like the newest-CSV fallback
+            since = None
+        files = []
+        frames = lambda: history.node_frames(since=since)
 
-# Split & train
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
-model = XGBClassifier(n_estimators=100, max_depth=5)
-model.fit(X_train, y_train)
+    # Stream & train
+    booster, X_test, y_test, train_rows = train_streaming(files, features + ['alarm_status'], dtypes, prepare,
+                                                          params, rounds, previous_booster=previous,
+                                                          frames=frames)
+    print(f"Trained on {train_rows} rows from {'the history store' if frames else f'{len(files)} files'}"
+          f"{' (continued from previous model)' if previous is not None else ''}")
 
-# Evaluate
-y_pred = model.predict(X_test)
-print(classification_report(y_test, y_pred, target_names=alarm_map.keys()))
+    model = XGBClassifier()
+    model.load_model(bytearray(booster.save_raw("ubj")))
 
-# Save model
-joblib.dump(model, "models/xgb_alarm_model.pkl")
-print("✅ Alarm status classifier saved.")
+    # Evaluate
+    if X_test is not None:
+        y_pred = model.predict(X_test)
+        print(classification_report(y_test, y_pred, labels=list(alarm_map.values()),
+                                    target_names=alarm_map.keys(), zero_division=0))
 
+    # Save model
+    # atomic, so running predictors never load a half-written file
+    save_model_atomic(model, MODEL_PATH)
+    print("✅ Alarm status classifier saved.")
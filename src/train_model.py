@@ -1,48 +1,99 @@
 #training for latency prediction
-import pandas as pd
-import glob
+import argparse
+import os
+import sys
+import joblib
+import numpy as np
 from xgboost import XGBRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
-import joblib
+
+from history_store import HISTORY_DIR, HistoryStore
+from model_registry import save_model_atomic
+from predict_latency import LINK_FEATURES
+from training_data import recent_csv_files, train_streaming
+
+MODEL_PATH = "models/xgb_latency_model.pkl"
 
 # === Load latest N CSV files ===
 NUM_RECENT = 20
-files = sorted(glob.glob("csv-data/link_data_*.csv"), reverse=True)[:NUM_RECENT]
-df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
 
 # === Define Features & Target ===
-features = [
-    'cpu_source', 'cpu_target',
-    'mem_source', 'mem_target',
-    'packet_loss_rate', 'bandwidth_mbps',
-    'alarm_status_source', 'alarm_status_target'  # New features
-]
+# shared with the predictors, so inference rows always come in the trained column order
+features = LINK_FEATURES
 
 target = 'latency_ms'
 
-# === Drop NaN and filter bad data ===
-df = df.dropna(subset=features + [target])
-df = df[(df[features] >= 0).all(axis=1)]  # optional: remove invalid rows
+# Fixed dtypes so every chunk parses the same way (and without type inference)
+dtypes = {column: np.float32 for column in features + [target]}
+
+params = {"objective": "reg:squarederror", "max_depth": 6, "eta": 0.1, "tree_method": "hist"}
+NUM_ROUNDS = 150
+INCREMENTAL_ROUNDS = 20
+
+
+def prepare(chunk):
+    # === Drop NaN and filter bad data ===
+    chunk = chunk.dropna(subset=features + [target])
+    chunk = chunk[(chunk[features] >= 0).all(axis=1)]  # optional: remove invalid rows
+    return chunk[features], chunk[target].to_numpy()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the link latency model from csv-data/")
+    parser.add_argument("--incremental", action="store_true",
+                        default=os.environ.get("NETROUTE_TRAIN_INCREMENTAL") == "1",
+                        help="continue boosting the saved model on CSVs newer than it")
+    parser.add_argument("--source", choices=["csv", "history"],
+                        default=os.environ.get("NETROUTE_TRAIN_SOURCE", "csv"),
+                        help=f"train on csv-data/ or on the prediction service's history store ({HISTORY_DIR}/)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    previous = None
+    if args.incremental and os.path.exists(MODEL_PATH):
+        previous = joblib.load(MODEL_PATH).get_booster()
+        files = recent_csv_files("csv-data/link_data_*.csv", NUM_RECENT, newer_than=MODEL_PATH)
+        rounds = INCREMENTAL_ROUNDS
+    else:
+        files = recent_csv_files("csv-data/link_data_*.csv", NUM_RECENT)
+        rounds = NUM_ROUNDS
 
-X = df[features]
-y = df[target]
+    frames = None
+    if args.source == "history":
+        # samples straight from the memory-mapped history, no CSV parsing; incremental = ticks newer than the model
+        history = HistoryStore(HISTORY_DIR)
+        if not history.refresh():
+            print(f"❗ No history in {HISTORY_DIR}/ yet, start the prediction service first")
+            sys.exit(1)
+        since = os.path.getmtime(MODEL_PATH) if previous is not None else None
+        if since is not None and next(history.link_frames(since=since), None) is None:
+            # nothing newer than the model: learn from the whole retained window, like the newest-CSV fallback
+            since = None
+        files = []
+        frames = lambda: history.link_frames(since=since)
 
-# === Train-Test Split ===
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+    # === Train the Model (streamed chunk by chunk) ===
+    booster, X_test, y_test, train_rows = train_streaming(files, features + [target], dtypes, prepare,
+                                                          params, rounds, previous_booster=previous,
+                                                          frames=frames)
+    print(f"Trained on {train_rows} rows from {'the history store' if frames else f'{len(files)} files'}"
+          f"{' (continued from previous model)' if previous is not None else ''}")
 
-# === Train the Model ===
-model = XGBRegressor(n_estimators=150, max_depth=6, learning_rate=0.1)
-model.fit(X_train, y_train)
+    model = XGBRegressor()
+    model.load_model(bytearray(booster.save_raw("ubj")))
 
-# === Evaluate the Model ===
-y_pred = model.predict(X_test)
-mae = mean_absolute_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
+    # === Evaluate the Model ===
+    if X_test is not None:
+        y_pred = model.predict(X_test)
+        mae = mean_absolute_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
 
-print("MAE:", mae)
-print("R2 Score:", r2)
+        print("MAE:", mae)
+        print("R2 Score:", r2)
 
-# === Save the Trained Model ===
-joblib.dump(model, "models/xgb_latency_model.pkl")
-print("✅ Model saved to ml/xgb_latency_model.pkl")
+    # === Save the Trained Model ===
+    # atomic, so running predictors never load a half-written file
+    save_model_atomic(model, MODEL_PATH)
+    print(f"✅ Model saved to {MODEL_PATH}")
@@ -0,0 +1,102 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+CHUNK_ROWS = 50_000
+HOLDOUT_FRACTION = 0.2
+MAX_HOLDOUT_ROWS = 200_000
+
+
+def recent_csv_files(pattern, num_recent, newer_than=None):
+    """Latest `num_recent` CSVs by name; with `newer_than`, only files modified after that path (if any)."""
+    files = sorted(glob.glob(pattern), reverse=True)[:num_recent]
+    if newer_than and os.path.exists(newer_than):
+        cutoff = os.path.getmtime(newer_than)
+        fresh = [f for f in files if os.path.getmtime(f) > cutoff]
+        # always keep at least the newest file so there is something to learn from
+        files = fresh or files[:1]
+    return files
+
+
+class CsvChunkIter(xgb.DataIter):
+    """
+    Streams CSV files in fixed-dtype chunks into an XGBoost QuantileDMatrix,
+    so peak memory is one chunk rather than the concatenated history.
+
+    `prepare(df)` filters a chunk and returns (feature DataFrame, label array);
+    column names are kept so continued boosting matches the saved model. A seeded,
+    per-chunk random mask holds out HOLDOUT_FRACTION of rows for evaluation;
+    the mask is identical on every pass XGBoost makes over the data.
+    """
+
+    def __init__(self, files, usecols, dtypes, prepare, chunk_rows=CHUNK_ROWS, seed=0, frames=None):
+        self.files = files
+        # optional callable returning DataFrame chunks (e.g. history_store frames) used instead of the files
+        self.frames = frames
+        self.usecols = usecols
+        self.dtypes = dtypes
+        self.prepare = prepare
+        self.chunk_rows = chunk_rows
+        self.seed = seed
+        self.train_rows = 0
+        self._holdout_X = []
+        self._holdout_y = []
+        self._holdout_rows = 0
+        self._first_pass = True
+        self._chunks = None
+        super().__init__()
+
+    def _iter_chunks(self):
+        if self.frames is not None:
+            for chunk in self.frames():
+                yield chunk[self.usecols].astype(self.dtypes)
+            return
+        for path in self.files:
+            reader = pd.read_csv(path, usecols=self.usecols, dtype=self.dtypes, chunksize=self.chunk_rows)
+            for chunk in reader:
+                yield chunk
+
+    def reset(self):
+        if self._chunks is not None:
+            self._first_pass = False
+        self._chunks = None
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = enumerate(self._iter_chunks())
+        for index, chunk in self._chunks:
+            X, y = self.prepare(chunk)
+            if not len(y):
+                continue
+            holdout = np.random.default_rng(self.seed + index).random(len(y)) < HOLDOUT_FRACTION
+            if self._first_pass:
+                self.train_rows += int((~holdout).sum())
+                if self._holdout_rows < MAX_HOLDOUT_ROWS:
+                    self._holdout_X.append(X[holdout])
+                    self._holdout_y.append(y[holdout])
+                    self._holdout_rows += int(holdout.sum())
+            if (~holdout).any():
+                input_data(data=X[~holdout], label=y[~holdout])
+                return True
+        return False
+
+    def holdout(self):
+        if not self._holdout_X:
+            return None, None
+        return pd.concat(self._holdout_X), np.concatenate(self._holdout_y)
+
+
+def train_streaming(files, usecols, dtypes, prepare, params, num_boost_round, previous_booster=None, frames=None):
+    """
+    Build a QuantileDMatrix from `files` (or the chunks `frames()` yields)
+    chunk by chunk and train (or continue boosting `previous_booster`).
+    Returns (booster, X_holdout, y_holdout, train_rows).
+    """
+    data_iter = CsvChunkIter(files, usecols, dtypes, prepare, frames=frames)
+    dtrain = xgb.QuantileDMatrix(data_iter, max_bin=params.get("max_bin", 256))
+    booster = xgb.train(params, dtrain, num_boost_round=num_boost_round, xgb_model=previous_booster)
+    X_holdout, y_holdout = data_iter.holdout()
+    return booster, X_holdout, y_holdout, data_iter.train_rows
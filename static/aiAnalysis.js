@@ -1,5 +1,7 @@
 let aiSocket = null; // Keep reference for disconnect
 let aiObserver = null; // MutationObserver for auto-disconnect
+let lastSeq = null; // Sequence number of the last applied server update
+let rowsByNode = new Map(); // Per-node analysis rows as of lastSeq (full state + applied deltas)
 
 export function renderAIAnalysis(containerId) {
   const container = document.getElementById(containerId);
@@ -20,11 +22,11 @@ export function renderAIAnalysis(containerId) {
       </div>
       <div id="tab-alarm-content">
         <p class="text-sm text-gray-400 mb-2">Comparison of real-time and predicted alarm status for each node.</p>
-        <div id="alarmTableContainer" class="overflow-x-auto rounded shadow border border-gray-700"></div>
+        <div id="alarmTableContainer" class="overflow-x-auto rounded shadow border border-gray-700"><p class="text-sm text-gray-400 p-4">Waiting for the analysis service…</p></div>
       </div>
       <div id="tab-latency-content" class="hidden">
-        <p class="text-sm text-gray-400 mb-2">Comparison of real-time and predicted latency between node links.</p>
-        <div id="latencyTableContainer" class="overflow-x-auto rounded shadow border border-gray-700"></div>
+        <p class="text-sm text-gray-400 mb-2">Comparison of real-time and predicted average link latency for each node.</p>
+        <div id="latencyTableContainer" class="overflow-x-auto rounded shadow border border-gray-700"><p class="text-sm text-gray-400 p-4">Waiting for the analysis service…</p></div>
       </div>
     </div>
   `;
@@ -53,15 +55,28 @@ export function renderAIAnalysis(containerId) {
     contentLatency.classList.remove('hidden');
   });
 
-  // Start fetching
-  fetchDataAndRender();
-
   // Socket.IO connection
   aiSocket = io("http://localhost:5050");
   aiSocket.on('connect', () => console.log("✅ Connected to backend via Socket.IO"));
-  aiSocket.on('dataUpdate', () => {
+  // Full state (on connect or after a resync request)
+  aiSocket.on('dataUpdate', (payload) => {
     console.log("⚡ Real-time data update received");
-    fetchDataAndRender();
+    rowsByNode = new Map((payload.rows || []).map(row => [row.node, row]));
+    lastSeq = payload.seq ?? null;
+    renderTables();
+  });
+  // Only changed rows; a gap in the sequence means we missed one, so ask for a full resync
+  aiSocket.on('dataDelta', (delta) => {
+    if (lastSeq === null || delta.seq !== lastSeq + 1) {
+      console.warn(`⚠️ Missed update (have ${lastSeq}, got ${delta.seq}) — requesting resync`);
+      aiSocket.emit('resync');
+      return;
+    }
+    delta.changed.forEach(row => rowsByNode.set(row.node, row));
+    delta.removed.forEach(nodeId => rowsByNode.delete(nodeId));
+    lastSeq = delta.seq;
+    console.log(`⚡ Delta #${delta.seq}: ${delta.changed.length} changed, ${delta.removed.length} removed`);
+    renderTables();
   });
 
   // Auto-disconnect if container is removed
@@ -78,6 +93,8 @@ export function disconnectAIAnalysis() {
   if (aiSocket) {
     aiSocket.disconnect();
     aiSocket = null;
+    lastSeq = null;
+    rowsByNode = new Map();
     console.log("🔌 AI Analysis socket disconnected");
   }
   if (aiObserver) {
@@ -87,64 +104,29 @@ export function disconnectAIAnalysis() {
   }
 }
 
-async function fetchDataAndRender() {
-  try {
-    const [realRes, alarmPredRes, latencyPredRes] = await Promise.all([
-      fetch('/static/graph-data/graph_live.json'),
-      fetch('/static/graph-data/graph_live_alarm_predicted.json'),
-      fetch('/static/graph-data/graph_live_predicted.json')
-    ]);
-
-    const [realData, alarmPredData, latencyPredData] = await Promise.all([
-      realRes.json(),
-      alarmPredRes.json(),
-      latencyPredRes.json()
-    ]);
-
-    const alarmContainer = document.getElementById('alarmTableContainer');
-    const latencyContainer = document.getElementById('latencyTableContainer');
-    if (!alarmContainer || !latencyContainer) {
-      console.warn("⚠️ Skipping render — containers not found");
-      return;
-    }
-
-    // Alarms
-    const realNodeMap = Object.fromEntries(realData.nodes.map(n => [n.id, n.properties]));
-    const predictedAlarmMap = Object.fromEntries(alarmPredData.nodes.map(n => [n.id, n.properties.predicted_alarm_status]));
-    const alarmRows = Object.entries(realNodeMap).map(([id, props]) => ({
-      node: id,
-      real_alarm: props.alarm_status || 'UNKNOWN',
-      predicted_alarm: predictedAlarmMap[id] || 'UNKNOWN',
-      mismatch: (props.alarm_status || 'UNKNOWN') !== (predictedAlarmMap[id] || 'UNKNOWN')
+// Both tables come from the pushed per-node rows; nothing is refetched on an update
+function renderTables() {
+  // same order as the server's full state
+  const rows = [...rowsByNode.values()].sort((a, b) => String(a.node).localeCompare(String(b.node)));
+
+  const alarmRows = rows.map(row => ({
+    node: row.node,
+    real_alarm: row.real_alarm,
+    predicted_alarm: row.predicted_alarm,
+    mismatch: row.real_alarm !== row.predicted_alarm
+  }));
+
+  const latencyRows = rows
+    .filter(row => row.real_latency !== null && row.predicted_latency !== null)
+    .map(row => ({
+      node: row.node,
+      real_latency: row.real_latency,
+      predicted_latency: row.predicted_latency,
+      mismatch: Math.abs(row.real_latency - row.predicted_latency) > 10
     }));
 
-    // Latencies
-    const predictedLatencyMap = {};
-    latencyPredData.links.forEach(link => {
-      predictedLatencyMap[`${link.source}__${link.target}`] = link.properties.predicted_latency_ms;
-    });
-    const latencyRows = realData.links
-      .filter(link => predictedLatencyMap[`${link.source}__${link.target}`] !== undefined)
-      .map(link => {
-        const key = `${link.source}__${link.target}`;
-        return {
-          link: `${link.source} → ${link.target}`,
-          real_latency: link.properties.latency_ms,
-          predicted_latency: predictedLatencyMap[key],
-          mismatch: Math.abs(link.properties.latency_ms - predictedLatencyMap[key]) > 10
-        };
-      });
-
-    renderAlarmTable(alarmRows);
-    renderLatencyTable(latencyRows);
-
-  } catch (err) {
-    console.error('Error loading AI data:', err);
-    const alarmContainer = document.getElementById('alarmTableContainer');
-    const latencyContainer = document.getElementById('latencyTableContainer');
-    if (alarmContainer) alarmContainer.innerHTML = '<p class="text-red-400">Error loading data.</p>';
-    if (latencyContainer) latencyContainer.innerHTML = '<p class="text-red-400">Error loading data.</p>';
-  }
+  renderAlarmTable(alarmRows);
+  renderLatencyTable(latencyRows);
 }
 
 function renderAlarmTable(data) {
@@ -198,7 +180,7 @@ function renderLatencyTable(data) {
     <table class="min-w-full text-sm text-left">
       <thead class="bg-gray-800 text-gray-300">
         <tr>
-          <th class="py-2 px-4">Link</th>
+          <th class="py-2 px-4">Node</th>
           <th class="py-2 px-4">Real Latency</th>
           <th class="py-2 px-4">Predicted Latency</th>
           <th class="py-2 px-4">Mismatch</th>
@@ -207,7 +189,7 @@ function renderLatencyTable(data) {
       <tbody>
         ${data.map(row => `
           <tr>
-            <td class="py-2 px-4 border-b border-gray-700">${row.link}</td>
+            <td class="py-2 px-4 border-b border-gray-700">${row.node}</td>
             <td class="py-2 px-4 border-b border-gray-700">${row.real_latency.toFixed(1)} ms</td>
             <td class="py-2 px-4 border-b border-gray-700">${row.predicted_latency.toFixed(1)} ms</td>
             <td class="py-2 px-4 border-b border-gray-700">${getBadge(row.mismatch)}</td>
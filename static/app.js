@@ -46,11 +46,11 @@ window.loadView = async function(view) {
   if (view === 'path') {
     renderPathForm('mainContent');
   } else if (view === 'realtime') {
-    renderTopology('mainContent', '/static/graph-data/graph_live.json');
+    renderTopology('mainContent', '/graph-snapshot/live');
   } else if (view === 'predictedLat') {
-    renderTopology('mainContent', '/static/graph-data/graph_live_predicted.json');
+    renderTopology('mainContent', '/graph-snapshot/predicted');
   } else if (view === 'predictedAlarm') {
-    renderTopology('mainContent', '/static/graph-data/graph_live_alarm_predicted.json');
+    renderTopology('mainContent', '/graph-snapshot/alarm-predicted');
   } else if (view === 'aiAnalysis') {
     renderAIAnalysis('mainContent');
   } else {
@@ -138,7 +138,8 @@ export async function renderPathForm(containerId) {
   // ✅ Refresh node dropdowns and update timestamp
   async function fetchAndRenderNodes() {
     try {
-      const res = await fetch("/static/graph-data/graph_live_alarm_predicted.json");
+      // revalidated against the snapshot ETag each poll; unchanged data is a 304
+      const res = await fetch("/graph-snapshot/alarm-predicted", { cache: "no-cache" });
       const alarmData = await res.json();
 
       const healthyNodes = alarmData.nodes.filter(
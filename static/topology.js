@@ -407,9 +407,8 @@ function buildGraph(data) {
   function poll() {
     if (isPaused || inFlight) return;
     inFlight = true;
-    const ts = Date.now();
-
-    d3.json(`${dataUrl}?t=${ts}`)
+    // revalidate instead of cache-busting: the server answers 304 while the snapshot ETag is unchanged
+    d3.json(dataUrl, { cache: "no-cache" })
       .then((newData) => {
         inFlight = false;
         if (!newData?.nodes?.length) {
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# the modules import each other by bare name, the way app.py and the scripts put src/ on the path
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from graph_cache import GraphCache  # noqa: E402
+from synthetic_topology import generate_topology, write_graph_files  # noqa: E402
+
+
+@pytest.fixture
+def topology():
+    return generate_topology(400, seed=0)
+
+
+@pytest.fixture
+def graph_dir(tmp_path, topology):
+    write_graph_files(topology, str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def snapshot(graph_dir):
+    return GraphCache(graph_dir).get()
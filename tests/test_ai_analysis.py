@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask_socketio")
+pytest.importorskip("watchdog")
+
+from aiAnalysis import CoalescingRefresher  # noqa: E402
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_burst_of_events_runs_the_action_once():
+    calls = []
+    refresher = CoalescingRefresher(lambda: calls.append(time.monotonic()), quiet_window=0.05, max_delay=1.0)
+    refresher.start()
+    for _ in range(10):
+        refresher.notify()
+
+    assert _wait(lambda: refresher.stats()["refreshes_processed"] == 1)
+    time.sleep(0.15)
+    assert len(calls) == 1
+    assert refresher.stats() == {"events_received": 10, "events_coalesced": 9, "refreshes_processed": 1,
+                                 "pending": 0}
+
+
+def test_steady_stream_is_refreshed_within_max_delay():
+    calls = []
+    refresher = CoalescingRefresher(lambda: calls.append(time.monotonic()), quiet_window=0.2, max_delay=0.3)
+    refresher.start()
+    stop = threading.Event()
+
+    def writer():
+        # events every 50 ms never leave a 200 ms quiet window
+        while not stop.is_set():
+            refresher.notify()
+            time.sleep(0.05)
+
+    start = time.monotonic()
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert _wait(lambda: len(calls) >= 2)
+    finally:
+        stop.set()
+        thread.join()
+    assert calls[0] - start < 0.3 + 0.15
+
+    def settled():
+        stats = refresher.stats()
+        return not stats["pending"] and stats["events_received"] == stats["events_coalesced"] + len(calls)
+
+    # every event ends up in exactly one refresh
+    assert _wait(settled)
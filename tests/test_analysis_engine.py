@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from analysis_engine import AnalysisEngine, RowDeltaTracker
+from graph_store import CSR_FILE
+from snapshot_io import read_snapshot
+from synthetic_topology import write_graph_files
+
+
+def _row(node, latency=10.0, alarm="GREEN"):
+    return {"node": node, "real_latency": latency, "predicted_latency": latency,
+            "real_alarm": alarm, "predicted_alarm": alarm}
+
+
+def test_delta_reports_changed_and_removed_rows():
+    tracker = RowDeltaTracker()
+    first = tracker.delta([_row("a"), _row("b")])
+    assert first == {"seq": 1, "changed": [_row("a"), _row("b")], "removed": []}
+
+    assert tracker.delta([_row("a"), _row("b")]) is None
+
+    second = tracker.delta([_row("a", alarm="RED")])
+    assert second == {"seq": 2, "changed": [_row("a", alarm="RED")], "removed": ["b"]}
+    assert tracker.full() == {"seq": 2, "rows": [_row("a", alarm="RED")]}
+
+
+def test_delta_compares_unhashable_values():
+    tracker = RowDeltaTracker()
+    tracker.delta([_row("a", latency=[1, 2])])
+    assert tracker.delta([_row("a", latency=[1, 2])]) is None
+    assert tracker.delta([_row("a", latency=[1, 3])])["changed"] == [_row("a", latency=[1, 3])]
+
+
+def _engine(graph_dir, csr, loads):
+    files = {name: os.path.join(graph_dir, file) for name, file in (
+        ("real", "graph_live.json"), ("pred_latency", "graph_live_predicted.json"),
+        ("pred_alarm", "graph_live_alarm_predicted.json"))}
+
+    def load(path):
+        loads.append(os.path.basename(path))
+        return read_snapshot(path)
+
+    return AnalysisEngine(files, load, csr_path=os.path.join(graph_dir, CSR_FILE) if csr else None)
+
+
+@pytest.mark.parametrize("csr", [True, False])
+def test_refresh_recomputes_only_touched_rows(tmp_path, topology, csr):
+    graph_dir = str(tmp_path)
+    generation = write_graph_files(topology, graph_dir, csr=csr)
+    loads = []
+    engine = _engine(graph_dir, csr, loads)
+    engine.refresh()
+
+    built = []
+    build_row = engine._build_row
+    engine._build_row = lambda node_id: built.append(node_id) or build_row(node_id)
+
+    # unchanged files are not even read
+    loads.clear()
+    before = engine.refresh()
+    assert loads == [] and built == []
+
+    link = next(link for link in topology["links"] if link["source"] != link["target"])
+    link["properties"]["predicted_latency_ms"] += 7.5
+    node = next(node for node in topology["nodes"]
+                if node["id"] not in (link["source"], link["target"])
+                and node["properties"]["predicted_alarm_status"] != "GREEN")
+    node["properties"]["predicted_alarm_status"] = "GREEN"
+    write_graph_files(topology, graph_dir, generation=generation, csr=csr)
+
+    rows = engine.refresh()
+    assert set(built) == {link["source"], link["target"], node["id"]}
+    assert rows != before
+    assert rows == _engine(graph_dir, csr, []).refresh()
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+import app as api
+from graph_cache import GraphCache
+
+
+@pytest.fixture
+def client(graph_dir, monkeypatch):
+    monkeypatch.setattr(api, "graph_cache", GraphCache(graph_dir))
+    return api.app.test_client()
+
+
+def _pairs(client, count=80, seed=3):
+    nodes = list(api.graph_cache.get().graph.nodes)
+    rng = random.Random(seed)
+    return [rng.sample(nodes, 2) for _ in range(count)]
+
+
+def test_batch_matches_single_queries(client):
+    queries = [{"source": s, "target": t, "strategy": strategy}
+               for s, t in _pairs(client) for strategy in ("hops", "latency")]
+    # warm the hot-source trees first, as a busy /predict-path would have
+    for query in queries * 2:
+        client.post("/predict-path", json=query)
+    single = [client.post("/predict-path", json=query) for query in queries]
+    batch = client.post("/predict-paths", json={"queries": queries}).get_json()["results"]
+    for query, response, result in zip(queries, single, batch):
+        assert result["status"] == response.status_code, query
+        assert result.get("paths") == response.get_json().get("paths"), query
+
+
+@pytest.mark.parametrize("options", [
+    {"max_expansions": "abc"}, {"max_expansions": None}, {"max_expansions": 0},
+    {"time_budget_ms": "abc"}, {"time_budget_ms": None}, {"time_budget_ms": -1},
+])
+def test_invalid_search_budget_is_a_client_error(client, options):
+    source, target = _pairs(client, count=1)[0]
+    response = client.post("/predict-path", json={"source": source, "target": target, "strategy": "risk", **options})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,76 @@
+import random
+
+from dynamic_sssp import TREE_LOOKUPS
+from graph_cache import GraphCache
+from path_engine import solve_path_query
+from synthetic_topology import write_graph_files
+
+from .test_path_engine import reference_answer, reference_graph
+
+
+def _pairs(snapshot, count=100, seed=1):
+    rng = random.Random(seed)
+    nodes = list(snapshot.graph.nodes)
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+
+def test_repeated_queries_return_identical_payloads(snapshot):
+    # the third query from a source is served from its hot tree; the answer must not change
+    for strategy in ("hops", "latency"):
+        for source, target in _pairs(snapshot):
+            answers = [solve_path_query(snapshot, source, target, strategy, trees=snapshot.trees) for _ in range(3)]
+            assert answers[0] == answers[1] == answers[2], (strategy, source, target)
+
+
+def test_repaired_latency_tree_matches_full_search(graph_dir, topology):
+    cache = GraphCache(graph_dir)
+    pairs = _pairs(cache.get(), count=40)
+    for source, target in pairs:
+        for _ in range(2):
+            hot = cache.get()
+            solve_path_query(hot, source, target, "latency", trees=hot.trees)
+
+    rng = random.Random(2)
+    for link in rng.sample(topology["links"], len(topology["links"]) // 100):
+        link["properties"]["predicted_latency_ms"] = round(rng.uniform(5, 30), 2)
+    write_graph_files(topology, graph_dir, generation=1)
+
+    repaired = cache.get()
+    assert repaired.version == 2
+    repairs = TREE_LOOKUPS.value(kind="latency", result="repaired")
+    for source, target in pairs:
+        payload, status = solve_path_query(repaired, source, target, "latency", trees=repaired.trees)
+        expected, expected_status = solve_path_query(repaired, source, target, "latency")
+        assert status == expected_status
+        if status == 200:
+            assert payload["paths"][0]["latency"] == expected["paths"][0]["latency"]
+    assert TREE_LOOKUPS.value(kind="latency", result="repaired") > repairs
+
+
+def _tied(topology, rng):
+    # two latency values: most pairs have several equal-cost routes
+    for link in topology["links"]:
+        link["properties"]["predicted_latency_ms"] = rng.choice([5, 10])
+
+
+def test_tied_latencies_answer_like_networkx_before_and_after_repair(tmp_path, topology):
+    rng = random.Random(8)
+    _tied(topology, rng)
+    write_graph_files(topology, str(tmp_path))
+    cache = GraphCache(str(tmp_path))
+    pairs = _pairs(cache.get(), count=150)
+
+    for generation in range(2):
+        if generation:
+            for link in rng.sample(topology["links"], len(topology["links"]) // 100):
+                link["properties"]["predicted_latency_ms"] = rng.choice([5, 10])
+            write_graph_files(topology, str(tmp_path), generation=generation)
+        G, _ = reference_graph(topology)
+        for source, target in pairs:
+            expected = reference_answer(G, source, target, "latency")
+            for _ in range(3):
+                hot = cache.get()
+                payload, status = solve_path_query(hot, source, target, "latency", trees=hot.trees)
+                assert status == (200 if expected else 500)
+                if expected:
+                    assert payload["paths"] == [{"path": expected[0], "latency": expected[1]}]
@@ -0,0 +1,81 @@
+import os
+import random
+import time
+
+from graph_cache import ALARM_FILE, CACHE_LOOKUPS, LATENCY_FILE, GraphCache
+from graph_store import CSR_FILE
+from path_engine import AllPairsLatency, solve_path_query
+from synthetic_topology import write_graph_files
+
+from .test_path_engine import reference_answer, reference_graph
+
+
+def _wait_for_table(snapshot, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while snapshot.latency_table is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return snapshot.latency_table
+
+
+def test_all_pairs_table_is_built_in_the_background(tmp_path, topology):
+    rng = random.Random(9)
+    for link in topology["links"]:
+        link["properties"]["predicted_latency_ms"] = rng.choice([5, 10])
+    write_graph_files(topology, str(tmp_path))
+    snapshot = GraphCache(str(tmp_path), precompute_all_pairs=True).get()
+    table = _wait_for_table(snapshot)
+    assert isinstance(table, AllPairsLatency)
+    assert snapshot.info()["all_pairs_table"]
+
+    G, _ = reference_graph(topology)
+    nodes = sorted(G.nodes)
+    for source, target in (rng.sample(nodes, 2) for _ in range(200)):
+        expected = reference_answer(G, source, target, "latency")
+        payload, status = solve_path_query(snapshot, source, target, "latency", trees=table)
+        assert status == (200 if expected else 500)
+        if expected:
+            assert payload["paths"] == [{"path": expected[0], "latency": expected[1]}]
+
+
+def test_all_pairs_table_respects_the_node_cap(graph_dir):
+    snapshot = GraphCache(graph_dir, precompute_all_pairs=True, all_pairs_max_nodes=10).get()
+    time.sleep(0.1)
+    assert snapshot.latency_table is None
+
+
+def test_unchanged_files_are_a_cache_hit(graph_dir):
+    cache = GraphCache(graph_dir)
+    first = cache.get()
+    hits = CACHE_LOOKUPS.value(result="hit")
+    assert cache.get() is first
+    assert CACHE_LOOKUPS.value(result="hit") == hits + 1
+
+
+def test_mtime_or_size_change_rebuilds(graph_dir, topology):
+    cache = GraphCache(graph_dir)
+    first = cache.get()
+
+    # same bytes, newer mtime
+    path = os.path.join(graph_dir, LATENCY_FILE)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    second = cache.get()
+    assert second is not first and second.version == first.version + 1
+
+    # new content, new size
+    topology["links"].pop()
+    write_graph_files(topology, graph_dir, generation=1, csr=False)
+    third = cache.get()
+    assert third.version == second.version + 1
+    assert third.graph.number_of_edges() < second.graph.number_of_edges()
+    assert cache.get() is third
+
+
+def test_unreadable_files_keep_the_last_good_graph(graph_dir):
+    cache = GraphCache(graph_dir)
+    good = cache.get()
+    with open(os.path.join(graph_dir, ALARM_FILE), "w") as f:
+        f.write("{not json")
+    os.remove(os.path.join(graph_dir, CSR_FILE))
+    assert cache.get() is good
+    assert cache.get() is good
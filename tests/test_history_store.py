@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from history_store import MIN_WIDTH, HistoryStore
+
+
+def _graph(tick, num_nodes=3):
+    nodes = [{"id": f"n{i}", "properties": {"cpu_usage": tick * 10 + i, "alarm_status": "GREEN" if tick % 2 else "RED"}}
+             for i in range(num_nodes)]
+    links = [{"source": "n0", "target": f"n{i}", "properties": {"latency_ms": tick + i, "bandwidth_mbps": 100}}
+             for i in range(1, num_nodes)]
+    return {"nodes": nodes, "links": links}
+
+
+def test_percentiles_match_numpy(tmp_path):
+    writer = HistoryStore(str(tmp_path), capacity=64, writable=True)
+    for tick in range(20):
+        writer.append_snapshot(_graph(tick), timestamp=1000.0 + tick)
+
+    reader = HistoryStore(str(tmp_path))
+    ticks, result = reader.percentiles("node", "cpu_usage", [50, 95])
+    assert ticks == 20
+    for i in range(3):
+        samples = [tick * 10 + i for tick in range(20)]
+        assert result[f"n{i}"] == [round(float(np.percentile(samples, q)), 3) for q in (50, 95)]
+
+    ticks, result = reader.percentiles("link", "latency_ms", [0, 100], keys=[("n0", "n2"), ("x", "y")])
+    assert result == {("n0", "n2"): [2.0, 21.0]}
+
+
+def test_ring_keeps_the_newest_ticks(tmp_path):
+    capacity = 8
+    writer = HistoryStore(str(tmp_path), capacity=capacity, writable=True)
+    for tick in range(30):
+        writer.append_snapshot(_graph(tick), timestamp=1000.0 + tick)
+
+    reader = HistoryStore(str(tmp_path))
+    # a full ring hides the row the writer overwrites next
+    ticks, result = reader.percentiles("node", "cpu_usage", [0, 100])
+    assert ticks == capacity - 1
+    assert result["n0"] == [float((30 - capacity + 1) * 10), 290.0]
+    rows = reader.nodes.rows(since=1025.0)
+    assert reader.nodes.timestamps[rows].tolist() == [1026.0, 1027.0, 1028.0, 1029.0]
+
+
+def test_table_grows_for_new_entities(tmp_path):
+    writer = HistoryStore(str(tmp_path), capacity=16, writable=True)
+    writer.append_snapshot(_graph(0), timestamp=1.0)
+    reader = HistoryStore(str(tmp_path))
+    assert reader.refresh()
+
+    writer.append_snapshot(_graph(1, num_nodes=MIN_WIDTH + 10), timestamp=2.0)
+    ticks, result = reader.percentiles("node", "cpu_usage", [50])
+    assert ticks == 2
+    assert result["n0"] == [5.0]
+    assert result[f"n{MIN_WIDTH + 5}"] == [float(10 + MIN_WIDTH + 5)]
+
+
+def test_missing_history_raises(tmp_path):
+    with pytest.raises(KeyError):
+        HistoryStore(str(tmp_path)).percentiles("node", "cpu_usage", [50])
@@ -0,0 +1,57 @@
+import json
+
+from metrics import Registry
+
+
+def make_registry():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests served.", ["route"])
+    seconds = registry.histogram("request_seconds", "Request time.", ["route"], buckets=(0.1, 1.0))
+    return registry, requests, seconds
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry, requests, seconds = make_registry()
+    requests.inc(route="/a")
+    requests.inc(2, route='say "hi"\n')
+    seconds.observe(0.05, route="/a")
+    seconds.observe(0.5, route="/a")
+    seconds.observe(5.0, route="/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP request_seconds Request time.",
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{route="/a",le="0.1"} 1',
+        'request_seconds_bucket{route="/a",le="1.0"} 2',
+        'request_seconds_bucket{route="/a",le="+Inf"} 3',
+        'request_seconds_sum{route="/a"} 5.55',
+        'request_seconds_count{route="/a"} 3',
+        "# HELP requests_total Requests served.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 1',
+        'requests_total{route="say \\"hi\\"\\n"} 2',
+    ]
+
+
+def test_multiprocess_render_sums_every_worker(tmp_path):
+    registry, requests, seconds = make_registry()
+    registry.enable_multiprocess(str(tmp_path), interval=3600)
+    requests.inc(route="/a")
+    seconds.observe(0.5, route="/a")
+
+    # another gunicorn worker's file: same metrics, its own values
+    other, other_requests, other_seconds = make_registry()
+    other_requests.inc(3, route="/a")
+    other_requests.inc(route="/b")
+    other_seconds.observe(2.0, route="/a")
+    state = {"requests_total": other_requests.state(), "request_seconds": other_seconds.state()}
+    (tmp_path / "12345.json").write_text(json.dumps(state))
+
+    lines = registry.render().splitlines()
+    assert 'requests_total{route="/a"} 4' in lines
+    assert 'requests_total{route="/b"} 1' in lines
+    assert 'request_seconds_bucket{route="/a",le="1.0"} 1' in lines
+    assert 'request_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'request_seconds_sum{route="/a"} 2.5' in lines
+    # this worker's own series are on disk for the others to merge
+    assert len(list(tmp_path.glob("*.json"))) == 2
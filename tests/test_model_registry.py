@@ -0,0 +1,64 @@
+import os
+import time
+
+import numpy as np
+
+from model_registry import ModelHandle
+from predict_latency import NUM_LINK_FEATURES, validate_latency_model
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X):
+        return np.full(len(X), self.value)
+
+
+def _load(path):
+    with open(path) as f:
+        text = f.read()
+    return ConstantModel(float(text))  # "corrupt" raises ValueError
+
+
+def _write(path, text, bump):
+    with open(path, "w") as f:
+        f.write(text)
+    # a distinct mtime even on coarse-grained filesystems
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + bump * 1_000_000_000))
+
+
+def _settle(handle, timeout=2.0):
+    """poll() until the background reload has finished and any result was swapped in."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        handle.poll()
+        if not handle._loading and handle._ready is None:
+            return handle.poll()
+        time.sleep(0.01)
+    raise AssertionError("reload did not finish")
+
+
+def test_bad_model_file_keeps_the_previous_model(tmp_path):
+    path = str(tmp_path / "model.txt")
+    _write(path, "1.5", bump=0)
+    loads = []
+    handle = ModelHandle(path, validate_latency_model, load=lambda p: loads.append(p) or _load(p))
+    probe = np.zeros((1, NUM_LINK_FEATURES))
+
+    for bump, text in ((1, "corrupt"), (2, "nan")):
+        # unparseable, then loadable but rejected by validation
+        _write(path, text, bump)
+        model = _settle(handle)
+        assert handle.version == 1
+        assert model.predict(probe).tolist() == [1.5]
+
+    # a rejected file version is not retried
+    count = len(loads)
+    _settle(handle)
+    assert len(loads) == count
+
+    _write(path, "2.5", bump=3)
+    model = _settle(handle)
+    assert handle.version == 2
+    assert model.predict(probe).tolist() == [2.5]
@@ -0,0 +1,91 @@
+import random
+
+import networkx as nx
+import pytest
+
+from graph_cache import GraphCache
+from path_engine import health_to_penalty, k_best_risk_paths, risk_cutoff, solve_path_query
+from synthetic_topology import generate_topology, write_graph_files
+
+
+def reference_graph(topology):
+    """The per-request networkx graph /predict-path used to build."""
+    health_map = {node["id"]: node["properties"].get("predicted_alarm_status", "RED") for node in topology["nodes"]}
+    G = nx.DiGraph()
+    for link in topology["links"]:
+        G.add_edge(link["source"], link["target"], latency=link["properties"].get("predicted_latency_ms", 9999))
+    G.remove_nodes_from([node_id for node_id, status in health_map.items() if status == "RED"])
+    return G, health_map
+
+
+def reference_answer(G, source, target, strategy):
+    try:
+        path = nx.shortest_path(G, source, target, weight="latency" if strategy == "latency" else None)
+    except nx.NetworkXNoPath:
+        return None
+    return path, round(sum(G[path[i]][path[i + 1]]["latency"] for i in range(len(path) - 1)), 2)
+
+
+@pytest.mark.parametrize("csr", [True, False])
+@pytest.mark.parametrize("strategy", ["hops", "latency"])
+def test_paths_match_networkx(tmp_path, topology, csr, strategy):
+    write_graph_files(topology, str(tmp_path), csr=csr)
+    snapshot = GraphCache(str(tmp_path)).get()
+    G, _ = reference_graph(topology)
+    rng = random.Random(5)
+    nodes = sorted(G.nodes)
+    for source, target in (rng.sample(nodes, 2) for _ in range(150)):
+        expected = reference_answer(G, source, target, strategy)
+        # a third query from the same source is served from the hot-source trees
+        for _ in range(3):
+            payload, status = solve_path_query(snapshot, source, target, strategy, trees=snapshot.trees)
+            if expected is None:
+                assert status == 500 and "No path" in payload["error"]
+            else:
+                assert status == 200
+                assert payload["paths"] == [{"path": expected[0], "latency": expected[1]}]
+
+
+def test_red_and_unknown_nodes_are_rejected(snapshot, topology):
+    red = next(node["id"] for node in topology["nodes"] if node["properties"]["predicted_alarm_status"] == "RED")
+    alive = next(iter(snapshot.graph.nodes))
+    for source, target in ((red, alive), (alive, "NOT_A_NODE"), (["unhashable"], alive)):
+        assert solve_path_query(snapshot, source, target, "hops") == ({"error": "Invalid source or target"}, 400)
+
+
+def _brute_force_risk(G, health_map, source, target, cutoff, k=5):
+    """The (path, risk_score) list /predict-path used to return: a stable sort of every simple path."""
+    max_latency = max((G[u][v]["latency"] for u, v in G.edges), default=1)
+    ranked = []
+    for path in nx.all_simple_paths(G, source, target, cutoff=cutoff):
+        latency = sum(G[path[i]][path[i + 1]]["latency"] for i in range(len(path) - 1))
+        penalty = sum(health_to_penalty(health_map.get(node, "RED")) for node in path) / len(path)
+        ranked.append((path, round(0.5 * latency / max_latency + 0.5 * penalty, 3)))
+    ranked.sort(key=lambda item: item[1])
+    return ranked[:k]
+
+
+def test_k_best_risk_paths_match_exhaustive_search(tmp_path):
+    topology = generate_topology(80, density=3, seed=7)
+    for link in topology["links"]:
+        # whole 5 ms steps, so some paths tie on the rounded risk_score
+        link["properties"]["predicted_latency_ms"] = float(round(link["properties"]["predicted_latency_ms"] / 5) * 5)
+    write_graph_files(topology, str(tmp_path))
+    snapshot = GraphCache(str(tmp_path)).get()
+    G, health_map = reference_graph(topology)
+    rng = random.Random(6)
+    nodes = sorted(G.nodes)
+    checked = ties = 0
+    for source, target in (rng.sample(nodes, 2) for _ in range(200)):
+        cutoff = risk_cutoff(snapshot.graph, source, target, max_cutoff=5)
+        if cutoff is None:
+            continue
+        results, exhausted = k_best_risk_paths(snapshot.graph, snapshot.health_map, source, target, cutoff)
+        assert not exhausted
+        expected = _brute_force_risk(G, health_map, source, target, cutoff)
+        # same paths in the same order, including paths whose rounded scores tie
+        assert [(result["path"], result["risk_score"]) for result in results] == expected
+        scores = [score for _, score in expected]
+        ties += len(scores) != len(set(scores))
+        checked += 1
+    assert checked > 20 and ties > 0
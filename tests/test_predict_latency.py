@@ -0,0 +1,20 @@
+from predict_latency import LINK_FEATURES, build_link_features
+
+
+def test_link_features_follow_training_column_order():
+    graph = {
+        "nodes": [
+            {"id": "a", "properties": {"cpu_usage": 1, "memory_usage": 3, "packet_loss_rate": 4,
+                                       "alarm_status": "YELLOW"}},
+            {"id": "b", "properties": {"cpu_usage": 2, "memory_usage": 5, "packet_loss_rate": 6,
+                                       "alarm_status": "RED"}},
+        ],
+        "links": [{"source": "a", "target": "b", "properties": {"bandwidth_mbps": 500}}],
+    }
+    features, links = build_link_features(graph)
+    row = dict(zip(LINK_FEATURES, features[0].tolist()))
+    assert row == {
+        "cpu_source": 1, "cpu_target": 2, "mem_source": 3, "mem_target": 5, "packet_loss_rate": 5,
+        "bandwidth_mbps": 500, "alarm_status_source": 1, "alarm_status_target": 2,
+    }
+    assert links == graph["links"]
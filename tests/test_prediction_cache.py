@@ -0,0 +1,55 @@
+import numpy as np
+
+from prediction_cache import PredictionCache, quantize_rows
+
+
+class CountingModel:
+    def __init__(self, offset=0.0):
+        self.offset = offset
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return np.asarray(X, dtype=np.float32).sum(axis=1) + self.offset
+
+
+def test_only_unseen_rows_reach_the_model():
+    model = CountingModel()
+    cache = PredictionCache(capacity=100)
+    X = np.array([[1.0, 2.0], [3.0, 4.0]])
+    assert cache.predict(model, 1, X).tolist() == [3.0, 7.0]
+    assert model.rows == 2
+
+    X2 = np.array([[3.0, 4.0], [5.0, 6.0], [1.0, 2.0]])
+    predictions = cache.predict(model, 1, X2)
+    assert predictions.tolist() == [7.0, 11.0, 3.0]
+    assert predictions.dtype == np.float32
+    assert model.rows == 3
+    assert (cache.last_hits, cache.last_misses) == (2, 1)
+
+
+def test_new_model_version_empties_the_cache():
+    cache = PredictionCache(capacity=100)
+    X = np.array([[1.0, 2.0]])
+    cache.predict(CountingModel(), 1, X)
+    retrained = CountingModel(offset=100.0)
+    assert cache.predict(retrained, 2, X).tolist() == [103.0]
+    assert retrained.rows == 1
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_capacity_evicts_least_recently_used():
+    model = CountingModel()
+    cache = PredictionCache(capacity=2)
+    for value in (1.0, 2.0, 3.0):
+        cache.predict(model, 1, np.array([[value]]))
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+    cache.predict(model, 1, np.array([[1.0]]))
+    assert cache.last_misses == 1
+
+
+def test_quantization_merges_only_sub_precision_noise():
+    rows = quantize_rows(np.array([[50.0], [50.0001], [50.1]]), mantissa_bits=12)
+    assert rows[0] == rows[1] != rows[2]
+    exact = quantize_rows(np.array([[50.0], [50.0001]]), mantissa_bits=23)
+    assert exact[0] != exact[1]
@@ -0,0 +1,63 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import prediction_service
+from model_registry import ModelHandle
+from snapshot_io import read_snapshot
+
+
+class SumModel:
+    def predict(self, X):
+        return np.asarray(X).sum(axis=1)
+
+
+class GreenModel:
+    def predict(self, X):
+        return np.zeros(len(X), dtype=np.int64)
+
+
+MODELS = {prediction_service.LATENCY_MODEL_PATH: SumModel(), prediction_service.ALARM_MODEL_PATH: GreenModel()}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch, topology):
+    for name, file in (("LIVE_GRAPH_PATH", "graph_live.json"), ("LATENCY_OUTPUT_PATH", "graph_live_predicted.json"),
+                       ("ALARM_OUTPUT_PATH", "graph_live_alarm_predicted.json"),
+                       ("CSR_OUTPUT_PATH", "graph_live_snapshot.csr")):
+        monkeypatch.setattr(prediction_service, name, str(tmp_path / file))
+    monkeypatch.setattr(prediction_service, "preferred_model_path", lambda path: path)
+    monkeypatch.setattr(prediction_service, "ModelHandle",
+                        lambda path, validate: ModelHandle(path, validate, load=MODELS.__getitem__))
+    with open(prediction_service.LIVE_GRAPH_PATH, "w") as f:
+        json.dump(topology, f)
+    return prediction_service.PredictionService()
+
+
+def test_tick_skips_unchanged_input(service, topology):
+    assert service.tick()
+    published = read_snapshot(prediction_service.LATENCY_OUTPUT_PATH)
+    generation = service.generation
+    assert published["meta"]["generation"] == generation
+    assert set(published["meta"]["tick_ms"]) == {"parse", "featurize", "infer"}
+
+    assert not service.tick()
+
+    # rewritten with the same bytes: new mtime, same digest
+    path = prediction_service.LIVE_GRAPH_PATH
+    st = os.stat(path)
+    with open(path, "w") as f:
+        json.dump(topology, f)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert not service.tick()
+    assert service.generation == generation
+
+    topology["nodes"][0]["properties"]["cpu_usage"] = 1.5
+    with open(path, "w") as f:
+        json.dump(topology, f)
+    assert service.tick()
+    assert service.generation > generation
+    alarms = read_snapshot(prediction_service.ALARM_OUTPUT_PATH)
+    assert {node["properties"]["predicted_alarm_status"] for node in alarms["nodes"]} == {"GREEN"}
@@ -0,0 +1,38 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import risk_pool
+from path_engine import solve_path_query
+
+
+@pytest.fixture
+def pool(graph_dir, monkeypatch):
+    # threads instead of spawned processes, so the worker function can be patched
+    monkeypatch.setattr(risk_pool.RiskPool, "_start", lambda self: ThreadPoolExecutor(
+        max_workers=self.workers, initializer=risk_pool._init_worker, initargs=(self.graph_dir,)))
+    pool = risk_pool.RiskPool(graph_dir, workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def _queries(snapshot, count=8):
+    rng = random.Random(4)
+    nodes = list(snapshot.graph.nodes)
+    return [{"source": s, "target": t, "strategy": "risk"} for s, t in (rng.sample(nodes, 2) for _ in range(count))]
+
+
+def test_pool_answers_match_in_process(pool, snapshot):
+    queries = _queries(snapshot)
+    expected = [solve_path_query(snapshot, q["source"], q["target"], q["strategy"], q) for q in queries]
+    assert pool.solve(snapshot, queries) == expected
+
+
+def test_failing_worker_falls_back_in_process(pool, snapshot, monkeypatch):
+    def broken(signature, queries):
+        raise RuntimeError("worker failed")
+
+    monkeypatch.setattr(risk_pool, "_solve_chunk", broken)
+    queries = _queries(snapshot)
+    assert pool.solve(snapshot, queries) == [None] * len(queries)
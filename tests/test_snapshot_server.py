@@ -0,0 +1,82 @@
+import gzip
+import json
+
+import pytest
+
+from snapshot_server import SnapshotServer
+from synthetic_topology import write_graph_files
+
+
+def _get(server, **kwargs):
+    status, body, headers = server.respond("predicted", **kwargs)
+    if headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return status, json.loads(body) if body else None, headers
+
+
+def _apply(graph, delta):
+    """A client applying a ?since= response: removed nodes are ids, removed links [source, target]."""
+    nodes = {node["id"]: node for node in graph["nodes"]}
+    links = {(link["source"], link["target"]): link for link in graph["links"]}
+    for node_id in delta["nodes"]["removed"]:
+        del nodes[node_id]
+    for source, target in delta["links"]["removed"]:
+        del links[source, target]
+    nodes.update((node["id"], node) for node in delta["nodes"]["changed"])
+    links.update(((link["source"], link["target"]), link) for link in delta["links"]["changed"])
+    return sorted(nodes.values(), key=lambda n: n["id"]), sorted(links.values(), key=lambda l: (l["source"], l["target"]))
+
+
+@pytest.fixture
+def server(graph_dir):
+    return SnapshotServer(graph_dir)
+
+
+def test_etag_round_trip(server):
+    status, full, headers = _get(server, accept_encoding="gzip")
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert headers["ETag"] == f'"{headers["X-Snapshot-Tag"]}-gzip"'
+
+    # any encoding variant of the current tag is a 304, identity or compressed
+    for accept_encoding in ("gzip", None):
+        status, body, not_modified = _get(server, if_none_match=headers["ETag"], accept_encoding=accept_encoding)
+        assert status == 304 and body is None
+        assert not_modified["ETag"] == f'"{headers["X-Snapshot-Tag"]}"'
+
+    status, plain, plain_headers = _get(server, if_none_match='"stale"')
+    assert status == 200 and "Content-Encoding" not in plain_headers
+    assert plain == full
+
+
+def test_delta_round_trip(server, graph_dir, topology):
+    _, old, headers = _get(server)
+    tag = headers["X-Snapshot-Tag"]
+
+    topology["links"][0]["properties"]["predicted_latency_ms"] = 123.45
+    removed_link = topology["links"].pop()
+    topology["nodes"][0]["properties"]["cpu_usage"] = 99.9
+    removed_node = topology["nodes"].pop()
+    write_graph_files(topology, graph_dir, generation=old["meta"]["generation"], csr=False)
+
+    status, delta, delta_headers = _get(server, since=tag, accept_encoding="gzip")
+    assert status == 200 and delta["delta"] and delta["since"] == tag
+    assert delta["tag"] == delta_headers["X-Snapshot-Tag"] != tag
+    # links of the removed node stay in the file, so only the popped link goes
+    assert delta["links"]["removed"] == [[removed_link["source"], removed_link["target"]]]
+    assert delta["nodes"]["removed"] == [removed_node["id"]]
+    assert len(delta["links"]["changed"]) == 1 and len(delta["nodes"]["changed"]) == 1
+
+    _, new, _ = _get(server)
+    nodes, links = _apply(old, delta)
+    assert nodes == sorted(new["nodes"], key=lambda n: n["id"])
+    assert links == sorted(new["links"], key=lambda l: (l["source"], l["target"]))
+
+    # the client is now up to date; an unknown tag gets the full snapshot
+    assert _get(server, since=delta["tag"])[0] == 304
+    status, full, _ = _get(server, since="unknown")
+    assert status == 200 and "delta" not in full and full == new
+
+
+def test_unknown_snapshot_name(server):
+    with pytest.raises(KeyError):
+        server.respond("nope")
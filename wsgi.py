@@ -0,0 +1,15 @@
+# Entry point for multi-worker WSGI servers, e.g.
+#   gunicorn --workers 4 --bind 127.0.0.1:5000 wsgi:app
+# Importing app.py starts no background work; run the generator and the
+# prediction service once, beside the workers, with src/supervisor.py.
+import os
+
+from app import app
+from metrics import REGISTRY
+
+# Each gunicorn worker is a process with its own counters; with a shared
+# directory every /metrics scrape merges all of them (the supervisor sets it).
+if os.environ.get("NETROUTE_METRICS_DIR"):
+    REGISTRY.enable_multiprocess(os.environ["NETROUTE_METRICS_DIR"])
+
+application = app